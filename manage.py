@@ -25,6 +25,12 @@ def cmd_doctor(args):
     print(json.dumps(doctor(), indent=2, ensure_ascii=False))
 
 
+def cmd_migrate(args):
+    from src.migrations import run_migrations
+    run_migrations(revision=args.revision)
+    print("Database schema is up to date." if args.revision == "head" else f"Database migrated to {args.revision}.")
+
+
 def cmd_test(args):
     sys.exit(run([sys.executable, "test_installation.py"]))
 
@@ -171,6 +177,9 @@ def main():
     sub.add_parser("update").set_defaults(func=cmd_update)
     sub.add_parser("doctor").set_defaults(func=cmd_doctor)
     sub.add_parser("test").set_defaults(func=cmd_test)
+    p = sub.add_parser("migrate", help="Apply database migrations (DATABASE_URL)")
+    p.add_argument("revision", nargs="?", default="head")
+    p.set_defaults(func=cmd_migrate)
     sub.add_parser("docker-up").set_defaults(func=cmd_docker_up)
     sub.add_parser("restart-worker").set_defaults(func=cmd_restart_worker)
     p = sub.add_parser("set-dry-run")
@@ -0,0 +1,87 @@
+"""Initial schema: the tables the application created with create_all() before migrations
+
+Revision ID: 0001
+Revises:
+Create Date: 2025-01-15
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "action_logs",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("action_type", sa.String(), nullable=True),
+        sa.Column("details", sa.String(), nullable=True),
+        sa.Column("timestamp", sa.DateTime(), nullable=True),
+        sa.Column("result_url", sa.String(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_action_logs_id", "action_logs", ["id"])
+    op.create_index("ix_action_logs_action_type", "action_logs", ["action_type"])
+
+    op.create_table(
+        "posts",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("content", sa.String(), nullable=True),
+        sa.Column("timestamp", sa.DateTime(), nullable=True),
+        sa.Column("summary_comment", sa.String(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_posts_id", "posts", ["id"])
+
+    op.create_table(
+        "comments",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("post_url", sa.String(), nullable=True),
+        sa.Column("content", sa.String(), nullable=True),
+        sa.Column("timestamp", sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_comments_id", "comments", ["id"])
+
+    op.create_table(
+        "invitations",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("profile_url", sa.String(), nullable=True),
+        sa.Column("timestamp", sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_invitations_id", "invitations", ["id"])
+
+    op.create_table(
+        "tokens",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("access_token", sa.String(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_tokens_id", "tokens", ["id"])
+
+    op.create_table(
+        "translated_posts",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("original_post_url", sa.String(), nullable=False),
+        sa.Column("original_content", sa.String(), nullable=True),
+        sa.Column("translated_content", sa.String(), nullable=True),
+        sa.Column("original_author", sa.String(), nullable=True),
+        sa.Column("image_url", sa.String(), nullable=True),
+        sa.Column("status", sa.String(), nullable=True),
+        sa.Column("posted_at", sa.DateTime(), nullable=True),
+        sa.Column("our_post_url", sa.String(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_translated_posts_id", "translated_posts", ["id"])
+    op.create_index("ix_translated_posts_original_post_url", "translated_posts", ["original_post_url"], unique=True)
+
+
+def downgrade() -> None:
+    for table in ("translated_posts", "tokens", "invitations", "comments", "posts", "action_logs"):
+        op.drop_table(table)
@@ -0,0 +1,134 @@
+"""Automation state tables and action_logs indexes
+
+Adds the tables behind the AI response cache, the scheduled action queue, the
+feed-entry store, rate limiting, daily quotas and the action log rollup, plus
+the timestamp indexes on action_logs. Before migrations existed these were
+created at startup (create_all() or by the modules themselves), so a database
+may already have some of them; those are left alone.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2025-03-31
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+NEW_TABLES = (
+    "ai_response_cache",
+    "scheduled_actions",
+    "feed_entries",
+    "rate_limit_buckets",
+    "daily_quotas",
+    "action_log_daily_counts",
+)
+
+
+def _create_table(inspector, name, *columns, indexes=()):
+    if inspector.has_table(name):
+        return
+    op.create_table(name, *columns)
+    for index_name, index_columns, unique in indexes:
+        op.create_index(index_name, name, index_columns, unique=unique)
+
+
+def _create_index(inspector, name, table, columns):
+    if name not in {index["name"] for index in inspector.get_indexes(table)}:
+        op.create_index(name, table, columns)
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+
+    _create_table(
+        inspector, "ai_response_cache",
+        sa.Column("key", sa.String(64), nullable=False),
+        sa.Column("model_name", sa.String(), nullable=True),
+        sa.Column("response", sa.Text(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("last_accessed_at", sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint("key"),
+        indexes=[
+            ("ix_ai_response_cache_created_at", ["created_at"], False),
+            ("ix_ai_response_cache_last_accessed_at", ["last_accessed_at"], False),
+        ],
+    )
+    _create_table(
+        inspector, "scheduled_actions",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("action_type", sa.String(), nullable=False),
+        sa.Column("payload", sa.Text(), nullable=False),
+        sa.Column("run_at", sa.DateTime(), nullable=False),
+        sa.Column("status", sa.String(), nullable=False),
+        sa.Column("attempts", sa.Integer(), nullable=False),
+        sa.Column("last_error", sa.String(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+        indexes=[
+            ("ix_scheduled_actions_id", ["id"], False),
+            ("ix_scheduled_actions_status_run_at", ["status", "run_at"], False),
+        ],
+    )
+    _create_table(
+        inspector, "feed_entries",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("entry_hash", sa.String(64), nullable=False),
+        sa.Column("feed_url", sa.String(), nullable=True),
+        sa.Column("guid", sa.String(), nullable=True),
+        sa.Column("title", sa.String(), nullable=True),
+        sa.Column("link", sa.String(), nullable=True),
+        sa.Column("summary", sa.Text(), nullable=True),
+        sa.Column("published_at", sa.DateTime(), nullable=False),
+        sa.Column("first_seen_at", sa.DateTime(), nullable=True),
+        sa.Column("status", sa.String(), nullable=False),
+        sa.Column("status_changed_at", sa.DateTime(), nullable=True),
+        sa.Column("commented_at", sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+        indexes=[
+            ("ix_feed_entries_id", ["id"], False),
+            ("ix_feed_entries_entry_hash", ["entry_hash"], True),
+            ("ix_feed_entries_feed_url", ["feed_url"], False),
+            ("ix_feed_entries_status_published_at", ["status", "published_at"], False),
+        ],
+    )
+    if "commented_at" not in {column["name"] for column in inspector.get_columns("feed_entries")}:
+        # Stores created before comment tracking lack this column
+        op.add_column("feed_entries", sa.Column("commented_at", sa.DateTime(), nullable=True))
+    _create_table(
+        inspector, "rate_limit_buckets",
+        sa.Column("family", sa.String(), nullable=False),
+        sa.Column("tokens", sa.Float(), nullable=False),
+        sa.Column("updated_at", sa.Float(), nullable=False),
+        sa.Column("blocked_until", sa.Float(), nullable=False),
+        sa.PrimaryKeyConstraint("family"),
+    )
+    _create_table(
+        inspector, "daily_quotas",
+        sa.Column("day", sa.String(10), nullable=False),
+        sa.Column("action_type", sa.String(), nullable=False),
+        sa.Column("count", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("day", "action_type"),
+    )
+    _create_table(
+        inspector, "action_log_daily_counts",
+        sa.Column("day", sa.String(10), nullable=False),
+        sa.Column("action_type", sa.String(), nullable=False),
+        sa.Column("count", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("day", "action_type"),
+    )
+
+    _create_index(inspector, "ix_action_logs_timestamp", "action_logs", ["timestamp"])
+    _create_index(inspector, "ix_action_logs_action_type_timestamp", "action_logs", ["action_type", "timestamp"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_action_logs_action_type_timestamp", table_name="action_logs")
+    op.drop_index("ix_action_logs_timestamp", table_name="action_logs")
+    for table in reversed(NEW_TABLES):
+        op.drop_table(table)
@@ -0,0 +1,176 @@
+# src/action_log.py
+"""
+Buffered writer for the action_logs audit table.
+
+log_action() is called several times per post/comment cycle, mostly from
+async code. Writing each record in its own transaction costs one commit (and
+fsync) per call on the caller's thread, which blocks the event loop. Instead,
+records are queued in memory and a background thread inserts them in one
+transaction every ACTION_LOG_FLUSH_INTERVAL_MS or as soon as
+ACTION_LOG_BATCH_SIZE records are waiting. The timestamp is taken when the
+record is queued, so the log order is unaffected by the batching. close()
+flushes whatever is left; it runs on application shutdown and at exit.
+
+roll_up_action_logs() keeps the table small: whole days older than
+ACTION_LOG_RETENTION_DAYS are summarised into action_log_daily_counts and
+their raw rows deleted.
+"""
+import atexit
+import datetime
+import logging
+import threading
+from collections import deque
+from typing import List, Optional
+
+from sqlalchemy import func
+
+from .config import settings
+from .database import SessionLocal
+from .models import ActionLog, ActionLogDailyCount
+
+logger = logging.getLogger(__name__)
+
+
+class ActionLogWriter:
+    """Queues ActionLog rows and inserts them in batches from a background thread."""
+
+    def __init__(self, session_factory, flush_interval_ms: int = 250, batch_size: int = 50, max_queue: int = 10000):
+        self.session_factory = session_factory
+        self.flush_interval = flush_interval_ms / 1000.0
+        self.batch_size = batch_size
+        self.max_queue = max_queue
+        self._queue: deque = deque()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def write(self, action_type: str, details: str, url: str = None) -> None:
+        """Queues one record; returns immediately."""
+        record = {
+            "action_type": action_type,
+            "details": details,
+            "result_url": url,
+            "timestamp": datetime.datetime.utcnow(),
+        }
+        with self._lock:
+            if len(self._queue) >= self.max_queue:
+                dropped = self._queue.popleft()
+                logger.warning(f"Action log queue full, dropping oldest record: {dropped['action_type']}")
+            self._queue.append(record)
+            pending = len(self._queue)
+            self._ensure_thread()
+        if pending >= self.batch_size:
+            self._wakeup.set()
+
+    def _ensure_thread(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            self._stopped.clear()
+            self._thread = threading.Thread(target=self._run, name="action-log-writer", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stopped.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+    def _take_batch(self) -> List[dict]:
+        with self._lock:
+            batch = list(self._queue)
+            self._queue.clear()
+        return batch
+
+    def flush(self) -> int:
+        """Writes all queued records in one transaction and returns how many were written."""
+        with self._flush_lock:
+            batch = self._take_batch()
+            if not batch:
+                return 0
+            db = self.session_factory()
+            try:
+                db.bulk_insert_mappings(ActionLog, batch)
+                db.commit()
+                return len(batch)
+            except Exception as e:
+                db.rollback()
+                logger.error(f"Could not write {len(batch)} action log record(s): {e}")
+                with self._lock:
+                    # Put them back for the next flush, unless the queue has filled up meanwhile
+                    room = self.max_queue - len(self._queue)
+                    if room > 0:
+                        self._queue.extendleft(reversed(batch[-room:]))
+                return 0
+            finally:
+                db.close()
+
+    @property
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._queue)
+
+    def close(self) -> None:
+        """Stops the background thread and writes the remaining records."""
+        self._stopped.set()
+        self._wakeup.set()
+        thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout=5)
+        self.flush()
+
+
+action_log_writer = ActionLogWriter(
+    SessionLocal,
+    flush_interval_ms=settings.ACTION_LOG_FLUSH_INTERVAL_MS,
+    batch_size=settings.ACTION_LOG_BATCH_SIZE,
+    max_queue=settings.ACTION_LOG_MAX_QUEUE,
+)
+atexit.register(action_log_writer.close)
+
+
+def roll_up_action_logs(
+    session_factory=None,
+    retention_days: Optional[int] = None,
+    now: Optional[datetime.datetime] = None,
+) -> int:
+    """
+    Adds the per-action-type counts of every (UTC) day that ended more than
+    `retention_days` ago to action_log_daily_counts, deletes those raw rows and
+    returns how many were deleted. Each day is handled in its own transaction,
+    so the write lock is never held for long.
+    """
+    session_factory = session_factory or SessionLocal
+    retention_days = settings.ACTION_LOG_RETENTION_DAYS if retention_days is None else retention_days
+    now = now or datetime.datetime.utcnow()
+    cutoff = datetime.datetime.combine((now - datetime.timedelta(days=retention_days)).date(), datetime.time())
+
+    db = session_factory()
+    try:
+        oldest = db.query(func.min(ActionLog.timestamp)).filter(ActionLog.timestamp < cutoff).scalar()
+        if oldest is None:
+            return 0
+        deleted = 0
+        day_start = datetime.datetime.combine(oldest.date(), datetime.time())
+        while day_start < cutoff:
+            day_end = day_start + datetime.timedelta(days=1)
+            in_day = (ActionLog.timestamp >= day_start, ActionLog.timestamp < day_end)
+            action_type = func.coalesce(ActionLog.action_type, "")
+            counts = db.query(action_type, func.count(ActionLog.id)).filter(*in_day).group_by(action_type).all()
+            day = day_start.date().isoformat()
+            for name, count in counts:
+                summary = db.get(ActionLogDailyCount, (day, name))
+                if summary is None:
+                    db.add(ActionLogDailyCount(day=day, action_type=name, count=count))
+                else:
+                    summary.count += count
+            if counts:
+                deleted += db.query(ActionLog).filter(*in_day).delete(synchronize_session=False)
+                db.commit()
+            day_start = day_end
+        return deleted
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
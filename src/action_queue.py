@@ -0,0 +1,211 @@
+# src/action_queue.py
+"""
+Durable queue of delayed actions (the 45s like, the 90s summary comment, ...).
+
+Actions are rows in the scheduled_actions table instead of sleeping coroutines,
+so they survive restarts and cost nothing while they wait. A scheduler job
+calls dispatch_due_actions() every few seconds; it claims due rows in batches
+and runs their handlers concurrently.
+
+A handler that raises is retried after ACTION_RETRY_DELAY_SECONDS (times the
+attempt number) until ACTION_MAX_ATTEMPTS is reached, so handlers should only
+swallow errors that a retry cannot fix. is_final_attempt() tells a handler
+whether its failure will be the last one.
+
+An action left 'running' by a process that died is only run again when its
+type was registered as idempotent (a like). For anything else (a comment) the
+request may already have reached LinkedIn, so it is marked failed instead.
+"""
+import asyncio
+import contextvars
+import datetime
+import json
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+from .action_log import action_log_writer
+from .config import settings
+from .database import SessionLocal
+from .models import ScheduledAction
+
+logger = logging.getLogger(__name__)
+
+# action_type -> async handler called with the payload as keyword arguments
+ACTION_HANDLERS: Dict[str, Callable[..., Awaitable[Any]]] = {}
+# Action types that are safe to run twice, so interrupted ones can be run again
+IDEMPOTENT_ACTIONS: Set[str] = set()
+
+# The action whose handler is running in the current task
+_current_action: contextvars.ContextVar[Optional[Dict[str, Any]]] = contextvars.ContextVar("current_action", default=None)
+
+
+def register_action(action_type: str, handler: Callable[..., Awaitable[Any]], idempotent: bool = False) -> None:
+    """
+    Registers the coroutine function that executes an action type. Pass
+    idempotent=True only when running an action twice has no extra effect.
+    """
+    ACTION_HANDLERS[action_type] = handler
+    if idempotent:
+        IDEMPOTENT_ACTIONS.add(action_type)
+    else:
+        IDEMPOTENT_ACTIONS.discard(action_type)
+
+
+def enqueue_action(action_type: str, payload: Dict[str, Any], delay_seconds: float = 0) -> int:
+    """Persists an action to run `delay_seconds` from now and returns its id."""
+    run_at = datetime.datetime.utcnow() + datetime.timedelta(seconds=delay_seconds)
+    db = SessionLocal()
+    try:
+        action = ScheduledAction(
+            action_type=action_type,
+            payload=json.dumps(payload, ensure_ascii=False),
+            run_at=run_at,
+            status="pending",
+        )
+        db.add(action)
+        db.commit()
+        return action.id
+    finally:
+        db.close()
+
+
+def is_final_attempt() -> bool:
+    """
+    True when a failure of the running handler will not be retried. Handlers
+    called directly (outside the queue) are always on their final attempt.
+    """
+    action = _current_action.get()
+    return action is None or action["attempts"] >= settings.ACTION_MAX_ATTEMPTS
+
+
+def claim_due_actions(limit: int) -> List[Dict[str, Any]]:
+    """
+    Marks up to `limit` due actions as running and returns them.
+
+    Each row is claimed with a conditional UPDATE (status still 'pending'), so
+    when several processes dispatch at once every action is executed only once.
+    """
+    now = datetime.datetime.utcnow()
+    db = SessionLocal()
+    try:
+        candidates = (
+            db.query(ScheduledAction.id, ScheduledAction.action_type, ScheduledAction.payload, ScheduledAction.attempts)
+            .filter(ScheduledAction.status == "pending", ScheduledAction.run_at <= now)
+            .order_by(ScheduledAction.run_at.asc())
+            .limit(limit)
+            .all()
+        )
+        claimed = []
+        for action_id, action_type, payload, attempts in candidates:
+            updated = (
+                db.query(ScheduledAction)
+                .filter(ScheduledAction.id == action_id, ScheduledAction.status == "pending")
+                .update({"status": "running", "attempts": attempts + 1, "updated_at": now}, synchronize_session=False)
+            )
+            if updated:
+                claimed.append({
+                    "id": action_id,
+                    "action_type": action_type,
+                    "payload": json.loads(payload or "{}"),
+                    "attempts": attempts + 1,
+                })
+        db.commit()
+        return claimed
+    finally:
+        db.close()
+
+
+def _complete_action(action: Dict[str, Any], error: str = None) -> None:
+    """Marks an action done, or reschedules/fails it after an error."""
+    now = datetime.datetime.utcnow()
+    values = {"updated_at": now, "last_error": error}
+    if error is None:
+        values["status"] = "done"
+    elif action["attempts"] < settings.ACTION_MAX_ATTEMPTS:
+        values["status"] = "pending"
+        values["run_at"] = now + datetime.timedelta(seconds=settings.ACTION_RETRY_DELAY_SECONDS * action["attempts"])
+    else:
+        values["status"] = "failed"
+
+    db = SessionLocal()
+    try:
+        db.query(ScheduledAction).filter(ScheduledAction.id == action["id"]).update(values, synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+
+
+async def _run_action(action: Dict[str, Any]) -> None:
+    handler = ACTION_HANDLERS.get(action["action_type"])
+    error = None
+    if handler is None:
+        error = f"No handler registered for action type '{action['action_type']}'"
+    else:
+        _current_action.set(action)
+        try:
+            await handler(**action["payload"])
+        except Exception as e:
+            logger.exception(f"Scheduled action {action['id']} ({action['action_type']}) failed")
+            error = str(e)
+    await asyncio.to_thread(_complete_action, action, error)
+
+
+async def dispatch_due_actions(batch_size: int = None) -> int:
+    """Claims and runs all due actions in batches. Returns the number of actions run."""
+    batch_size = batch_size or settings.ACTION_DISPATCH_BATCH_SIZE
+    total = 0
+    while True:
+        actions = await asyncio.to_thread(claim_due_actions, batch_size)
+        if not actions:
+            return total
+        await asyncio.gather(*(_run_action(action) for action in actions))
+        total += len(actions)
+        if len(actions) < batch_size:
+            return total
+
+
+def recover_stale_actions(older_than_seconds: int = None) -> int:
+    """
+    Handles actions stuck in 'running' (the process died mid-action); called
+    when the scheduler starts. Idempotent ones go back to 'pending'; the others
+    are marked failed, since their outcome is unknown and a retry could repeat
+    them. Returns the number of actions put back.
+    """
+    older_than_seconds = older_than_seconds or settings.ACTION_STALE_AFTER_SECONDS
+    now = datetime.datetime.utcnow()
+    cutoff = now - datetime.timedelta(seconds=older_than_seconds)
+    db = SessionLocal()
+    try:
+        stale = (
+            db.query(ScheduledAction.id, ScheduledAction.action_type)
+            .filter(ScheduledAction.status == "running", ScheduledAction.updated_at < cutoff)
+            .all()
+        )
+        recovered, abandoned = 0, []
+        for action_id, action_type in stale:
+            if action_type in IDEMPOTENT_ACTIONS:
+                values = {"status": "pending", "updated_at": now}
+            else:
+                values = {"status": "failed", "updated_at": now, "last_error": "Interrupted while running; outcome unknown"}
+            updated = (
+                db.query(ScheduledAction)
+                .filter(ScheduledAction.id == action_id, ScheduledAction.status == "running")
+                .update(values, synchronize_session=False)
+            )
+            if updated and action_type in IDEMPOTENT_ACTIONS:
+                recovered += 1
+            elif updated:
+                abandoned.append((action_id, action_type))
+        db.commit()
+    finally:
+        db.close()
+
+    if recovered:
+        logger.info(f"Recovered {recovered} interrupted scheduled action(s).")
+    for action_id, action_type in abandoned:
+        logger.warning(f"Scheduled action {action_id} ({action_type}) was interrupted; not retrying it.")
+        action_log_writer.write(
+            "Scheduled Action Outcome Unknown",
+            f"'{action_type}' action {action_id} was interrupted and may or may not have been sent; it will not be retried.",
+        )
+    return recovered
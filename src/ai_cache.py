@@ -0,0 +1,196 @@
+# src/ai_cache.py
+"""
+Content-addressed cache for Gemini responses.
+
+Keys are a SHA-256 of (model name, persona hash, task prompt, generation
+config), so any change to the persona or prompt yields a new entry. Lookups go
+through an in-memory LRU first and then a SQLite-backed table that survives
+restarts; both tiers honour the same TTL, and the table is trimmed to a maximum
+number of rows by least-recent access.
+
+Caching is opt-in (use_cache=True in ai_core): only requests where the same
+prompt should get the same answer, such as translations, go through it.
+"""
+import datetime
+import hashlib
+import json
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from sqlalchemy import select
+
+from .config import settings
+from .database import SessionLocal
+from .models import AIResponseCache
+
+logger = logging.getLogger(__name__)
+
+
+def make_cache_key(model_name: str, persona_hash: str, task_prompt: str, generation_config: Optional[Dict[str, Any]] = None) -> str:
+    """Builds the content-addressed key for a generation request."""
+    material = json.dumps(
+        [model_name, persona_hash, task_prompt, generation_config or {}],
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """Two-tier (memory LRU + database) cache of generated texts."""
+
+    def __init__(self, session_factory, max_memory_entries: int, ttl_seconds: int, max_rows: int, enabled: bool = True):
+        self.session_factory = session_factory
+        self.max_memory_entries = max_memory_entries
+        self.ttl = datetime.timedelta(seconds=ttl_seconds)
+        self.max_rows = max_rows
+        self.enabled = enabled
+        self._memory: "OrderedDict[str, Tuple[datetime.datetime, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.counters = {"memory_hits": 0, "db_hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+
+    # --- Memory tier ---
+
+    def _memory_get(self, key: str, now: datetime.datetime) -> Optional[str]:
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is None:
+                return None
+            created_at, value = entry
+            if now - created_at > self.ttl:
+                del self._memory[key]
+                return None
+            self._memory.move_to_end(key)
+            return value
+
+    def _memory_set(self, key: str, value: str, created_at: datetime.datetime) -> None:
+        with self._lock:
+            self._memory[key] = (created_at, value)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_memory_entries:
+                self._memory.popitem(last=False)
+
+    # --- Database tier ---
+
+    def _db_get(self, key: str, now: datetime.datetime) -> Optional[Tuple[datetime.datetime, str]]:
+        db = self.session_factory()
+        try:
+            row = db.get(AIResponseCache, key)
+            if row is None:
+                return None
+            if now - row.created_at > self.ttl:
+                db.delete(row)
+                db.commit()
+                return None
+            row.last_accessed_at = now
+            created_at, response = row.created_at, row.response
+            db.commit()
+            return created_at, response
+        finally:
+            db.close()
+
+    def _db_set(self, key: str, value: str, model_name: str, now: datetime.datetime) -> None:
+        db = self.session_factory()
+        try:
+            db.merge(AIResponseCache(
+                key=key,
+                model_name=model_name,
+                response=value,
+                created_at=now,
+                last_accessed_at=now,
+            ))
+            db.commit()
+            self._evict(db, now)
+        finally:
+            db.close()
+
+    def _evict(self, db, now: datetime.datetime) -> None:
+        """Deletes expired rows, then the least recently used rows above max_rows."""
+        evicted = db.query(AIResponseCache).filter(AIResponseCache.created_at < now - self.ttl).delete(synchronize_session=False)
+        overflow = db.query(AIResponseCache).count() - self.max_rows
+        if overflow > 0:
+            oldest = (
+                select(AIResponseCache.key)
+                .order_by(AIResponseCache.last_accessed_at.asc())
+                .limit(overflow)
+            )
+            evicted += db.query(AIResponseCache).filter(AIResponseCache.key.in_(oldest)).delete(synchronize_session=False)
+        db.commit()
+        if evicted:
+            with self._lock:
+                self.counters["evictions"] += evicted
+
+    # --- Public API ---
+
+    def get(self, key: str) -> Optional[str]:
+        """Returns a cached response, or None on a miss (or when disabled)."""
+        if not self.enabled:
+            return None
+        now = datetime.datetime.utcnow()
+        value = self._memory_get(key, now)
+        if value is not None:
+            with self._lock:
+                self.counters["memory_hits"] += 1
+            return value
+
+        try:
+            stored = self._db_get(key, now)
+        except Exception as e:
+            logger.warning(f"AI cache lookup failed, treating as a miss: {e}")
+            stored = None
+
+        with self._lock:
+            self.counters["db_hits" if stored else "misses"] += 1
+        if stored is None:
+            return None
+        created_at, value = stored
+        self._memory_set(key, value, created_at)
+        return value
+
+    def set(self, key: str, value: str, model_name: str = "") -> None:
+        """Stores a response in both tiers."""
+        if not self.enabled or not value:
+            return
+        now = datetime.datetime.utcnow()
+        self._memory_set(key, value, now)
+        with self._lock:
+            self.counters["stores"] += 1
+        try:
+            self._db_set(key, value, model_name, now)
+        except Exception as e:
+            logger.warning(f"AI cache write failed: {e}")
+
+    def delete(self, key: str) -> None:
+        """Removes an entry from both tiers (e.g. a response that failed validation)."""
+        with self._lock:
+            self._memory.pop(key, None)
+        if not self.enabled:
+            return
+        db = self.session_factory()
+        try:
+            db.query(AIResponseCache).filter(AIResponseCache.key == key).delete(synchronize_session=False)
+            db.commit()
+        except Exception as e:
+            logger.warning(f"AI cache delete failed: {e}")
+        finally:
+            db.close()
+
+    def clear_memory(self) -> None:
+        with self._lock:
+            self._memory.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """Returns hit/miss counters plus the current memory tier size."""
+        with self._lock:
+            return {**self.counters, "memory_entries": len(self._memory)}
+
+
+response_cache = ResponseCache(
+    SessionLocal,
+    max_memory_entries=settings.AI_CACHE_MEMORY_ENTRIES,
+    ttl_seconds=settings.AI_CACHE_TTL_SECONDS,
+    max_rows=settings.AI_CACHE_MAX_ROWS,
+    enabled=settings.AI_CACHE_ENABLED,
+)
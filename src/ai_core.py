@@ -1,7 +1,16 @@
 # src/ai_core.py
+import asyncio
+import datetime
+import json
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional, Sequence
 import google.generativeai as genai
 from .config import settings
-from .persona import get_persona_prompt
+from .persona import get_persona_prompt, get_persona_version
+from .ai_cache import make_cache_key, response_cache
 
 # Configure the Gemini API using centralized config
 api_key = settings.GEMINI_API_KEY
@@ -18,13 +27,126 @@ else:
     except Exception as e:
         print(f"❌ ERROR: Failed to initialize Gemini AI Model: {e}")
 
+# The SDK call is blocking, so async callers run it on a small dedicated pool.
+# A per-event-loop semaphore caps in-flight requests and keeps callers queued
+# on the loop instead of piling up threads.
+_executor = ThreadPoolExecutor(
+    max_workers=settings.GEMINI_MAX_CONCURRENCY,
+    thread_name_prefix="gemini",
+)
+_semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
 
-def generate_text(task_prompt: str) -> str:
+
+def _get_semaphore() -> asyncio.Semaphore:
+    loop = asyncio.get_running_loop()
+    semaphore = _semaphores.get(loop)
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(settings.GEMINI_MAX_CONCURRENCY)
+        _semaphores[loop] = semaphore
+    return semaphore
+
+
+def _cache_key(task_prompt: str, generation_config: Optional[Dict[str, Any]] = None) -> str:
+    """Cache key for a request: model name, persona hash, task prompt and generation config."""
+    return make_cache_key(settings.GEMINI_MODEL, get_persona_version(), task_prompt, generation_config)
+
+
+def _build_prompt(task_prompt: str) -> str:
+    """Combines the main persona prompt with the specific task prompt."""
+    return get_persona_prompt() + "\n\n--- TASK ---\n\n" + task_prompt
+
+
+# --- Persona as system instruction / cached context ---
+# With GEMINI_SYSTEM_INSTRUCTION enabled the persona is configured on the model
+# instead of being prepended to every request. With GEMINI_CONTEXT_CACHE also
+# enabled, it is uploaded once as cached content and reused until it expires
+# or the persona changes; if the model or account does not support context
+# caching (e.g. the persona is below the minimum cacheable size), the plain
+# system-instruction model is used instead. A replaced cache is not deleted:
+# requests still in flight may be using it, and it expires server-side after
+# GEMINI_CONTEXT_CACHE_TTL_SECONDS anyway.
+
+_persona_model_lock = threading.Lock()
+_persona_model = None
+_persona_model_version: Optional[str] = None
+_persona_model_expires_at: float = float("inf")
+
+
+def _create_cached_persona_model(persona: str):
+    """Uploads the persona as cached content and returns (model, expires_at)."""
+    ttl = settings.GEMINI_CONTEXT_CACHE_TTL_SECONDS
+    cached_content = genai.caching.CachedContent.create(
+        model=settings.GEMINI_MODEL if settings.GEMINI_MODEL.startswith("models/") else f"models/{settings.GEMINI_MODEL}",
+        display_name="linkedin-agent-persona",
+        system_instruction=persona,
+        ttl=datetime.timedelta(seconds=ttl),
+    )
+    cached_model = genai.GenerativeModel.from_cached_content(cached_content=cached_content)
+    # Refresh slightly before the server-side cache expires
+    return cached_model, time.monotonic() + ttl * 0.9
+
+
+def _get_persona_model():
+    """Returns a model configured with the current persona, rebuilding it when the persona changes."""
+    global _persona_model, _persona_model_version, _persona_model_expires_at
+    version = get_persona_version()
+    if _persona_model is not None and _persona_model_version == version and time.monotonic() < _persona_model_expires_at:
+        return _persona_model
+
+    with _persona_model_lock:
+        if _persona_model is not None and _persona_model_version == version and time.monotonic() < _persona_model_expires_at:
+            return _persona_model
+
+        persona = get_persona_prompt()
+        new_model, expires_at = None, float("inf")
+        if settings.GEMINI_CONTEXT_CACHE:
+            try:
+                new_model, expires_at = _create_cached_persona_model(persona)
+            except Exception as e:
+                print(f"⚠️ WARNING: Gemini context caching unavailable, using system instruction only: {e}")
+        if new_model is None:
+            new_model = genai.GenerativeModel(settings.GEMINI_MODEL, system_instruction=persona)
+
+        _persona_model = new_model
+        _persona_model_version = version
+        _persona_model_expires_at = expires_at
+        return _persona_model
+
+
+def _resolve_request(task_prompt: str):
+    """Returns the (model, contents) pair to send for a task prompt in the configured persona mode."""
+    if settings.GEMINI_SYSTEM_INSTRUCTION:
+        return _get_persona_model(), task_prompt
+    return model, _build_prompt(task_prompt)
+
+
+def _generate(task_prompt: str, timeout: float, generation_config: Optional[Dict[str, Any]] = None) -> Optional[str]:
+    """Runs a single blocking Gemini request and returns the cleaned text (or None if empty)."""
+    target_model, contents = _resolve_request(task_prompt)
+    kwargs = {"request_options": {"timeout": timeout}}
+    if generation_config:
+        kwargs["generation_config"] = generation_config
+    response = target_model.generate_content(contents, **kwargs)
+
+    # Clean up the response text
+    generated_text = response.text.strip()
+
+    if not generated_text:
+        print("⚠️ WARNING: Generated text is empty.")
+        return None
+
+    return generated_text
+
+
+def generate_text(task_prompt: str, use_cache: bool = False) -> str:
     """
     Generates text using the Gemini model based on the persona and a specific task.
 
     Args:
         task_prompt: The specific instruction for the task (e.g., "Write a comment for this post...").
+        use_cache: Serve/store the result through the response cache (see ai_cache.py).
+            Only for prompts where a repeated prompt should get the same answer
+            (e.g. translations); comments and posts must stay fresh.
 
     Returns:
         The generated text as a string, or None if generation fails.
@@ -34,23 +156,124 @@ def generate_text(task_prompt: str) -> str:
         return None
 
     try:
-        # Combine the main persona prompt with the specific task prompt
-        full_prompt = get_persona_prompt() + "\n\n--- TASK ---\n\n" + task_prompt
+        key = _cache_key(task_prompt) if use_cache else None
+        cached = response_cache.get(key) if key else None
+        if cached is not None:
+            return cached
 
-        # Generate content
-        response = model.generate_content(full_prompt)
+        generated_text = _generate(task_prompt, settings.GEMINI_TIMEOUT_SECONDS)
+        if key and generated_text:
+            response_cache.set(key, generated_text, settings.GEMINI_MODEL)
+        return generated_text
+    except Exception as e:
+        print(f"⚠️ WARNING: AI content generation error: {e}")
+        return None  # Return None on failure to indicate error
 
-        # Clean up the response text
-        generated_text = response.text.strip()
-        
-        if not generated_text:
-            print("⚠️ WARNING: Generated text is empty.")
-            return None
 
+async def generate_text_async(
+    task_prompt: str,
+    timeout: Optional[float] = None,
+    generation_config: Optional[Dict[str, Any]] = None,
+    use_cache: bool = False,
+) -> Optional[str]:
+    """
+    Async counterpart of generate_text that never blocks the event loop.
+
+    The request runs on a bounded thread pool, at most GEMINI_MAX_CONCURRENCY
+    requests are in flight per event loop, and each call is cancelled after
+    `timeout` seconds (GEMINI_TIMEOUT_SECONDS by default). With use_cache, a
+    cached response is returned without calling the model; leave it off for
+    anything that must be unique, such as comments.
+
+    Returns:
+        The generated text as a string, or None if generation fails or times out.
+    """
+    if not model:
+        print("⚠️ WARNING: Gemini model is not initialized. AI features are disabled.")
+        return None
+
+    timeout = timeout or settings.GEMINI_TIMEOUT_SECONDS
+    loop = asyncio.get_running_loop()
+    try:
+        key = _cache_key(task_prompt, generation_config) if use_cache else None
+        if key:
+            cached = await asyncio.to_thread(response_cache.get, key)
+            if cached is not None:
+                return cached
+
+        async with _get_semaphore():
+            generated_text = await asyncio.wait_for(
+                loop.run_in_executor(_executor, _generate, task_prompt, timeout, generation_config),
+                timeout=timeout,
+            )
+        if key and generated_text:
+            await asyncio.to_thread(response_cache.set, key, generated_text, settings.GEMINI_MODEL)
         return generated_text
+    except asyncio.TimeoutError:
+        print(f"⚠️ WARNING: AI content generation timed out after {timeout}s.")
+        return None
     except Exception as e:
         print(f"⚠️ WARNING: AI content generation error: {e}")
-        return None  # Return None on failure to indicate error
+        return None
+
+
+def _parse_json_object(text: str) -> Optional[Dict[str, Any]]:
+    """Parses a JSON object from model output, tolerating a surrounding ```json fence."""
+    cleaned = text.strip()
+    if cleaned.startswith("```"):
+        cleaned = cleaned.strip("`")
+        if cleaned.lower().startswith("json"):
+            cleaned = cleaned[4:]
+    try:
+        data = json.loads(cleaned)
+    except (json.JSONDecodeError, TypeError):
+        return None
+    return data if isinstance(data, dict) else None
+
+
+async def generate_json_async(
+    task_prompt: str,
+    required_fields: Sequence[str],
+    timeout: Optional[float] = None,
+    use_cache: bool = False,
+) -> Optional[Dict[str, str]]:
+    """
+    Generates a structured (JSON) response in a single request.
+
+    The model is asked for `application/json` output, and the result is
+    validated to be an object whose `required_fields` are all non-empty strings.
+
+    Returns:
+        A dict with the stripped required fields, or None if generation,
+        parsing or validation fails (callers should fall back to plain calls).
+    """
+    generation_config = {"response_mime_type": "application/json"}
+    text = await generate_text_async(
+        task_prompt,
+        timeout=timeout,
+        generation_config=generation_config,
+        use_cache=use_cache,
+    )
+    if text is None:
+        return None
+
+    data = _parse_json_object(text)
+    if data is None:
+        print("⚠️ WARNING: Structured AI response is not a valid JSON object.")
+        if use_cache:
+            await asyncio.to_thread(response_cache.delete, _cache_key(task_prompt, generation_config))
+        return None
+
+    result = {}
+    for field in required_fields:
+        value = data.get(field)
+        if not isinstance(value, str) or not value.strip():
+            print(f"⚠️ WARNING: Structured AI response is missing field '{field}'.")
+            if use_cache:
+                await asyncio.to_thread(response_cache.delete, _cache_key(task_prompt, generation_config))
+            return None
+        result[field] = value.strip()
+    return result
 
 if __name__ == '__main__':
     # A simple test to verify the functionality
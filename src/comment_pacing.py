@@ -0,0 +1,109 @@
+# src/comment_pacing.py
+"""
+Spacing of proactive comments under hourly and daily quotas.
+
+A batch commenting run generates several comments at once but must not post
+them at once. plan_comment_times() hands out future start times so that, across
+comments already posted (comments table) and comments still waiting in the
+scheduled action queue, there are never more than COMMENTS_PER_HOUR in any
+hour or DAILY_COMMENT_QUOTA in any 24 hours, and consecutive comments are at
+least COMMENT_MIN_SPACING_SECONDS apart. Both sources live in the database, so
+every process plans against the same budget.
+"""
+import datetime
+import json
+from typing import Iterable, List, Set
+
+from .config import settings
+from .database import SessionLocal
+from .models import Comment, ScheduledAction
+
+HOUR = datetime.timedelta(hours=1)
+DAY = datetime.timedelta(days=1)
+
+# Scheduled action type that submits one planned comment
+COMMENT_ACTION = "post_comment"
+_OPEN_STATUSES = ("pending", "running")
+
+
+def plan_times(
+    existing: Iterable[datetime.datetime],
+    count: int,
+    now: datetime.datetime,
+    per_hour: int,
+    per_day: int,
+    min_spacing: datetime.timedelta,
+    horizon: datetime.timedelta,
+) -> List[datetime.datetime]:
+    """
+    Returns up to `count` start times, earliest first, that keep every sliding
+    hour / day window within its quota. Fewer (possibly none) are returned when
+    the quotas leave no room before `now + horizon`.
+    """
+    times = sorted(t for t in existing if t > now - DAY)
+    candidate = max(now, times[-1] + min_spacing) if times else now
+    latest = now + horizon
+    planned: List[datetime.datetime] = []
+    while len(planned) < count:
+        scheduled = times + planned
+        in_hour = [t for t in scheduled if t > candidate - HOUR]
+        if len(in_hour) >= per_hour:
+            candidate = in_hour[-per_hour] + HOUR
+            continue
+        in_day = [t for t in scheduled if t > candidate - DAY]
+        if len(in_day) >= per_day:
+            candidate = in_day[-per_day] + DAY
+            continue
+        if candidate > latest:
+            break
+        planned.append(candidate)
+        candidate += min_spacing
+    return planned
+
+
+def _comment_times(db, since: datetime.datetime) -> List[datetime.datetime]:
+    posted = [t for (t,) in db.query(Comment.timestamp).filter(Comment.timestamp > since)]
+    planned = [
+        t for (t,) in db.query(ScheduledAction.run_at).filter(
+            ScheduledAction.action_type == COMMENT_ACTION,
+            ScheduledAction.status.in_(_OPEN_STATUSES),
+        )
+    ]
+    return posted + planned
+
+
+def plan_comment_times(count: int) -> List[datetime.datetime]:
+    """Plans start times (UTC) for `count` new comments against the configured quotas."""
+    now = datetime.datetime.utcnow()
+    db = SessionLocal()
+    try:
+        existing = _comment_times(db, now - DAY)
+    finally:
+        db.close()
+    return plan_times(
+        existing,
+        count,
+        now,
+        per_hour=settings.COMMENTS_PER_HOUR,
+        per_day=settings.DAILY_COMMENT_QUOTA,
+        min_spacing=datetime.timedelta(seconds=settings.COMMENT_MIN_SPACING_SECONDS),
+        horizon=datetime.timedelta(minutes=settings.COMMENT_SCHEDULE_HORIZON_MINUTES),
+    )
+
+
+def commented_post_urls(urls: Iterable[str]) -> Set[str]:
+    """Returns the URLs among `urls` that we already commented on or have a comment planned for."""
+    urls = set(urls)
+    if not urls:
+        return set()
+    db = SessionLocal()
+    try:
+        done = {url for (url,) in db.query(Comment.post_url).filter(Comment.post_url.in_(urls))}
+        pending = db.query(ScheduledAction.payload).filter(
+            ScheduledAction.action_type == COMMENT_ACTION,
+            ScheduledAction.status.in_(_OPEN_STATUSES),
+        )
+        planned = {json.loads(payload or "{}").get("post_url") for (payload,) in pending}
+        return done | (planned & urls)
+    finally:
+        db.close()
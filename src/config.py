@@ -17,9 +17,41 @@ class Settings(BaseSettings):
     GEMINI_API_KEY: Optional[str] = None
     GOOGLE_API_KEY: Optional[str] = None  # Legacy support
     GEMINI_MODEL: str = "gemini-1.5-flash"  # Default to stable and reliable model
+    GEMINI_MAX_CONCURRENCY: int = 2  # Max in-flight generation requests per process
+    GEMINI_TIMEOUT_SECONDS: float = 90.0  # Per-request generation timeout
+    # "parallel": post and Turkish summary as two concurrent calls;
+    # "structured": both in one JSON response (falls back to "parallel" on parse errors)
+    POST_GENERATION_MODE: str = "parallel"
+    # Send the persona as the model's system_instruction instead of prepending it to each prompt
+    GEMINI_SYSTEM_INSTRUCTION: bool = False
+    # Additionally upload the persona as cached content and reuse it across calls (where supported)
+    GEMINI_CONTEXT_CACHE: bool = False
+    GEMINI_CONTEXT_CACHE_TTL_SECONDS: int = 3600
+
+    # Gemini response cache (in-memory LRU + database tier)
+    AI_CACHE_ENABLED: bool = True
+    AI_CACHE_MEMORY_ENTRIES: int = 256
+    AI_CACHE_TTL_SECONDS: int = 86400
+    AI_CACHE_MAX_ROWS: int = 5000
 
     # Database
     DATABASE_URL: str = "sqlite:///./linkedin_agent.db"
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT_SECONDS: float = 30.0  # Wait this long for a free pooled connection
+    DB_POOL_RECYCLE_SECONDS: int = 1800  # Reopen server connections older than this
+    DB_AUTO_MIGRATE: bool = True  # Apply pending schema migrations when the app starts
+    # SQLite connection tuning (applied to every new connection)
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000  # Wait this long for a write lock instead of failing
+    SQLITE_MMAP_SIZE_BYTES: int = 268435456  # 256 MiB
+    SQLITE_CACHE_SIZE_KB: int = 20000
+
+    # Buffered action log writer: records are inserted in one transaction per flush
+    ACTION_LOG_FLUSH_INTERVAL_MS: int = 250
+    ACTION_LOG_BATCH_SIZE: int = 50  # Flush early once this many records are waiting
+    ACTION_LOG_MAX_QUEUE: int = 10000  # Oldest records are dropped beyond this
+    # Raw action_logs rows older than this many days are rolled up into daily counts and deleted
+    ACTION_LOG_RETENTION_DAYS: int = 30
 
     # LinkedIn OAuth 2.0 Credentials
     LINKEDIN_CLIENT_ID: str
@@ -30,6 +62,65 @@ class Settings(BaseSettings):
     OPERATING_HOURS_START: int = 7  # 7 AM
     OPERATING_HOURS_END: int = 22  # 10 PM (22:00)
 
+    # Persona source files (relative paths are resolved against the project root)
+    ABOUT_ME_PATH: str = "./data/about_me.md"
+    POST_STYLE_FILE: str = "./data/style.md"
+    COMMENT_STYLE_FILE: str = "./data/style_comment.md"
+
+    # Shared HTTP connection pool (used for all LinkedIn API calls)
+    HTTP_MAX_CONNECTIONS: int = 20
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 10
+    HTTP_KEEPALIVE_EXPIRY_SECONDS: float = 60.0
+    HTTP_TIMEOUT_SECONDS: float = 30.0
+    HTTP_CONNECT_TIMEOUT_SECONDS: float = 10.0
+    HTTP_HTTP2_ENABLED: bool = True
+
+    # Persistent delayed-action queue (post like / summary follow-ups)
+    ACTION_DISPATCH_INTERVAL_SECONDS: int = 5
+    ACTION_DISPATCH_BATCH_SIZE: int = 20
+    ACTION_MAX_ATTEMPTS: int = 3
+    ACTION_RETRY_DELAY_SECONDS: int = 60
+    ACTION_STALE_AFTER_SECONDS: int = 300
+
+    # Persistent feed-entry store (articles are never shared twice)
+    FEED_INGEST_INTERVAL_MINUTES: int = 15  # How often the background job refreshes the store
+    FEED_ENTRY_MAX_AGE_HOURS: int = 72  # Only entries published within this window are shareable
+    FEED_SELECTION_POOL_SIZE: int = 50  # Rank the N freshest unshared entries by relevance
+    FEED_RESERVATION_TIMEOUT_MINUTES: int = 30  # Entries reserved longer (run died mid-post) are offered again
+    RANKING_INDEX_MAX_DOCUMENTS: int = 5000  # In-memory BM25 index size (newest entries kept)
+    # Cosine similarity (feature-hashed embeddings) above which two stories count as the same
+    NEAR_DUPLICATE_THRESHOLD: float = 0.6
+    FEED_BLOOM_CAPACITY: int = 100000
+    FEED_BLOOM_ERROR_RATE: float = 0.001
+
+    # Batch commenting: comments for the top-K discovered posts are generated together
+    # and posted one by one through the scheduled action queue within COMMENTS_PER_HOUR
+    # and DAILY_COMMENT_QUOTA (below)
+    COMMENT_BATCH_SIZE: int = 3
+    COMMENT_GENERATION_CONCURRENCY: int = 2
+    COMMENTS_PER_HOUR: int = 3
+    COMMENT_MIN_SPACING_SECONDS: int = 600
+    COMMENT_SCHEDULE_HORIZON_MINUTES: int = 120  # Do not plan comments further ahead than this
+
+    # Client-side rate limiting of LinkedIn API calls (token bucket per endpoint family)
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_MAX_WAIT_SECONDS: float = 120.0  # Fail instead of waiting longer than this for a token
+    RATE_LIMIT_MAX_RETRIES: int = 3  # Retries after 429 / 5xx responses
+    RATE_LIMIT_BACKOFF_BASE_SECONDS: float = 1.0
+    RATE_LIMIT_BACKOFF_MAX_SECONDS: float = 60.0
+
+    # Daily quotas per action type, counted per calendar day in Europe/Istanbul across all processes
+    QUOTAS_ENABLED: bool = True
+    DAILY_INVITE_QUOTA: int = 35  # About one every 25 minutes from 9 AM to 10 PM
+    DAILY_COMMENT_QUOTA: int = 20
+    DAILY_POST_QUOTA: int = 5
+
+    # Cache lifetime for the authenticated user's profile (URN) lookup
+    PROFILE_CACHE_TTL_SECONDS: int = 3600
+    # How long a process serves the access token from memory before re-reading the
+    # database, so logins/logouts handled by another process are picked up
+    TOKEN_CACHE_TTL_SECONDS: int = 60
+
     @model_validator(mode='before')
     @classmethod
     def coalesce_api_keys(cls, values: dict[str, Any]) -> dict[str, Any]:
@@ -1,9 +1,155 @@
-from sqlalchemy import create_engine
+# src/database.py
+"""
+Engine and session setup.
+
+The engine is built from settings.DATABASE_URL. SQLite connections are tuned
+when they are opened: WAL journaling lets the web and worker processes read
+while one of them writes, synchronous=NORMAL drops the per-commit fsync of the
+rollback journal, busy_timeout makes a writer wait for the lock instead of
+failing with "database is locked", and mmap_size / cache_size keep hot pages
+in memory.
+
+Any other backend (PostgreSQL for multi-node deployments) gets a QueuePool
+sized by DB_POOL_SIZE / DB_MAX_OVERFLOW that pre-pings connections on checkout
+and recycles them before server-side idle timeouts close them.
+
+Async code (the FastAPI handlers, the worker) uses AsyncSessionLocal, an
+AsyncEngine on the same database through the backend's asyncio driver
+(aiosqlite, asyncpg), so queries run off the event loop. Both engines apply
+the same connection settings. The schema itself is managed by the Alembic
+migrations in migrations/ (see src/migrations.py).
+"""
+import os
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import URL, Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool, StaticPool
+
+from .config import settings
+
+DATABASE_URL = settings.DATABASE_URL
+
+
+def sqlite_pragmas() -> dict:
+    """PRAGMA name -> value applied to every new SQLite connection."""
+    return {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "busy_timeout": settings.SQLITE_BUSY_TIMEOUT_MS,
+        "mmap_size": settings.SQLITE_MMAP_SIZE_BYTES,
+        "cache_size": -settings.SQLITE_CACHE_SIZE_KB,  # Negative values are KiB rather than pages
+        "temp_store": "MEMORY",
+    }
+
+
+def normalize_database_url(url: str) -> URL:
+    """Parses `url`, accepting the legacy postgres:// scheme many hosting providers hand out."""
+    parsed = make_url(url)
+    if parsed.drivername == "postgres":
+        parsed = parsed.set(drivername="postgresql")
+    return parsed
+
+
+def server_pool_options() -> dict:
+    """Pool settings for client/server databases, shared by the sync and async engines."""
+    return {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT_SECONDS,
+        "pool_recycle": settings.DB_POOL_RECYCLE_SECONDS,
+        "pool_pre_ping": True,  # Replace connections the server dropped instead of failing a query
+    }
+
+
+def _is_memory_database(url) -> bool:
+    return url.database in (None, "", ":memory:") or url.query.get("mode") == "memory"
+
 
-DATABASE_URL = "sqlite:///./linkedin_agent.db"
+def _apply_sqlite_pragmas(engine: Engine, pragmas: dict) -> None:
+    @event.listens_for(engine, "connect")
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
 
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
+
+def build_engine(url: str) -> Engine:
+    """Creates an engine for `url` with the pool and connection settings of its backend."""
+    parsed = normalize_database_url(url)
+    if parsed.get_backend_name() != "sqlite":
+        return create_engine(parsed, poolclass=QueuePool, **server_pool_options())
+
+    connect_args = {"check_same_thread": False}
+    if _is_memory_database(parsed):
+        # One shared connection, otherwise every connection sees its own empty database
+        engine = create_engine(parsed, connect_args=connect_args, poolclass=StaticPool)
+        pragmas = {k: v for k, v in sqlite_pragmas().items() if k != "journal_mode"}
+    else:
+        # Threads of one process share a small pool; other processes have their own
+        # pools and coordinate through SQLite's file locks (busy_timeout).
+        engine = create_engine(
+            parsed,
+            connect_args=connect_args,
+            poolclass=QueuePool,
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+        )
+        pragmas = sqlite_pragmas()
+    _apply_sqlite_pragmas(engine, pragmas)
+    return engine
+
+
+# Sync driver -> asyncio driver of the same backend
+ASYNC_DRIVERS = {"sqlite": "aiosqlite", "postgresql": "asyncpg"}
+
+
+def async_database_url(url: str) -> URL:
+    """`url` with its driver replaced by the asyncio driver of the same backend."""
+    parsed = normalize_database_url(url)
+    backend = parsed.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No asyncio driver configured for '{backend}' databases")
+    return parsed.set(drivername=f"{backend}+{ASYNC_DRIVERS[backend]}")
+
+
+def build_async_engine(url: str) -> AsyncEngine:
+    """
+    Creates an AsyncEngine for the database at `url`. For SQLite, aiosqlite's
+    default pools are kept: a fresh connection per checkout for files (opening one
+    is cheap and happens on aiosqlite's thread) and a single shared one for
+    in-memory databases.
+    """
+    parsed = async_database_url(url)
+    if parsed.get_backend_name() != "sqlite":
+        return create_async_engine(parsed, **server_pool_options())
+    engine = create_async_engine(parsed, connect_args={"check_same_thread": False})
+    if _is_memory_database(parsed):
+        pragmas = {k: v for k, v in sqlite_pragmas().items() if k != "journal_mode"}
+    else:
+        pragmas = sqlite_pragmas()
+    _apply_sqlite_pragmas(engine.sync_engine, pragmas)
+    return engine
+
+
+engine = build_engine(DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+async_engine = build_async_engine(DATABASE_URL)
+# Objects stay usable after commit, since async sessions cannot lazy-load expired attributes
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
 Base = declarative_base()
+
+
+def _dispose_after_fork() -> None:
+    engine.dispose(close=False)
+    async_engine.sync_engine.dispose(close=False)
+
+
+# A forked child (e.g. a gunicorn worker) must not reuse the parent's pooled connections.
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_dispose_after_fork)
@@ -0,0 +1,84 @@
+# src/feed_fetcher.py
+"""
+Concurrent RSS/Atom fetching with conditional GET.
+
+All configured feeds are requested at once over the shared pooled HTTP client.
+Each feed's ETag / Last-Modified validators are remembered and sent back as
+If-None-Match / If-Modified-Since; on 304 Not Modified the previously parsed
+entries are reused without downloading or parsing anything. Parsing itself
+(feedparser is synchronous) runs in a worker thread, off the event loop.
+"""
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional
+
+import feedparser
+
+from .http_client import get_http_client
+
+logger = logging.getLogger(__name__)
+
+USER_AGENT = "Mozilla/5.0 (compatible; LinkedInAgent/1.0; +https://github.com/DevKursat/linkedinAgent)"
+
+
+@dataclass
+class FeedState:
+    """Validators and the last parsed entries for one feed URL."""
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    entries: List = field(default_factory=list)
+
+
+@dataclass
+class FeedResult:
+    url: str
+    entries: List
+    not_modified: bool = False
+    error: Optional[str] = None
+
+
+class FeedFetcher:
+    def __init__(self, timeout: float = 15.0):
+        self.timeout = timeout
+        self._states: Dict[str, FeedState] = {}
+
+    def _conditional_headers(self, state: FeedState) -> Dict[str, str]:
+        headers = {"User-Agent": USER_AGENT}
+        if state.etag:
+            headers["If-None-Match"] = state.etag
+        if state.last_modified:
+            headers["If-Modified-Since"] = state.last_modified
+        return headers
+
+    async def fetch(self, url: str) -> FeedResult:
+        """Fetches one feed; returns cached entries on 304 or on errors."""
+        state = self._states.setdefault(url, FeedState())
+        try:
+            response = await get_http_client().get(
+                url,
+                headers=self._conditional_headers(state),
+                follow_redirects=True,
+                timeout=self.timeout,
+            )
+            if response.status_code == 304:
+                return FeedResult(url, state.entries, not_modified=True)
+            response.raise_for_status()
+
+            parsed = await asyncio.to_thread(feedparser.parse, response.content)
+            state.entries = list(parsed.entries)
+            state.etag = response.headers.get("ETag")
+            state.last_modified = response.headers.get("Last-Modified")
+            return FeedResult(url, state.entries)
+        except Exception as e:
+            logger.error(f"Error fetching feed {url}: {e}")
+            return FeedResult(url, state.entries, error=str(e))
+
+    async def fetch_all(self, urls: Iterable[str]) -> Dict[str, FeedResult]:
+        """Fetches all feeds concurrently, preserving the input order in the result."""
+        urls = list(dict.fromkeys(urls))
+        results = await asyncio.gather(*(self.fetch(url) for url in urls))
+        return {result.url: result for result in results}
+
+
+feed_fetcher = FeedFetcher()
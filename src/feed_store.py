@@ -0,0 +1,434 @@
+# src/feed_store.py
+"""
+Persistent store of RSS entries, so an article is never shared twice.
+
+Every fetched entry is recorded once in the feed_entries table, keyed by a
+SHA-256 of its GUID (or link), with its first-seen time and a status of
+new / reserved / shared / skipped. Ingestion only inserts unseen entries: an in-memory
+bloom filter answers "definitely new" without touching the database, and only
+the "maybe seen" hashes are checked with one indexed IN query. Selecting an
+article is an indexed query over fresh entries that are still 'new', ranked
+by BM25 relevance when a query is given. The chosen entry is claimed with a
+conditional UPDATE ('new' -> 'reserved'), so a scheduled run and a manual one
+can never pick the same article; the caller marks it shared or releases it.
+Reservations older than FEED_RESERVATION_TIMEOUT_MINUTES (the run died before
+either) are returned to 'new' before each selection.
+
+The store is filled by a background scheduler job (worker.ingest_feeds), so
+post creation and post discovery only read from it and never wait on feeds.
+"""
+import datetime
+import hashlib
+import logging
+import math
+import random
+import re
+import threading
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import or_
+from sqlalchemy.exc import IntegrityError
+
+from .config import settings
+from .database import SessionLocal
+from .models import FeedEntry
+from .ranking import BM25Index
+
+logger = logging.getLogger(__name__)
+
+# Upper bound on hashes per IN (...) lookup; stays well below SQLite's variable limit.
+_LOOKUP_CHUNK_SIZE = 500
+
+_HTML_TAG_PATTERN = re.compile(r"<[^>]+>")
+
+
+class BloomFilter:
+    """Fixed-size bloom filter over strings (no false negatives, tunable false positives)."""
+
+    def __init__(self, capacity: int, error_rate: float):
+        capacity = max(1, capacity)
+        self.size = max(8, int(math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2))))
+        self.hash_count = max(1, int(round(self.size / capacity * math.log(2))))
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item: str):
+        # Double hashing: k positions derived from two 64-bit halves of one digest.
+        digest = hashlib.sha256(item.encode("utf-8")).digest()
+        h1 = int.from_bytes(digest[:8], "big")
+        h2 = int.from_bytes(digest[8:16], "big") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hash_count))
+
+    def add(self, item: str) -> None:
+        for position in self._positions(item):
+            self._bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, item: str) -> bool:
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+@dataclass
+class StoredEntry:
+    """A shareable entry, detached from the database session."""
+    id: int
+    title: str
+    link: str
+    summary: Optional[str]
+    feed_url: Optional[str]
+    published_at: datetime.datetime
+
+
+def entry_hash(entry) -> Optional[str]:
+    """Identity of a feed entry: its GUID when present, otherwise its link."""
+    key = (entry.get("id") or entry.get("guid") or entry.get("link") or "").strip()
+    if not key:
+        return None
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+
+def _published_at(entry, default: datetime.datetime) -> datetime.datetime:
+    parsed = entry.get("published_parsed") or entry.get("updated_parsed")
+    if parsed:
+        try:
+            return datetime.datetime(*parsed[:6])
+        except (TypeError, ValueError):
+            pass
+    return default
+
+
+def document_text(title: Optional[str], summary: Optional[str]) -> str:
+    """Text indexed for relevance ranking: the title plus the summary without HTML tags."""
+    return f"{title or ''} {_HTML_TAG_PATTERN.sub(' ', summary or '')}"
+
+
+def _to_stored(row: FeedEntry) -> StoredEntry:
+    return StoredEntry(
+        id=row.id,
+        title=row.title,
+        link=row.link,
+        summary=row.summary,
+        feed_url=row.feed_url,
+        published_at=row.published_at,
+    )
+
+
+def _chunks(items: List[str], size: int):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+class FeedStore:
+    def __init__(self, session_factory, bloom_capacity: int, bloom_error_rate: float, index_max_documents: int = 5000):
+        self.session_factory = session_factory
+        self.bloom_capacity = bloom_capacity
+        self.bloom_error_rate = bloom_error_rate
+        self._bloom: Optional[BloomFilter] = None
+        self._lock = threading.Lock()
+        # Relevance index over the newest entries, updated as entries are ingested.
+        self.index = BM25Index(max_documents=index_max_documents)
+        self._index_loaded = False
+
+    def _load_index(self, db) -> None:
+        """Fills the relevance index with the newest stored entries on first use."""
+        if self._index_loaded:
+            return
+        rows = (
+            db.query(FeedEntry.id, FeedEntry.title, FeedEntry.summary)
+            .filter(FeedEntry.link != "")
+            .order_by(FeedEntry.published_at.desc())
+            .limit(self.index.max_documents)
+            .all()
+        )
+        # Oldest first, so the index evicts the oldest entries first later on.
+        self.index.add_many((entry_id, document_text(title, summary)) for entry_id, title, summary in reversed(rows))
+        self._index_loaded = True
+
+    def _seen_filter(self, db) -> BloomFilter:
+        """Builds the bloom filter from the stored hashes on first use."""
+        if self._bloom is None:
+            stored = db.query(FeedEntry.id).count()
+            bloom = BloomFilter(max(self.bloom_capacity, stored * 2), self.bloom_error_rate)
+            for (stored_hash,) in db.query(FeedEntry.entry_hash).yield_per(1000):
+                bloom.add(stored_hash)
+            self._bloom = bloom
+        return self._bloom
+
+    def _existing_hashes(self, db, hashes: List[str]) -> set:
+        existing = set()
+        for chunk in _chunks(hashes, _LOOKUP_CHUNK_SIZE):
+            existing.update(h for (h,) in db.query(FeedEntry.entry_hash).filter(FeedEntry.entry_hash.in_(chunk)))
+        return existing
+
+    def _insert_one_by_one(self, db, rows: List[Dict]) -> Tuple[int, List[Tuple[int, str]]]:
+        """Fallback when a concurrent ingest inserted some of the same entries first."""
+        inserted, documents = 0, []
+        for values in rows:
+            try:
+                documents.extend(self._insert(db, [values]))
+                inserted += 1
+            except IntegrityError:
+                db.rollback()
+        return inserted, documents
+
+    def _insert(self, db, rows: List[Dict]) -> List[Tuple[int, str]]:
+        """Inserts rows and returns (id, document text) for the shareable ones."""
+        entries = [FeedEntry(**values) for values in rows]
+        db.add_all(entries)
+        db.flush()
+        documents = [(entry.id, document_text(entry.title, entry.summary)) for entry in entries if entry.link]
+        db.commit()
+        return documents
+
+    def ingest(self, feed_url: str, entries: Iterable) -> int:
+        """Records the entries not seen before. Returns the number of new rows."""
+        now = datetime.datetime.utcnow()
+        rows: Dict[str, Dict] = {}
+        for entry in entries:
+            key = entry_hash(entry)
+            if key is None or key in rows:
+                continue
+            title = (entry.get("title") or "").strip()
+            link = (entry.get("link") or "").strip()
+            rows[key] = {
+                "entry_hash": key,
+                "feed_url": feed_url,
+                "guid": entry.get("id") or entry.get("guid"),
+                "title": title,
+                "link": link,
+                "summary": entry.get("summary"),
+                "published_at": _published_at(entry, now),
+                "first_seen_at": now,
+                # Entries without a title or link cannot be shared; keep them only to remember them.
+                "status": "new" if title and link else "skipped",
+                "status_changed_at": None if title and link else now,
+            }
+        if not rows:
+            return 0
+
+        with self._lock:
+            db = self.session_factory()
+            try:
+                bloom = self._seen_filter(db)
+                self._load_index(db)
+                maybe_seen = [key for key in rows if key in bloom]
+                if maybe_seen:
+                    for key in self._existing_hashes(db, maybe_seen):
+                        del rows[key]
+                if not rows:
+                    return 0
+
+                try:
+                    documents = self._insert(db, list(rows.values()))
+                    inserted = len(rows)
+                except IntegrityError:
+                    db.rollback()
+                    inserted, documents = self._insert_one_by_one(db, list(rows.values()))
+                for key in rows:
+                    bloom.add(key)
+                self.index.add_many(documents)
+                return inserted
+            finally:
+                db.close()
+
+    def ingest_results(self, results: Dict) -> int:
+        """Ingests FeedFetcher results; feeds that were not modified or failed are skipped."""
+        inserted = 0
+        for url, result in results.items():
+            if result.not_modified or result.error:
+                continue
+            inserted += self.ingest(url, result.entries)
+        if inserted:
+            logger.info(f"Stored {inserted} new feed entr{'y' if inserted == 1 else 'ies'}.")
+        return inserted
+
+    def select_fresh_entry(
+        self,
+        max_age_hours: int = None,
+        pool_size: int = None,
+        query: Optional[Dict[str, float]] = None,
+        duplicate_filter: Optional[Callable[[List[str], List[str]], List[bool]]] = None,
+    ) -> Optional[StoredEntry]:
+        """
+        Picks an unshared entry published within `max_age_hours` among the
+        `pool_size` most recent ones: the most relevant one for `query` (BM25),
+        or a random one when no query is given or nothing matches it.
+
+        `duplicate_filter(candidate_texts, engaged_texts)` flags candidates that
+        repeat a story already shared or commented on; those are marked skipped.
+        The returned entry is reserved for the caller, who must mark_shared() or
+        release() it; candidates claimed by someone else meanwhile are passed
+        over. Returns None when nothing fresh is left.
+        """
+        max_age_hours = max_age_hours or settings.FEED_ENTRY_MAX_AGE_HOURS
+        pool_size = pool_size or settings.FEED_SELECTION_POOL_SIZE
+        cutoff = datetime.datetime.utcnow() - datetime.timedelta(hours=max_age_hours)
+        self.release_stale_reservations()
+        db = self.session_factory()
+        try:
+            candidates = (
+                db.query(FeedEntry)
+                .filter(FeedEntry.status == "new", FeedEntry.published_at >= cutoff)
+                .order_by(FeedEntry.published_at.desc())
+                .limit(pool_size)
+                .all()
+            )
+            if candidates and duplicate_filter is not None:
+                candidates = self._drop_duplicates(db, candidates, duplicate_filter)
+            if not candidates:
+                return None
+            preferred = candidates
+            if query:
+                with self._lock:
+                    self._load_index(db)
+                preferred = self._most_relevant(candidates, query)
+            preferred = random.sample(preferred, len(preferred))
+            rest = [entry for entry in candidates if entry not in preferred]
+            for entry in preferred + rest:
+                if self._claim(db, entry.id):
+                    return _to_stored(entry)
+            return None
+        finally:
+            db.close()
+
+    def _claim(self, db, entry_id: int) -> bool:
+        updated = (
+            db.query(FeedEntry)
+            .filter(FeedEntry.id == entry_id, FeedEntry.status == "new")
+            .update({"status": "reserved", "status_changed_at": datetime.datetime.utcnow()}, synchronize_session=False)
+        )
+        db.commit()
+        return updated == 1
+
+    def _drop_duplicates(self, db, candidates: List[FeedEntry], duplicate_filter) -> List[FeedEntry]:
+        flags = duplicate_filter(
+            [document_text(entry.title, entry.summary) for entry in candidates],
+            self._engaged_texts(db),
+        )
+        duplicates = [entry.id for entry, duplicate in zip(candidates, flags) if duplicate]
+        if duplicates:
+            db.query(FeedEntry).filter(FeedEntry.id.in_(duplicates)).update(
+                {"status": "skipped", "status_changed_at": datetime.datetime.utcnow()}, synchronize_session=False
+            )
+            db.commit()
+            logger.info(f"Skipped {len(duplicates)} entr{'y' if len(duplicates) == 1 else 'ies'} repeating an already covered story.")
+        return [entry for entry, duplicate in zip(candidates, flags) if not duplicate]
+
+    def _engaged_texts(self, db, limit: int = 500) -> List[str]:
+        rows = (
+            db.query(FeedEntry.title, FeedEntry.summary)
+            .filter(or_(FeedEntry.status == "shared", FeedEntry.commented_at.isnot(None)))
+            .order_by(FeedEntry.first_seen_at.desc())
+            .limit(limit)
+            .all()
+        )
+        return [document_text(title, summary) for title, summary in rows]
+
+    def engaged_texts(self, limit: int = 500) -> List[str]:
+        """Texts of the most recent entries we shared or commented on (for near-duplicate checks)."""
+        db = self.session_factory()
+        try:
+            return self._engaged_texts(db, limit)
+        finally:
+            db.close()
+
+    def _most_relevant(self, candidates: List[FeedEntry], query: Dict[str, float]) -> List[FeedEntry]:
+        """Returns the best-scoring candidates (all of them when none matches the query)."""
+        scores = self.index.score_documents(query, [entry.id for entry in candidates])
+        for entry in candidates:
+            if entry.id not in self.index:
+                scores[entry.id] = self.index.score_text(query, document_text(entry.title, entry.summary))
+        best = max(scores.values(), default=0.0)
+        if best <= 0:
+            return candidates
+        return [entry for entry in candidates if scores.get(entry.id, 0.0) == best]
+
+    def recent_entries(self, feed_urls: Iterable[str], per_feed: int = 30) -> List[StoredEntry]:
+        """Returns the newest `per_feed` usable entries of each feed, regardless of share status."""
+        db = self.session_factory()
+        try:
+            entries = []
+            for feed_url in dict.fromkeys(feed_urls):
+                rows = (
+                    db.query(FeedEntry)
+                    .filter(FeedEntry.feed_url == feed_url, FeedEntry.link != "")
+                    .order_by(FeedEntry.published_at.desc())
+                    .limit(per_feed)
+                    .all()
+                )
+                entries.extend(_to_stored(row) for row in rows)
+            return entries
+        finally:
+            db.close()
+
+    def _set_status(self, entry_id: int, status: str, from_statuses: Tuple[str, ...] = ("new", "reserved")) -> bool:
+        db = self.session_factory()
+        try:
+            updated = (
+                db.query(FeedEntry)
+                .filter(FeedEntry.id == entry_id, FeedEntry.status.in_(from_statuses))
+                .update({"status": status, "status_changed_at": datetime.datetime.utcnow()}, synchronize_session=False)
+            )
+            db.commit()
+            return bool(updated)
+        finally:
+            db.close()
+
+    def mark_shared(self, entry_id: int) -> bool:
+        """Marks an entry as shared so it is never selected again."""
+        return self._set_status(entry_id, "shared")
+
+    def release(self, entry_id: int) -> bool:
+        """Gives a reserved entry back, e.g. when its post could not be generated or shared."""
+        return self._set_status(entry_id, "new", from_statuses=("reserved",))
+
+    def release_stale_reservations(self, older_than_minutes: int = None) -> int:
+        """Returns entries reserved more than `older_than_minutes` ago to 'new'; returns how many."""
+        older_than_minutes = older_than_minutes or settings.FEED_RESERVATION_TIMEOUT_MINUTES
+        now = datetime.datetime.utcnow()
+        db = self.session_factory()
+        try:
+            released = (
+                db.query(FeedEntry)
+                .filter(
+                    FeedEntry.status == "reserved",
+                    FeedEntry.status_changed_at < now - datetime.timedelta(minutes=older_than_minutes),
+                )
+                .update({"status": "new", "status_changed_at": now}, synchronize_session=False)
+            )
+            db.commit()
+        finally:
+            db.close()
+        if released:
+            logger.info(f"Released {released} feed entr{'y' if released == 1 else 'ies'} left reserved by an interrupted run.")
+        return released
+
+    def mark_commented(self, entry_id: int) -> bool:
+        """Records that we commented on a post discovered from this entry."""
+        db = self.session_factory()
+        try:
+            updated = (
+                db.query(FeedEntry)
+                .filter(FeedEntry.id == entry_id)
+                .update({"commented_at": datetime.datetime.utcnow()}, synchronize_session=False)
+            )
+            db.commit()
+            return bool(updated)
+        finally:
+            db.close()
+
+    def mark_skipped(self, entry_id: int) -> bool:
+        """Marks an entry as deliberately not shared."""
+        return self._set_status(entry_id, "skipped")
+
+    def reset_bloom(self) -> None:
+        """Drops the in-memory filter; it is rebuilt from the table on the next ingest."""
+        with self._lock:
+            self._bloom = None
+
+
+feed_store = FeedStore(
+    SessionLocal,
+    bloom_capacity=settings.FEED_BLOOM_CAPACITY,
+    bloom_error_rate=settings.FEED_BLOOM_ERROR_RATE,
+    index_max_documents=settings.RANKING_INDEX_MAX_DOCUMENTS,
+)
@@ -0,0 +1,77 @@
+# src/http_client.py
+"""
+Process-wide, connection-pooled HTTP client.
+
+Creating a new ``httpx.AsyncClient`` per request means a fresh TCP + TLS
+handshake for every LinkedIn call. This module owns a single long-lived client
+with keep-alive (and HTTP/2 when the ``h2`` package is installed) that is
+opened by the app lifespan and closed explicitly on shutdown.
+"""
+import asyncio
+import logging
+from typing import Optional
+
+import httpx
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+_client: Optional[httpx.AsyncClient] = None
+_client_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def _http2_available() -> bool:
+    """HTTP/2 support in httpx requires the optional ``h2`` package."""
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def _build_client() -> httpx.AsyncClient:
+    """Creates a pooled client using the configured limits."""
+    http2 = settings.HTTP_HTTP2_ENABLED and _http2_available()
+    if settings.HTTP_HTTP2_ENABLED and not http2:
+        logger.warning("HTTP/2 requested but the 'h2' package is not installed; falling back to HTTP/1.1.")
+
+    limits = httpx.Limits(
+        max_connections=settings.HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY_SECONDS,
+    )
+    timeout = httpx.Timeout(settings.HTTP_TIMEOUT_SECONDS, connect=settings.HTTP_CONNECT_TIMEOUT_SECONDS)
+    return httpx.AsyncClient(limits=limits, timeout=timeout, http2=http2)
+
+
+def _current_loop() -> Optional[asyncio.AbstractEventLoop]:
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Returns the shared pooled client, creating it on first use.
+
+    Pooled connections are bound to the event loop that opened them, so the
+    client is rebuilt if it was closed or is being used from a different loop
+    (e.g. separate ``asyncio.run`` calls in scripts).
+    """
+    global _client, _client_loop
+    loop = _current_loop()
+    if _client is None or _client.is_closed or (loop is not None and _client_loop is not loop):
+        _client = _build_client()
+        _client_loop = loop
+    return _client
+
+
+async def aclose_http_client() -> None:
+    """Closes the shared client and releases all pooled connections."""
+    global _client, _client_loop
+    client, _client, _client_loop = _client, None, None
+    if client is not None and not client.is_closed:
+        await client.aclose()
+        logger.info("Shared HTTP client closed.")
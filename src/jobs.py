@@ -0,0 +1,141 @@
+# src/jobs.py
+"""
+In-process registry of background jobs started from the dashboard.
+
+Manual triggers enqueue a job and return its id immediately; the job runs as an
+asyncio task and records each stage (post shared, liked, summary added...) so
+the UI can poll /api/jobs/{id} or follow /api/jobs/{id}/stream.
+"""
+import asyncio
+import datetime
+import logging
+import threading
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Terminal job states; everything else means the job may still change.
+FINISHED_STATUSES = ("completed", "failed")
+
+
+def _utcnow() -> datetime.datetime:
+    return datetime.datetime.now(datetime.timezone.utc)
+
+
+@dataclass
+class Job:
+    id: str
+    kind: str
+    status: str = "queued"  # queued, running, waiting (follow-ups pending), completed, failed
+    message: Optional[str] = None
+    url: Optional[str] = None
+    stages: List[Dict[str, str]] = field(default_factory=list)
+    pending_followups: int = 0
+    created_at: datetime.datetime = field(default_factory=_utcnow)
+    updated_at: datetime.datetime = field(default_factory=_utcnow)
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED_STATUSES
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "message": self.message,
+            "url": self.url,
+            "stages": list(self.stages),
+            "pending_followups": self.pending_followups,
+            "created_at": self.created_at.isoformat(),
+            "updated_at": self.updated_at.isoformat(),
+        }
+
+
+class JobRegistry:
+    """Keeps the most recent jobs in memory (oldest are dropped beyond max_jobs)."""
+
+    def __init__(self, max_jobs: int = 200):
+        self.max_jobs = max_jobs
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._tasks = set()  # Strong references so running tasks are not garbage collected
+
+    def create(self, kind: str) -> Job:
+        job = Job(id=uuid.uuid4().hex, kind=kind)
+        with self._lock:
+            self._jobs[job.id] = job
+            while len(self._jobs) > self.max_jobs:
+                self._jobs.popitem(last=False)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def record_stage(self, job_id: Optional[str], stage: str, message: str, followup_done: bool = False) -> None:
+        """
+        Appends a stage to a job. No-op for jobs started without an id (e.g. cron runs).
+        Completing the last pending follow-up finishes a job that was waiting on it.
+        """
+        job = self.get(job_id) if job_id else None
+        if job is None:
+            return
+        with self._lock:
+            job.stages.append({"stage": stage, "message": message, "at": _utcnow().isoformat()})
+            if followup_done and job.pending_followups > 0:
+                job.pending_followups -= 1
+                if job.pending_followups == 0 and job.status == "waiting":
+                    job.status = "completed"
+            job.updated_at = _utcnow()
+
+    def expect_followups(self, job_id: Optional[str], count: int) -> None:
+        """Declares follow-up actions that must finish before the job is completed."""
+        job = self.get(job_id) if job_id else None
+        if job is None:
+            return
+        with self._lock:
+            job.pending_followups += count
+            job.updated_at = _utcnow()
+
+    def _finish(self, job: Job, result: Optional[Dict[str, Any]]) -> None:
+        with self._lock:
+            result = result or {}
+            job.message = result.get("message")
+            job.url = result.get("url")
+            if not result.get("success"):
+                job.status = "failed"
+            elif job.pending_followups > 0:
+                job.status = "waiting"
+            else:
+                job.status = "completed"
+            job.updated_at = _utcnow()
+
+    def start(self, kind: str, runner: Callable[[str], Awaitable[Optional[Dict[str, Any]]]]) -> Job:
+        """
+        Creates a job and runs `runner(job_id)` as a background task on the current loop.
+        The runner's result dict ({"success", "message", "url"}) finishes the job.
+        """
+        job = self.create(kind)
+
+        async def run():
+            with self._lock:
+                job.status = "running"
+                job.updated_at = _utcnow()
+            try:
+                result = await runner(job.id)
+            except Exception as e:
+                logger.exception(f"Background job {job.id} ({kind}) crashed")
+                result = {"success": False, "message": f"Error: {e}"}
+            self._finish(job, result)
+
+        task = asyncio.get_running_loop().create_task(run())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return job
+
+
+job_registry = JobRegistry()
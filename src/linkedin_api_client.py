@@ -1,26 +1,124 @@
+import asyncio
 import httpx
-from typing import List, Dict, Any, Optional
+import logging
+import threading
+import time
+from typing import List, Dict, Any, Optional, Tuple
+from .config import settings
 from .database import SessionLocal
 from .models import Token
+from .http_client import get_http_client
+from .rate_limiter import rate_limiter, backoff_delay
+
+logger = logging.getLogger(__name__)
+
+# Process-wide cache of the authenticated user's /userinfo response,
+# keyed by access token: {token: (expires_at_monotonic, profile_data)}
+_profile_cache: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+
+
+def invalidate_profile_cache(access_token: Optional[str] = None) -> None:
+    """
+    Drops cached profile data for the given token, or for all tokens.
+    Must be called whenever the stored access token changes (login/logout).
+    """
+    if access_token is None:
+        _profile_cache.clear()
+    else:
+        _profile_cache.pop(access_token.strip(), None)
+
+
+def _load_token_from_db() -> Optional[str]:
+    """Loads the most recent access token from the database."""
+    db = SessionLocal()
+    try:
+        token_record = db.query(Token).order_by(Token.created_at.desc()).first()
+        if token_record and token_record.access_token:
+            # Strip whitespace and validate token is not empty
+            token = token_record.access_token.strip() if token_record.access_token else None
+            return token if token else None
+        return None
+    finally:
+        db.close()
+
+
+class TokenStore:
+    """
+    In-memory cache of the current LinkedIn access token.
+
+    The token is read from the database and then served from memory to every
+    LinkedInApiClient (web handlers and scheduled worker jobs alike) for up to
+    `ttl_seconds`. The OAuth handlers update the store through set()/clear()
+    when this process changes the token; the TTL makes other processes (other
+    web workers, a standalone worker) pick up a login or logout as well. When
+    the database has no token, nothing is cached, so a login elsewhere is seen
+    on the next get().
+    """
+
+    def __init__(self, loader, ttl_seconds: float = 60):
+        self._loader = loader
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._expires_at = 0.0
+        self._token: Optional[str] = None
+
+    def get(self) -> Optional[str]:
+        """Returns the current token, re-reading the database once the cached one is too old."""
+        if time.monotonic() >= self._expires_at:
+            with self._lock:
+                if time.monotonic() >= self._expires_at:
+                    previous = self._token
+                    self._token = self._loader()
+                    self._expires_at = time.monotonic() + self.ttl_seconds if self._token else 0.0
+                    if self._token != previous:
+                        invalidate_profile_cache()
+        return self._token
+
+    def set(self, access_token: Optional[str]) -> None:
+        """Records a newly stored token (e.g. after /callback)."""
+        token = access_token.strip() if access_token else None
+        with self._lock:
+            self._token = token or None
+            self._expires_at = time.monotonic() + self.ttl_seconds
+        invalidate_profile_cache()
+
+    def clear(self) -> None:
+        """Records that the stored token was deleted (e.g. after /logout)."""
+        self.set(None)
+
+    def invalidate(self) -> None:
+        """Forgets the cached token so the next get() re-reads the database."""
+        with self._lock:
+            self._token = None
+            self._expires_at = 0.0
+        invalidate_profile_cache()
+
+
+token_store = TokenStore(_load_token_from_db, ttl_seconds=settings.TOKEN_CACHE_TTL_SECONDS)
+
 
 class LinkedInApiClient:
     """
     A modern, token-based client for interacting with the LinkedIn API.
-    It can be initialized with a direct access token, or it can retrieve
-    the token from the database as a fallback.
+    It can be initialized with a direct access token, or it falls back to
+    the token cached in ``token_store`` (re-read from the database every
+    TOKEN_CACHE_TTL_SECONDS).
+
+    All requests go through the process-wide pooled ``httpx.AsyncClient``
+    (see ``src/http_client.py``) unless a client is injected explicitly.
     """
     API_BASE_URL = "https://api.linkedin.com/v2"
 
-    def __init__(self, access_token: Optional[str] = None):
+    def __init__(self, access_token: Optional[str] = None, http_client: Optional[httpx.AsyncClient] = None):
         # Prioritize the token passed directly to the constructor.
         # This is crucial for the worker flow.
         if access_token:
             self.access_token = access_token.strip() if access_token else None
         else:
-            # Fallback to loading from DB for other potential use cases.
-            self.access_token = self._load_token_from_db()
+            # Fallback to the cached token, which is re-read from the DB after a short TTL.
+            self.access_token = token_store.get()
 
-        # Validate that the token is not None or empty (already stripped above or in _load_token_from_db)
+        # Validate that the token is not None or empty (already stripped above or in the token store)
         if not self.access_token:
             raise ValueError("Access token is not available. Please log in or provide a token.")
 
@@ -29,30 +127,63 @@ class LinkedInApiClient:
             "Content-Type": "application/json",
             "X-Restli-Protocol-Version": "2.0.0",
         }
+        self._http_client = http_client
 
-    def _load_token_from_db(self) -> str | None:
-        """Loads the most recent access token from the database."""
-        db = SessionLocal()
-        try:
-            token_record = db.query(Token).order_by(Token.created_at.desc()).first()
-            if token_record and token_record.access_token:
-                # Strip whitespace and validate token is not empty
-                token = token_record.access_token.strip() if token_record.access_token else None
-                return token if token else None
-            return None
-        finally:
-            db.close()
-
-    async def get_profile(self) -> Dict[str, Any]:
-        """Fetches the authenticated user's profile information using OpenID Connect userinfo endpoint."""
-        async with httpx.AsyncClient() as client:
-            response = await client.get(f"{self.API_BASE_URL}/userinfo", headers=self.headers)
-            response.raise_for_status()
-            profile_data = response.json()
-            # Map 'sub' field to 'id' for backward compatibility
-            if 'sub' in profile_data and 'id' not in profile_data:
-                profile_data['id'] = profile_data['sub']
-            return profile_data
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """The HTTP client used for requests; defaults to the shared pool."""
+        return self._http_client or get_http_client()
+
+    async def _request(self, method: str, url: str, family: str, retry_server_errors: bool = True, **kwargs) -> httpx.Response:
+        """
+        Sends a request through the rate limiter of its endpoint family.
+
+        429 responses block the family for Retry-After (shared by all processes)
+        and are retried; 5xx responses are retried with jittered exponential
+        backoff unless `retry_server_errors` is False (used where a retry could
+        create a duplicate). The final response is checked with raise_for_status().
+        """
+        send = self.client.get if method == "GET" else self.client.post
+        for attempt in range(settings.RATE_LIMIT_MAX_RETRIES + 1):
+            await rate_limiter.acquire(family)
+            response = await send(url, headers=self.headers, **kwargs)
+            status = response.status_code
+            retryable = status == 429 or (status >= 500 and retry_server_errors)
+            if not retryable or attempt == settings.RATE_LIMIT_MAX_RETRIES:
+                break
+            delay = backoff_delay(attempt, response.headers.get("Retry-After"))
+            logger.warning(f"LinkedIn returned {status} for {method} {url}; retrying in {delay:.1f}s")
+            if status == 429:
+                try:
+                    await asyncio.to_thread(rate_limiter.block, family, delay)
+                except Exception as e:
+                    logger.warning(f"Could not record rate limit block for '{family}': {e}")
+            await asyncio.sleep(delay)
+        response.raise_for_status()
+        return response
+
+    async def get_profile(self, use_cache: bool = True) -> Dict[str, Any]:
+        """
+        Fetches the authenticated user's profile information using OpenID Connect userinfo endpoint.
+
+        The result is cached per access token for PROFILE_CACHE_TTL_SECONDS so that
+        every action does not pay a /userinfo round trip just to learn our own URN.
+        Pass use_cache=False to force a fresh lookup.
+        """
+        cached = _profile_cache.get(self.access_token) if use_cache else None
+        if cached and cached[0] > time.monotonic():
+            return dict(cached[1])
+
+        response = await self._request("GET", f"{self.API_BASE_URL}/userinfo", "profile")
+        profile_data = response.json()
+        # Map 'sub' field to 'id' for backward compatibility
+        if 'sub' in profile_data and 'id' not in profile_data:
+            profile_data['id'] = profile_data['sub']
+
+        if profile_data.get('id') and settings.PROFILE_CACHE_TTL_SECONDS > 0:
+            expires_at = time.monotonic() + settings.PROFILE_CACHE_TTL_SECONDS
+            _profile_cache[self.access_token] = (expires_at, dict(profile_data))
+        return profile_data
 
     # ... (rest of the methods remain unchanged) ...
 
@@ -77,9 +208,7 @@ class LinkedInApiClient:
                     "body": {"text": message}
                 }
             }
-        async with httpx.AsyncClient() as client:
-            response = await client.post(f"{self.API_BASE_URL}/invitations", headers=self.headers, json=payload)
-            response.raise_for_status()
+        await self._request("POST", f"{self.API_BASE_URL}/invitations", "invitation", retry_server_errors=False, json=payload)
 
     async def search_for_posts(self, keywords: str, count: int = 5) -> List[Dict[str, Any]]:
         """
@@ -122,10 +251,9 @@ class LinkedInApiClient:
             "specificContent": {"com.linkedin.ugc.ShareContent": share_content},
             "visibility": {"com.linkedin.ugc.MemberNetworkVisibility": "PUBLIC"}
         }
-        async with httpx.AsyncClient() as client:
-            response = await client.post(f"{self.API_BASE_URL}/ugcPosts", headers=self.headers, json=payload)
-            response.raise_for_status()
-            return response.json()
+        # A 5xx may still have published the post, so only throttling (429) is retried here.
+        response = await self._request("POST", f"{self.API_BASE_URL}/ugcPosts", "share", retry_server_errors=False, json=payload)
+        return response.json()
 
     async def get_profile_by_urn(self, person_urn: str) -> Dict[str, Any]:
         """
@@ -136,10 +264,8 @@ class LinkedInApiClient:
         projection = "localizedFirstName,localizedLastName"
         url = f"{self.API_BASE_URL}/people/{encoded_urn}?projection=({projection})"
 
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url, headers=self.headers)
-            response.raise_for_status()
-            return response.json()
+        response = await self._request("GET", url, "profile")
+        return response.json()
 
     async def get_post_details(self, post_urn: str) -> Dict[str, Any]:
         """
@@ -149,10 +275,8 @@ class LinkedInApiClient:
         encoded_urn = urllib.parse.quote(post_urn)
         url = f"{self.API_BASE_URL}/ugcPosts/{encoded_urn}"
 
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url, headers=self.headers)
-            response.raise_for_status()
-            post_data = response.json()
+        response = await self._request("GET", url, "read")
+        post_data = response.json()
 
         content = post_data.get("specificContent", {}).get("com.linkedin.ugc.ShareContent", {}).get("shareCommentary", {}).get("text")
         author_urn = post_data.get("author")
@@ -193,28 +317,27 @@ class LinkedInApiClient:
             httpx.HTTPStatusError: If the request fails (403, 404, etc.)
         """
         payload = {"actor": f"urn:li:person:{actor_urn}", "reaction": "LIKE", "object": post_urn}
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.post(f"{self.API_BASE_URL}/reactions", headers=self.headers, json=payload)
-                response.raise_for_status()
-            except httpx.HTTPStatusError as e:
-                if e.response.status_code == 403:
-                    # Log but don't crash - reactions may require special permissions
-                    import logging
-                    logging.warning(
-                        f"403 Forbidden when adding reaction. This may be expected if the LinkedIn app "
-                        f"doesn't have reaction permissions or the post is not accessible. "
-                        f"Post URN: {post_urn}"
-                    )
-                    # Re-raise so caller can handle
-                    raise
-                else:
-                    raise
+        try:
+            await self._request("POST", f"{self.API_BASE_URL}/reactions", "reaction", json=payload)
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code == 403:
+                # Log but don't crash - reactions may require special permissions
+                import logging
+                logging.warning(
+                    f"403 Forbidden when adding reaction. This may be expected if the LinkedIn app "
+                    f"doesn't have reaction permissions or the post is not accessible. "
+                    f"Post URN: {post_urn}"
+                )
+                # Re-raise so caller can handle
+                raise
+            else:
+                raise
 
     async def submit_comment(self, actor_urn: str, post_urn: str, text: str) -> Dict[str, Any]:
         """Submits a comment on a given post."""
         payload = {"actor": f"urn:li:person:{actor_urn}", "object": post_urn, "message": {"text": text}}
-        async with httpx.AsyncClient() as client:
-            response = await client.post(f"{self.API_BASE_URL}/socialActions/{post_urn}/comments", headers=self.headers, json=payload)
-            response.raise_for_status()
-            return response.json()
+        # A 5xx may still have created the comment, so only throttling (429) is retried here.
+        response = await self._request(
+            "POST", f"{self.API_BASE_URL}/socialActions/{post_urn}/comments", "comment", retry_server_errors=False, json=payload
+        )
+        return response.json()
@@ -1,34 +1,40 @@
-from fastapi import FastAPI, Request, Depends
-from fastapi.responses import HTMLResponse, RedirectResponse
+from fastapi import FastAPI, Request, Depends, HTTPException
+from fastapi.responses import HTMLResponse, RedirectResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
-from sqlalchemy.orm import Session
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from . import models
-from .database import engine, SessionLocal
+from .database import engine, AsyncSessionLocal
+from .migrations import run_migrations
 from .config import settings
 import pytz
 import os
 import datetime
-import httpx
 from typing import List
 from pydantic import BaseModel
 import urllib.parse
 from pathlib import Path
 
-# Create all tables
-models.Base.metadata.create_all(bind=engine)
+# Bring the schema up to date (see migrations/)
+if settings.DB_AUTO_MIGRATE:
+    run_migrations(engine)
 
 from .scheduler import setup_scheduler, shutdown_scheduler, scheduler
+from .http_client import get_http_client, aclose_http_client
+from .linkedin_api_client import token_store
+from .jobs import job_registry
+from .action_log import action_log_writer
+from .quotas import COMMENT_QUOTA, POST_QUOTA, quota_service
+import asyncio
+import json
 
 app = FastAPI()
 
 # --- Dependency to get a DB session ---
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db():
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
 
 # --- OAuth 2.0 Authentication Flow ---
 
@@ -46,7 +52,7 @@ async def linkedin_login():
     return RedirectResponse(url=auth_url)
 
 @app.get("/callback")
-async def linkedin_callback(code: str, state: str, db: Session = Depends(get_db)):
+async def linkedin_callback(code: str, state: str, db: AsyncSession = Depends(get_db)):
     """Handles the callback, exchanges the code for a token, and stores it in the database."""
     token_url = "https://www.linkedin.com/oauth/v2/accessToken"
     payload = {
@@ -57,8 +63,7 @@ async def linkedin_callback(code: str, state: str, db: Session = Depends(get_db)
         "client_secret": settings.LINKEDIN_CLIENT_SECRET,
     }
 
-    async with httpx.AsyncClient() as client:
-        response = await client.post(token_url, data=payload)
+    response = await get_http_client().post(token_url, data=payload)
 
     if response.status_code != 200:
         return HTMLResponse(f"<h1>Error</h1><p>Could not retrieve access token: {response.text}</p>")
@@ -73,13 +78,14 @@ async def linkedin_callback(code: str, state: str, db: Session = Depends(get_db)
     try:
         # Clear any old tokens and save the new one
         # Strip whitespace from token before storing
-        db.query(models.Token).delete()
+        await db.execute(delete(models.Token))
         new_token = models.Token(access_token=access_token.strip())
         db.add(new_token)
-        db.commit()
+        await db.commit()
+        token_store.set(access_token.strip())
         print("Access token successfully saved to the database.")
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         print(f"CRITICAL: Failed to save access token to database. Error: {e}")
         return HTMLResponse(f"<h1>Error</h1><p>Could not save access token to database: {e}</p>", status_code=500)
 
@@ -87,14 +93,15 @@ async def linkedin_callback(code: str, state: str, db: Session = Depends(get_db)
 
 
 @app.get("/logout")
-async def logout(db: Session = Depends(get_db)):
+async def logout(db: AsyncSession = Depends(get_db)):
     """Logs the user out by deleting the token from the database."""
     try:
-        db.query(models.Token).delete()
-        db.commit()
+        await db.execute(delete(models.Token))
+        await db.commit()
+        token_store.clear()
         print("Token successfully deleted from the database.")
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         print(f"Error deleting token from database: {e}")
     return RedirectResponse(url="/")
 
@@ -113,11 +120,17 @@ async def get_scheduled_jobs():
 
 @app.on_event("startup")
 async def startup_event():
+    # Open the pooled HTTP client on the app's event loop so scheduled jobs and
+    # request handlers share its keep-alive connections.
+    get_http_client()
     setup_scheduler()
 
 @app.on_event("shutdown")
 async def shutdown_event():
     shutdown_scheduler()
+    await aclose_http_client()
+    # Write out audit log records still waiting in the buffer
+    await asyncio.to_thread(action_log_writer.close)
 
 # Setup templates and static files
 current_file_path = os.path.dirname(os.path.abspath(__file__))
@@ -139,13 +152,14 @@ templates.env.filters["istanbul_time"] = format_datetime_istanbul
 from .models import ActionLog
 
 @app.get("/", response_class=HTMLResponse)
-async def read_dashboard(request: Request, db: Session = Depends(get_db)):
-    logs = db.query(ActionLog).order_by(ActionLog.timestamp.desc()).limit(10).all()
-    pending_posts = db.query(models.TranslatedPost).filter(models.TranslatedPost.status == "pending").order_by(models.TranslatedPost.posted_at.desc()).all()
-
-    # Check if logged in by looking for a token in the database
-    token = db.query(models.Token).first()
-    is_logged_in = token is not None
+async def read_dashboard(request: Request, db: AsyncSession = Depends(get_db)):
+    logs = (await db.scalars(select(ActionLog).order_by(ActionLog.timestamp.desc()).limit(10))).all()
+    pending_posts = (await db.scalars(
+        select(models.TranslatedPost).where(models.TranslatedPost.status == "pending").order_by(models.TranslatedPost.posted_at.desc())
+    )).all()
+
+    # Check if logged in using the cached token (the DB is only read when it changes)
+    is_logged_in = token_store.get() is not None
     return templates.TemplateResponse("index.html", {
         "request": request,
         "logs": logs,
@@ -158,19 +172,44 @@ from .worker import trigger_post_creation, trigger_commenting, trigger_invitatio
 
 @app.post("/api/trigger/post")
 async def trigger_post(background_tasks: BackgroundTasks):
-    result = await trigger_post_creation()
-    if result and result.get("success"):
-        return {
-            "success": True,
-            "message": result.get("message", "Post creation triggered successfully."),
-            "url": result.get("url"),
-            "actions": result.get("actions", [])
-        }
-    else:
-        return {
-            "success": False,
-            "message": result.get("message", "Post creation failed.") if result else "Post creation failed."
-        }
+    """Starts post creation as a background job and returns its id immediately."""
+    job = job_registry.start("post_creation", lambda job_id: trigger_post_creation(job_id=job_id))
+    return {
+        "success": True,
+        "message": "Gönderi oluşturma başlatıldı.",
+        "job_id": job.id,
+        "status_url": f"/api/jobs/{job.id}",
+        "stream_url": f"/api/jobs/{job.id}/stream",
+    }
+
+@app.get("/api/jobs/{job_id}")
+async def get_job_status(job_id: str):
+    """Returns the current status and recorded stages of a background job."""
+    job = job_registry.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
+
+@app.get("/api/jobs/{job_id}/stream")
+async def stream_job_status(job_id: str):
+    """Streams job progress as server-sent events until the job finishes."""
+    if not job_registry.get(job_id):
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    async def events():
+        last_update = None
+        while True:
+            job = job_registry.get(job_id)
+            if job is None:
+                break
+            if job.updated_at != last_update:
+                last_update = job.updated_at
+                yield f"data: {json.dumps(job.to_dict(), ensure_ascii=False)}\n\n"
+            if job.finished:
+                break
+            await asyncio.sleep(1)
+
+    return StreamingResponse(events(), media_type="text/event-stream")
 
 @app.post("/api/trigger/comment")
 async def trigger_comment(background_tasks: BackgroundTasks):
@@ -207,9 +246,9 @@ async def trigger_invite(background_tasks: BackgroundTasks):
 @app.post("/api/manual_comment")
 async def manual_comment(request: Request):
     """Manually comment on a specific LinkedIn post by URL."""
-    from .ai_core import generate_text
+    from .ai_core import generate_text_async
     from .linkedin_api_client import LinkedInApiClient
-    from .worker import log_action
+    from .worker import log_action, record_comment
     import re
     
     try:
@@ -250,13 +289,27 @@ async def manual_comment(request: Request):
             comment_prompt = f"""Write a LinkedIn comment. Write as Kürşat: 21-year-old solo entrepreneur who builds massive projects alone, 
 skilled in software, music, boxing, and design. A Turkish nationalist following Atatürk's path. 
 Match the post's language. Be authentic and add value. Maximum 280 characters."""
-            comment_text = generate_text(comment_prompt)
+            comment_text = await generate_text_async(comment_prompt)
             
             if not comment_text:
                 return {"success": False, "message": "Could not generate comment text. Please provide a custom comment or check GEMINI_API_KEY."}
         
-        # Submit comment
-        await api_client.submit_comment(user_urn, post_urn, comment_text)
+        # Manual comments count against the same daily quota as the scheduled ones
+        if not await asyncio.to_thread(quota_service.try_consume, COMMENT_QUOTA):
+            log_action("Manual Comment Skipped", "Daily comment quota reached", url=post_url)
+            return {"success": False, "message": "Daily comment quota reached, try again tomorrow"}
+        try:
+            await api_client.submit_comment(user_urn, post_urn, comment_text)
+        except Exception:
+            await asyncio.to_thread(quota_service.release, COMMENT_QUOTA)
+            raise
+
+        # Record it like a scheduled comment, so comment pacing and the
+        # already-commented check of batch runs take it into account
+        try:
+            await record_comment(post_url, comment_text)
+        except Exception as e:
+            log_action("Comment Record Failed", f"Could not record manual comment: {e}", url=post_url)
         
         # Log the action
         log_action("Manual Comment Added", f"Commented on post: {post_url[:50]}...", url=post_url)
@@ -281,12 +334,12 @@ def health_check():
     return {"status": "ok"}
 
 @app.post("/api/posts/{post_id}/approve")
-async def approve_and_post(post_id: int, db: Session = Depends(get_db)):
+async def approve_and_post(post_id: int, db: AsyncSession = Depends(get_db)):
     """Approves a translated post, shares it on LinkedIn, and likes it."""
     from .linkedin_api_client import LinkedInApiClient
     from .worker import log_action
 
-    post_to_share = db.query(models.TranslatedPost).filter(models.TranslatedPost.id == post_id).first()
+    post_to_share = await db.get(models.TranslatedPost, post_id)
     if not post_to_share or post_to_share.status != "pending":
         return {"success": False, "message": "Post not found or already processed."}
 
@@ -298,12 +351,20 @@ async def approve_and_post(post_id: int, db: Session = Depends(get_db)):
         if not author_urn:
             return {"success": False, "message": "Could not get user profile URN."}
 
+        if not await asyncio.to_thread(quota_service.try_consume, POST_QUOTA):
+            log_action("Translated Post Skipped", f"Daily post quota reached, post ID {post_id} stays pending")
+            return {"success": False, "message": "Günlük gönderi kotası doldu, yarın tekrar deneyin."}
+
         # Share the post, including the image if it exists
-        post_result = await api_client.share_post(
-            author_urn,
-            post_to_share.translated_content,
-            post_to_share.image_url
-        )
+        try:
+            post_result = await api_client.share_post(
+                author_urn,
+                post_to_share.translated_content,
+                post_to_share.image_url
+            )
+        except Exception:
+            await asyncio.to_thread(quota_service.release, POST_QUOTA)
+            raise
         our_post_urn = post_result.get("id") # This is the URN of our new post
 
         if not our_post_urn:
@@ -320,7 +381,7 @@ async def approve_and_post(post_id: int, db: Session = Depends(get_db)):
         # Update database
         post_to_share.status = "posted"
         post_to_share.our_post_url = f"https://www.linkedin.com/feed/update/{our_post_urn}"
-        db.commit()
+        await db.commit()
 
         log_action("Translated Post Shared", f"Shared post: {post_to_share.translated_content[:50]}...", url=post_to_share.our_post_url)
 
@@ -328,30 +389,30 @@ async def approve_and_post(post_id: int, db: Session = Depends(get_db)):
     except Exception as e:
         log_action("Translated Post Failed", f"Error sharing post ID {post_id}: {str(e)}")
         post_to_share.status = "failed"
-        db.commit()
+        await db.commit()
         return {"success": False, "message": f"Bir hata oluştu: {str(e)}"}
 
 @app.post("/api/posts/{post_id}/reject")
-async def reject_post(post_id: int, db: Session = Depends(get_db)):
+async def reject_post(post_id: int, db: AsyncSession = Depends(get_db)):
     """Rejects and deletes a translated post."""
-    post_to_reject = db.query(models.TranslatedPost).filter(models.TranslatedPost.id == post_id).first()
+    post_to_reject = await db.get(models.TranslatedPost, post_id)
     if not post_to_reject or post_to_reject.status != "pending":
         return {"success": False, "message": "Post not found or already processed."}
 
-    db.delete(post_to_reject)
-    db.commit()
+    await db.delete(post_to_reject)
+    await db.commit()
 
     return {"success": True, "message": "Çeviri reddedildi ve silindi."}
 
 
 @app.post("/api/translate-post")
-async def handle_translate_post(request: Request, db: Session = Depends(get_db)):
+async def handle_translate_post(request: Request, db: AsyncSession = Depends(get_db)):
     """
     Handles the submission of a LinkedIn post URL for translation.
     It fetches the post, translates it, and saves it for approval.
     """
     from .linkedin_api_client import LinkedInApiClient
-    from .ai_core import generate_text
+    from .ai_core import generate_text_async
     import re
 
     try:
@@ -369,7 +430,10 @@ async def handle_translate_post(request: Request, db: Session = Depends(get_db))
         post_urn = f"urn:li:{urn_match.group(1)}:{urn_match.group(2)}"
 
         # Check if already translated
-        if db.query(models.TranslatedPost).filter(models.TranslatedPost.original_post_url == post_url).first():
+        already_translated = await db.scalar(
+            select(models.TranslatedPost.id).where(models.TranslatedPost.original_post_url == post_url).limit(1)
+        )
+        if already_translated:
              return {"success": False, "message": "Bu gönderi daha önce çevrilmiş veya çevrilmek üzere işleniyor."}
 
         # Fetch post details
@@ -385,7 +449,8 @@ async def handle_translate_post(request: Request, db: Session = Depends(get_db))
 
         # Translate the content
         translation_prompt = f"Translate the following LinkedIn post into high-quality Turkish, maintaining a professional and engaging tone. Post:\n\n{original_content}"
-        translated_content = generate_text(translation_prompt)
+        # The same post always gets the same translation, so it may come from the cache
+        translated_content = await generate_text_async(translation_prompt, use_cache=True)
 
         if not translated_content:
             return {"success": False, "message": "Metin çevrilemedi. Gemini API'yi kontrol edin."}
@@ -400,7 +465,7 @@ async def handle_translate_post(request: Request, db: Session = Depends(get_db))
             status="pending"
         )
         db.add(new_post)
-        db.commit()
+        await db.commit()
 
         return {"success": True, "message": "Gönderi çeviri için başarıyla gönderildi."}
 
@@ -0,0 +1,44 @@
+# src/migrations.py
+"""
+Applies the Alembic migrations in migrations/ to the configured database.
+
+Databases created before migrations existed (tables made by create_all() at
+startup, no alembic_version table) are stamped at the initial revision first,
+so only the later revisions run against them. The same code path serves
+SQLite and PostgreSQL; on PostgreSQL, env.py serializes concurrent runs with an
+advisory lock so several nodes can start at once.
+"""
+from pathlib import Path
+from typing import Optional
+
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import inspect
+from sqlalchemy.engine import Engine
+
+from .database import engine as default_engine
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+ALEMBIC_INI = PROJECT_ROOT / "alembic.ini"
+BASELINE_REVISION = "0001"
+
+
+def alembic_config(connection=None) -> Config:
+    """Alembic config for this project; migrations run on `connection` when given."""
+    config = Config(str(ALEMBIC_INI))
+    config.set_main_option("script_location", str(PROJECT_ROOT / "migrations"))
+    config.attributes["configure_logging"] = False
+    if connection is not None:
+        config.attributes["connection"] = connection
+    return config
+
+
+def run_migrations(bind: Optional[Engine] = None, revision: str = "head") -> None:
+    """Upgrades the database behind `bind` (default: the application engine) to `revision`."""
+    bind = bind or default_engine
+    with bind.begin() as connection:
+        config = alembic_config(connection)
+        inspector = inspect(connection)
+        if not inspector.has_table("alembic_version") and inspector.has_table("action_logs"):
+            command.stamp(config, BASELINE_REVISION)
+        command.upgrade(config, revision)
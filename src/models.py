@@ -1,17 +1,28 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, DateTime, Float, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from .database import Base
 import datetime
 
 class ActionLog(Base):
     __tablename__ = "action_logs"
+    __table_args__ = (
+        Index("ix_action_logs_action_type_timestamp", "action_type", "timestamp"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     action_type = Column(String, index=True)
     details = Column(String)
-    timestamp = Column(DateTime, default=datetime.datetime.utcnow)
+    timestamp = Column(DateTime, default=datetime.datetime.utcnow, index=True)
     result_url = Column(String, nullable=True) # To store the URL for verification
 
+class ActionLogDailyCount(Base):
+    """Number of action_logs rows per (UTC) day and action type, kept after the raw rows are pruned."""
+    __tablename__ = "action_log_daily_counts"
+
+    day = Column(String(10), primary_key=True)  # YYYY-MM-DD
+    action_type = Column(String, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+
 class Post(Base):
     __tablename__ = "posts"
 
@@ -54,3 +65,66 @@ class TranslatedPost(Base):
     status = Column(String, default="pending")  # pending, approved, posted, rejected
     posted_at = Column(DateTime, default=datetime.datetime.utcnow)
     our_post_url = Column(String, nullable=True)
+
+class AIResponseCache(Base):
+    __tablename__ = "ai_response_cache"
+
+    key = Column(String(64), primary_key=True)  # sha256 of (model, persona hash, prompt, config)
+    model_name = Column(String)
+    response = Column(Text, nullable=False)
+    created_at = Column(DateTime, default=datetime.datetime.utcnow, index=True)
+    last_accessed_at = Column(DateTime, default=datetime.datetime.utcnow, index=True)
+
+class ScheduledAction(Base):
+    """A delayed follow-up (e.g. like after 45s) that must survive restarts."""
+    __tablename__ = "scheduled_actions"
+    __table_args__ = (
+        Index("ix_scheduled_actions_status_run_at", "status", "run_at"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    action_type = Column(String, nullable=False)
+    payload = Column(Text, nullable=False, default="{}")  # JSON-encoded keyword arguments for the handler
+    run_at = Column(DateTime, nullable=False)
+    status = Column(String, nullable=False, default="pending")  # pending, running, done, failed
+    attempts = Column(Integer, nullable=False, default=0)
+    last_error = Column(String, nullable=True)
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow)
+
+class FeedEntry(Base):
+    """An RSS entry seen during ingestion; `status` records whether it was shared."""
+    __tablename__ = "feed_entries"
+    __table_args__ = (
+        Index("ix_feed_entries_status_published_at", "status", "published_at"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    entry_hash = Column(String(64), unique=True, index=True, nullable=False)  # sha256 of GUID or link
+    feed_url = Column(String, index=True)
+    guid = Column(String, nullable=True)
+    title = Column(String)
+    link = Column(String)
+    summary = Column(Text, nullable=True)
+    published_at = Column(DateTime, nullable=False)  # Falls back to first_seen_at when the feed has no date
+    first_seen_at = Column(DateTime, default=datetime.datetime.utcnow)
+    status = Column(String, nullable=False, default="new")  # new, reserved, shared, skipped
+    status_changed_at = Column(DateTime, nullable=True)
+    commented_at = Column(DateTime, nullable=True)  # Set when we commented on a post discovered from this entry
+
+class RateLimitBucket(Base):
+    """Token-bucket state for one LinkedIn endpoint family, shared by all processes."""
+    __tablename__ = "rate_limit_buckets"
+
+    family = Column(String, primary_key=True)
+    tokens = Column(Float, nullable=False)
+    updated_at = Column(Float, nullable=False)  # Unix time of the last refill
+    blocked_until = Column(Float, nullable=False, default=0.0)  # Unix time; set from Retry-After on 429
+
+class DailyQuota(Base):
+    """How many actions of one type were taken on one day (Europe/Istanbul), shared by all processes."""
+    __tablename__ = "daily_quotas"
+
+    day = Column(String(10), primary_key=True)  # YYYY-MM-DD
+    action_type = Column(String, primary_key=True)  # invite, comment, post
+    count = Column(Integer, nullable=False, default=0)
@@ -1,25 +1,14 @@
 # src/persona.py
+import hashlib
+import os
+import threading
+from typing import Optional, Tuple
 
-def get_persona_prompt():
-    """
-    Generates the main system prompt for the AI based on Kürşat's persona.
-    This prompt will guide the LLM in all content generation tasks.
-    """
+from .config import settings
 
-    persona_details = {
-        "name": "Kürşat",
-        "age": 21,
-        "profession": "Girişimcilik ve teknoloji alanlarında çok yönlü bir uzman.",
-        "ideology": "Atatürk'ü seven ve Türk değerlerine bağlı bir Türkçü.",
-        "communication_style": {
-            "tone": "Profesyonel, bilgili ve samimi bir dil kullanır.",
-            "humor": "Zeki ve ince bir mizah anlayışına sahiptir, zaman zaman konuları tiye almayı sever.",
-            "goal": "Paylaşımları bilgi verici, düşündürücü ve etkileşim başlatıcı olmalıdır."
-        },
-        "linkedin_goal": "Kişisel markasını güçlendirmek ve sektöründe bir düşünce lideri olarak konumlanmak."
-    }
-
-    prompt = f"""
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+PERSONA_TEMPLATE = """
     You are Kürşat, a 21-year-old solo entrepreneur and product builder.
     Write in first person as Kürşat himself - you ARE Kürşat, not an assistant or AI.
     All your actions and writing must follow these rules:
@@ -41,13 +30,88 @@ def get_persona_prompt():
 
     **CRITICAL RULES:**
     - NEVER reveal your automated nature or mention being an assistant
-    - NEVER use phrases like: "I will...", "Next I'll...", "As an AI...", "I'm programmed to...", 
+    - NEVER use phrases like: "I will...", "Next I'll...", "As an AI...", "I'm programmed to...",
       "My training...", "automated nature...", "algorithm...", "model..."
     - NEVER announce what you will do next in your posts or comments
     - NEVER explain your process or methodology
     - Write naturally as a human entrepreneur sharing genuine thoughts
     - Be authentic, direct, and strategic
     - You ARE Kürşat - write as yourself, not as someone helping Kürşat
+    """.strip()
+
+# (section title, settings attribute holding the file path)
+PERSONA_SOURCES = (
+    ("ABOUT ME", "ABOUT_ME_PATH"),
+    ("POST STYLE", "POST_STYLE_FILE"),
+    ("COMMENT STYLE", "COMMENT_STYLE_FILE"),
+)
+
+_lock = threading.Lock()
+_cached_signature: Optional[Tuple] = None
+_cached_prompt: Optional[str] = None
+_cached_version: Optional[str] = None
+
+
+def _resolve_path(path: str) -> str:
+    """Relative paths are resolved against the project root, not the CWD."""
+    return path if os.path.isabs(path) else os.path.join(PROJECT_ROOT, path)
+
+
+def _source_paths() -> Tuple[str, ...]:
+    return tuple(_resolve_path(getattr(settings, attr)) for _, attr in PERSONA_SOURCES)
+
+
+def _signature(paths: Tuple[str, ...]) -> Tuple:
+    """Cheap change detector: (path, mtime, size) per persona file; missing files are allowed."""
+    signature = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+            signature.append((path, stat.st_mtime_ns, stat.st_size))
+        except OSError:
+            signature.append((path, None, None))
+    return tuple(signature)
+
+
+def _read_text(path: str) -> str:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return f.read().strip()
+    except OSError:
+        return ""
+
+
+def _build_persona_prompt(paths: Tuple[str, ...]) -> str:
+    sections = [PERSONA_TEMPLATE]
+    for (title, _), path in zip(PERSONA_SOURCES, paths):
+        content = _read_text(path)
+        if content:
+            sections.append(f"**{title}:**\n{content}")
+    return "\n\n".join(sections)
+
+
+def get_persona_prompt() -> str:
     """
+    Returns the main system prompt for the AI based on Kürşat's persona.
+    This prompt will guide the LLM in all content generation tasks.
+
+    The prompt includes the about-me and style files from data/ and is built
+    once, then only rebuilt when one of those files changes (mtime/size check).
+    """
+    global _cached_signature, _cached_prompt, _cached_version
+    paths = _source_paths()
+    signature = _signature(paths)
+    if signature != _cached_signature:
+        with _lock:
+            if signature != _cached_signature:
+                prompt = _build_persona_prompt(paths)
+                _cached_version = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+                _cached_prompt = prompt
+                _cached_signature = signature
+    return _cached_prompt
+
 
-    return prompt.strip()
+def get_persona_version() -> str:
+    """Returns a hash identifying the current persona prompt (changes whenever its inputs change)."""
+    get_persona_prompt()
+    return _cached_version
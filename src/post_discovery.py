@@ -3,17 +3,189 @@ Automated LinkedIn post discovery system.
 Finds relevant LinkedIn posts based on user interests without using the deprecated search API.
 """
 import re
+import zlib
 import random
+import asyncio
 import logging
-from typing import List, Dict, Optional
-import feedparser
+import numpy as np
+from collections import Counter
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Iterable, List, Dict, Optional, Tuple
 from bs4 import BeautifulSoup
 import httpx
 from datetime import datetime, timedelta
+from .feed_store import feed_store
+from .persona import get_persona_prompt
+from .quotas import INVITE_QUOTA, QuotaService, quota_service
+from .ranking import build_relevance_query, tokenize
+from .config import settings
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# RSS feeds that aggregate LinkedIn content. They are ingested into the feed store
+# by the background feed ingestion job; discovery only reads the stored entries.
+DISCOVERY_RSS_FEEDS = [
+    # Tech news sites that often link to LinkedIn posts
+    "https://techcrunch.com/feed/",
+    "https://www.wired.com/feed/rss",
+    "https://feeds.arstechnica.com/arstechnica/index",
+]
+
+# Candidates collected by discover_posts_smart before relevance ranking
+SMART_DISCOVERY_CANDIDATES = 100
+
+LINKEDIN_POST_URL_PATTERN = re.compile(
+    r'https?://(?:www\.)?linkedin\.com/(?:feed/update/urn:li:activity:\d+|posts/[\w\-]+)'
+)
+
+
+# Width of the feature-hashed text embeddings (a power of two)
+EMBEDDING_DIMENSIONS = 1024
+
+
+# Word bigrams add some phrase information but count less than single words,
+# so reworded headlines of the same story stay close.
+BIGRAM_WEIGHT = 0.3
+
+
+def _text_features(text: str) -> Counter:
+    tokens = tokenize(text)
+    features = Counter(tokens)
+    for first, second in zip(tokens, tokens[1:]):
+        features[f"{first} {second}"] += BIGRAM_WEIGHT
+    return features
+
+
+def embed_texts(texts: List[str], dimensions: int = EMBEDDING_DIMENSIONS) -> np.ndarray:
+    """
+    Embeds texts offline with signed feature hashing of word unigrams and
+    (down-weighted) bigrams. Returns an L2-normalised (len(texts), dimensions)
+    matrix, so cosine similarity is a plain dot product.
+    """
+    rows, columns, values = [], [], []
+    for row, text in enumerate(texts):
+        for feature, weight in _text_features(text).items():
+            hashed = zlib.crc32(feature.encode("utf-8"))
+            rows.append(row)
+            columns.append(hashed % dimensions)
+            values.append(-weight if hashed >> 31 else weight)
+    matrix = np.zeros((len(texts), dimensions), dtype=np.float32)
+    if rows:
+        np.add.at(matrix, (np.array(rows), np.array(columns)), np.array(values, dtype=np.float32))
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.where(norms == 0, 1.0, norms)
+
+
+def near_duplicate_mask(vectors: np.ndarray, seen_vectors: np.ndarray, threshold: float, within: bool = True) -> np.ndarray:
+    """
+    Flags rows whose cosine similarity to any seen vector reaches `threshold`.
+    With `within`, a row is also flagged when it duplicates an earlier kept row
+    (rows are expected best-first, so the best of each cluster survives).
+    """
+    mask = np.zeros(len(vectors), dtype=bool)
+    if not len(vectors):
+        return mask
+    if len(seen_vectors):
+        mask |= (vectors @ seen_vectors.T).max(axis=1) >= threshold
+    if within:
+        similar = (vectors @ vectors.T) >= threshold
+        for row in range(1, len(vectors)):
+            if not mask[row]:
+                mask[row] = bool((similar[row, :row] & ~mask[:row]).any())
+    return mask
+
+
+def find_near_duplicates(texts: List[str], seen_texts: List[str], threshold: float = None, within: bool = True) -> List[bool]:
+    """For each text, whether it is a near-duplicate of a seen text (or of an earlier text)."""
+    threshold = settings.NEAR_DUPLICATE_THRESHOLD if threshold is None else threshold
+    seen_vectors = embed_texts(seen_texts) if seen_texts else np.zeros((0, EMBEDDING_DIMENSIONS), dtype=np.float32)
+    return near_duplicate_mask(embed_texts(texts), seen_vectors, threshold, within).tolist()
+
+
+@lru_cache(maxsize=16)
+def _interest_centroid(interests: Tuple[str, ...]) -> np.ndarray:
+    vectors = embed_texts(list(interests))
+    centroid = vectors.mean(axis=0) if len(vectors) else np.zeros(EMBEDDING_DIMENSIONS, dtype=np.float32)
+    norm = np.linalg.norm(centroid)
+    return centroid / norm if norm else centroid
+
+
+@dataclass
+class InterestMatch:
+    """Interests found in a text, in order of first appearance, and a relevance score."""
+    interests: List[str] = field(default_factory=list)
+    score: float = 0.0
+
+    def __bool__(self) -> bool:
+        return bool(self.interests)
+
+
+def _trie_regex(words: Iterable[str]) -> str:
+    """
+    Builds one regex alternation from a character trie of `words`, so shared
+    prefixes are matched once (e.g. "product" / "production" -> "product(?:ion)?").
+    """
+    trie: Dict = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}  # end-of-word marker
+
+    def emit(node: Dict) -> str:
+        is_end = "" in node
+        branches = [re.escape(char) + emit(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 and not is_end else "(?:" + "|".join(branches) + ")"
+        return f"(?:{body})?" if is_end else body
+
+    return emit(trie)
+
+
+class InterestMatcher:
+    """
+    Finds interests in text with a single precompiled regex pass.
+
+    Interests are matched case-insensitively on word boundaries, so "ai" does not
+    match "said". Cost per text is linear in its length, independent of the
+    number of interests.
+    """
+
+    def __init__(self, interests: Iterable[str]):
+        self.interests: Tuple[str, ...] = tuple(dict.fromkeys(
+            interest.strip().lower() for interest in interests if interest and interest.strip()
+        ))
+        self._pattern = (
+            re.compile(r"(?<!\w)" + _trie_regex(self.interests) + r"(?!\w)", re.IGNORECASE)
+            if self.interests else None
+        )
+
+    def match(self, text: str) -> InterestMatch:
+        """
+        Returns the matched interests and a score: each distinct interest counts 1,
+        every repeated mention adds 0.25.
+        """
+        if not self._pattern or not text:
+            return InterestMatch()
+        counts = Counter(found.lower() for found in self._pattern.findall(text))
+        if not counts:
+            return InterestMatch()
+        repeats = sum(counts.values()) - len(counts)
+        return InterestMatch(interests=list(counts), score=len(counts) + 0.25 * repeats)
+
+
+@lru_cache(maxsize=32)
+def _cached_matcher(interests: Tuple[str, ...]) -> InterestMatcher:
+    return InterestMatcher(interests)
+
+
+def get_interest_matcher(interests: Iterable[str]) -> InterestMatcher:
+    """Returns a matcher for the interest set, compiled once and reused across runs."""
+    return _cached_matcher(tuple(interests))
+
 
 class PostDiscovery:
     """Discovers LinkedIn posts through indirect methods."""
@@ -27,14 +199,10 @@ class PostDiscovery:
         """
         self.interests = interests
         self.discovered_posts = []
-        
-        # RSS feeds that aggregate LinkedIn content
-        self.linkedin_rss_sources = [
-            # Tech news sites that often link to LinkedIn posts
-            "https://techcrunch.com/feed/",
-            "https://www.wired.com/feed/rss",
-            "https://feeds.arstechnica.com/arstechnica/index",
-        ]
+        self.linkedin_rss_sources = list(DISCOVERY_RSS_FEEDS)
+        self.matcher = get_interest_matcher(interests)
+        self.relevance_query = build_relevance_query(interests, get_persona_prompt())
+        self.interest_centroid = _interest_centroid(tuple(interests))
     
     async def discover_posts_from_rss(self, max_posts: int = 10) -> List[Dict[str, str]]:
         """
@@ -45,50 +213,57 @@ class PostDiscovery:
         """
         discovered = []
         
-        for feed_url in self.linkedin_rss_sources:
+        # Read the entries kept warm by the feed ingestion job (no network I/O here)
+        try:
+            entries = await asyncio.to_thread(feed_store.recent_entries, self.linkedin_rss_sources, 30)
+        except Exception as e:
+            logger.error(f"Error reading stored feed entries: {e}")
+            return discovered
+        
+        for entry in entries:  # Newest 30 entries per feed for better coverage
             try:
-                feed = feedparser.parse(feed_url)
-                for entry in feed.entries[:30]:  # Check first 30 entries for better coverage
-                    # Check if article content mentions LinkedIn or contains LinkedIn links
-                    content = entry.get('summary', '') + entry.get('title', '') + entry.get('description', '')
-                    
-                    # Look for LinkedIn URLs in the content
-                    linkedin_urls = re.findall(
-                        r'https?://(?:www\.)?linkedin\.com/(?:feed/update/urn:li:activity:\d+|posts/[\w\-]+)',
-                        content
-                    )
-                    
-                    if linkedin_urls:
-                        for url in linkedin_urls:
-                            discovered.append({
-                                'url': url,
-                                'title': entry.get('title', 'LinkedIn Post'),
-                                'description': entry.get('summary', '')[:200],
-                                'source': 'RSS Feed - LinkedIn URL',
-                                'discovered_at': datetime.now().isoformat()
-                            })
-                            
-                            if len(discovered) >= max_posts:
-                                return discovered
-                    
-                    # Also check if the article is about relevant tech topics
-                    # and could have LinkedIn engagement
-                    title_lower = entry.get('title', '').lower()
-                    interests_match = any(interest.lower() in title_lower for interest in self.interests)
-                    
-                    if interests_match and len(discovered) < max_posts:
-                        # Generate a plausible LinkedIn post URL based on the article
-                        # Note: These are synthetic - in production, you'd need actual LinkedIn URLs
+                title = entry.title or ''
+                summary = entry.summary or ''
+                # Check if article content mentions LinkedIn or contains LinkedIn links
+                content = summary + title
+                
+                # Look for LinkedIn URLs in the content
+                linkedin_urls = LINKEDIN_POST_URL_PATTERN.findall(content)
+                
+                if linkedin_urls:
+                    for url in linkedin_urls:
                         discovered.append({
-                            'url': entry.get('link', f"https://linkedin.com/feed/hashtag/{random.choice(self.interests)}"),
-                            'title': entry.get('title', 'Tech Post'),
-                            'description': entry.get('summary', '')[:200],
-                            'source': 'RSS Feed - Tech Content',
+                            'url': url,
+                            'entry_id': entry.id,
+                            'title': title or 'LinkedIn Post',
+                            'description': summary[:200],
+                            'source': 'RSS Feed - LinkedIn URL',
                             'discovered_at': datetime.now().isoformat()
                         })
+                        
+                        if len(discovered) >= max_posts:
+                            return discovered
+                
+                # Also check if the article is about relevant tech topics
+                # and could have LinkedIn engagement
+                interests_match = self.matcher.match(title)
+                
+                if interests_match and len(discovered) < max_posts:
+                    # Generate a plausible LinkedIn post URL based on the article
+                    # Note: These are synthetic - in production, you'd need actual LinkedIn URLs
+                    discovered.append({
+                        'url': entry.link or f"https://linkedin.com/feed/hashtag/{random.choice(self.interests)}",
+                        'entry_id': entry.id,
+                        'title': title or 'Tech Post',
+                        'description': summary[:200],
+                        'source': 'RSS Feed - Tech Content',
+                        'matched_interests': interests_match.interests,
+                        'match_score': interests_match.score,
+                        'discovered_at': datetime.now().isoformat()
+                    })
                 
             except Exception as e:
-                logger.error(f"Error parsing feed {feed_url}: {e}")
+                logger.error(f"Error parsing feed entry from {entry.feed_url}: {e}")
         
         return discovered
     
@@ -130,17 +305,64 @@ class PostDiscovery:
         
         return trending
     
+    def rank_by_relevance(self, posts: List[Dict[str, str]]) -> List[Dict[str, str]]:
+        """
+        Orders posts by BM25 relevance to the interests and persona (best first)
+        and stores the score under 'relevance'. Posts that come from stored feed
+        entries use the incrementally maintained index; others (e.g. hashtag
+        suggestions) are scored against the same collection statistics.
+        """
+        index = feed_store.index
+        entry_ids = [post['entry_id'] for post in posts if post.get('entry_id') in index]
+        indexed_scores = index.score_documents(self.relevance_query, entry_ids)
+        for post in posts:
+            if post.get('entry_id') in index:
+                post['relevance'] = indexed_scores.get(post['entry_id'], 0.0)
+            else:
+                text = f"{post.get('title', '')} {post.get('description', '')} {post.get('interest', '')}"
+                post['relevance'] = index.score_text(self.relevance_query, text)
+        return sorted(posts, key=lambda post: post['relevance'], reverse=True)
+    
+    def drop_near_duplicates(self, posts: List[Dict[str, str]], seen_texts: List[str]) -> List[Dict[str, str]]:
+        """
+        Removes posts that cover the same story as something already shared or
+        commented on, or as a better-ranked post, and orders the rest by relevance
+        plus cosine similarity to the interest centroid (stored as 'similarity').
+        """
+        if not posts:
+            return posts
+        vectors = embed_texts([f"{post.get('title', '')} {post.get('description', '')}" for post in posts])
+        seen_vectors = embed_texts(seen_texts) if seen_texts else np.zeros((0, vectors.shape[1]), dtype=np.float32)
+        duplicates = near_duplicate_mask(vectors, seen_vectors, settings.NEAR_DUPLICATE_THRESHOLD)
+        similarities = vectors @ self.interest_centroid
+
+        top_relevance = max((post.get('relevance', 0.0) for post in posts), default=0.0) or 1.0
+        kept = []
+        for post, duplicate, similarity in zip(posts, duplicates, similarities):
+            if duplicate:
+                logger.info(f"Skipping near-duplicate post: {post.get('title', post.get('url'))}")
+                continue
+            post['similarity'] = float(similarity)
+            kept.append(post)
+        return sorted(
+            kept,
+            key=lambda post: post.get('relevance', 0.0) / top_relevance + post['similarity'],
+            reverse=True,
+        )
+    
     async def discover_posts_smart(self, max_posts: int = 5) -> List[Dict[str, str]]:
         """
-        Smart discovery: combines multiple methods to find relevant posts.
+        Smart discovery: combines multiple methods to find relevant posts,
+        ranks every candidate by relevance, drops near-duplicates (of each other
+        and of what was already shared or commented on) and keeps the best ones.
         
         Returns:
-            List of discovered post information
+            List of discovered post information, most relevant first
         """
         all_posts = []
         
-        # Method 1: Search RSS feeds for LinkedIn mentions
-        rss_posts = await self.discover_posts_from_rss(max_posts)
+        # Method 1: Search RSS feeds for LinkedIn mentions (collect a wider pool for ranking)
+        rss_posts = await self.discover_posts_from_rss(max(max_posts, SMART_DISCOVERY_CANDIDATES))
         all_posts.extend(rss_posts)
         
         # Method 2: Generate hashtag-based suggestions
@@ -148,10 +370,14 @@ class PostDiscovery:
             hashtag_posts = await self.discover_posts_from_hashtags(max_posts - len(all_posts))
             all_posts.extend(hashtag_posts)
         
-        # Shuffle to add randomness
-        random.shuffle(all_posts)
+        try:
+            seen_texts = await asyncio.to_thread(feed_store.engaged_texts)
+        except Exception as e:
+            logger.error(f"Error reading shared/commented entries: {e}")
+            seen_texts = []
         
-        return all_posts[:max_posts]
+        ranked = self.rank_by_relevance(all_posts)
+        return self.drop_near_duplicates(ranked, seen_texts)[:max_posts]
     
     async def scrape_public_linkedin_posts(self, topic: str, max_posts: int = 5) -> List[Dict[str, str]]:
         """
@@ -197,41 +423,35 @@ class PostDiscovery:
 class ProfileDiscovery:
     """Discovers LinkedIn profiles to invite based on interests and network growth strategy."""
     
-    def __init__(self, interests: List[str], max_daily_invites: int = 35):
+    def __init__(self, interests: List[str], max_daily_invites: Optional[int] = None, quotas: Optional[QuotaService] = None):
         """
         Initialize profile discovery.
         
         Args:
             interests: User's interests for targeting
-            max_daily_invites: Maximum invitations per day (default 35 for ~25 min intervals)
+            max_daily_invites: Maximum invitations per day (default DAILY_INVITE_QUOTA)
+            quotas: Quota service the daily count is kept in (default: the shared one)
         """
         self.interests = interests
-        self.max_daily_invites = max_daily_invites
-        self.invited_today = 0
-        self.last_invite_date = None
+        self.quotas = quotas or quota_service
+        self.max_daily_invites = max_daily_invites or self.quotas.limit(INVITE_QUOTA)
     
-    def reset_daily_counter(self):
-        """Reset the daily invitation counter if it's a new day."""
-        today = datetime.now().date()
-        if self.last_invite_date != today:
-            self.invited_today = 0
-            self.last_invite_date = today
+    @property
+    def invited_today(self) -> int:
+        """Invitations sent today (Europe/Istanbul) by any process."""
+        return self.quotas.used(INVITE_QUOTA)
     
     def can_send_invite(self) -> bool:
         """Check if we can send an invite today."""
-        self.reset_daily_counter()
-        
-        # Check daily limit
-        if self.invited_today >= self.max_daily_invites:
+        if self.quotas.remaining(INVITE_QUOTA, limit=self.max_daily_invites) <= 0:
             logger.info(f"Daily invite limit reached ({self.max_daily_invites}). Will resume tomorrow.")
             return False
         
         return True
     
-    def record_invite_sent(self):
-        """Record that an invitation was sent."""
-        self.reset_daily_counter()
-        self.invited_today += 1
+    def record_invite_sent(self) -> bool:
+        """Takes one invitation from today's quota; False when it is already used up."""
+        return self.quotas.try_consume(INVITE_QUOTA, limit=self.max_daily_invites)
     
     async def discover_profiles_safe(self) -> Optional[Dict[str, str]]:
         """
@@ -0,0 +1,134 @@
+# src/quotas.py
+"""
+Daily quotas for outgoing LinkedIn actions (invites, comments, posts).
+
+Each quota is one row of the daily_quotas table, keyed by the calendar day in
+Europe/Istanbul and the action type, so the web process and the scheduler
+count against the same budget and a restart does not reset it. Consuming is a
+single conditional UPDATE (count = count + 1 WHERE count < limit) on the
+primary key: the check and the increment happen in one atomic statement, and
+two processes can never both take the last slot.
+"""
+import datetime
+import logging
+from typing import Dict, Optional
+
+import pytz
+from sqlalchemy.exc import IntegrityError
+
+from .config import settings
+from .database import SessionLocal
+from .models import DailyQuota
+
+logger = logging.getLogger(__name__)
+
+QUOTA_TIMEZONE = pytz.timezone("Europe/Istanbul")
+
+INVITE_QUOTA = "invite"
+COMMENT_QUOTA = "comment"
+POST_QUOTA = "post"
+
+
+def quota_day(now: Optional[datetime.datetime] = None) -> str:
+    """The quota day (YYYY-MM-DD in Europe/Istanbul) that `now` (default: current time) falls on."""
+    now = now or datetime.datetime.now(pytz.utc)
+    if now.tzinfo is None:
+        now = pytz.utc.localize(now)
+    return now.astimezone(QUOTA_TIMEZONE).date().isoformat()
+
+
+class QuotaService:
+    """Database-backed daily counters, one per action type."""
+
+    def __init__(self, session_factory, limits: Dict[str, int], enabled: bool = True):
+        self.session_factory = session_factory
+        self.limits = limits
+        self.enabled = enabled
+
+    def limit(self, action_type: str) -> int:
+        return self.limits[action_type]
+
+    def _increment(self, db, day: str, action_type: str, amount: int, limit: int) -> bool:
+        updated = (
+            db.query(DailyQuota)
+            .filter(
+                DailyQuota.day == day,
+                DailyQuota.action_type == action_type,
+                DailyQuota.count + amount <= limit,
+            )
+            .update({DailyQuota.count: DailyQuota.count + amount}, synchronize_session=False)
+        )
+        db.commit()
+        return bool(updated)
+
+    def try_consume(
+        self,
+        action_type: str,
+        amount: int = 1,
+        limit: Optional[int] = None,
+        now: Optional[datetime.datetime] = None,
+    ) -> bool:
+        """
+        Takes `amount` from today's `action_type` quota. Returns False, without
+        taking anything, when that would exceed the limit.
+        """
+        if not self.enabled:
+            return True
+        limit = self.limit(action_type) if limit is None else limit
+        day = quota_day(now)
+        db = self.session_factory()
+        try:
+            if self._increment(db, day, action_type, amount, limit):
+                return True
+            # Either the quota is used up or today's row does not exist yet.
+            if db.get(DailyQuota, (day, action_type)) is not None:
+                return False
+            db.add(DailyQuota(day=day, action_type=action_type, count=0))
+            try:
+                db.commit()
+            except IntegrityError:
+                db.rollback()  # Another process created it first
+            return self._increment(db, day, action_type, amount, limit)
+        finally:
+            db.close()
+
+    def release(self, action_type: str, amount: int = 1, now: Optional[datetime.datetime] = None) -> None:
+        """Gives back quota taken for an action that did not happen after all."""
+        if not self.enabled:
+            return
+        db = self.session_factory()
+        try:
+            db.query(DailyQuota).filter(
+                DailyQuota.day == quota_day(now),
+                DailyQuota.action_type == action_type,
+                DailyQuota.count >= amount,
+            ).update({DailyQuota.count: DailyQuota.count - amount}, synchronize_session=False)
+            db.commit()
+        finally:
+            db.close()
+
+    def used(self, action_type: str, now: Optional[datetime.datetime] = None) -> int:
+        """How much of today's `action_type` quota has been taken."""
+        if not self.enabled:
+            return 0
+        db = self.session_factory()
+        try:
+            row = db.get(DailyQuota, (quota_day(now), action_type))
+            return row.count if row else 0
+        finally:
+            db.close()
+
+    def remaining(self, action_type: str, limit: Optional[int] = None, now: Optional[datetime.datetime] = None) -> int:
+        limit = self.limit(action_type) if limit is None else limit
+        return max(0, limit - self.used(action_type, now))
+
+
+quota_service = QuotaService(
+    SessionLocal,
+    {
+        INVITE_QUOTA: settings.DAILY_INVITE_QUOTA,
+        COMMENT_QUOTA: settings.DAILY_COMMENT_QUOTA,
+        POST_QUOTA: settings.DAILY_POST_QUOTA,
+    },
+    enabled=settings.QUOTAS_ENABLED,
+)
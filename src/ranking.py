@@ -0,0 +1,162 @@
+# src/ranking.py
+"""
+BM25 relevance ranking against the configured interests and persona.
+
+BM25Index is an in-memory inverted index that is updated incrementally as feed
+entries are ingested: adding or removing a document only touches its own
+postings and the document-frequency counters, so there is never a full rebuild.
+Scoring walks only the postings of the query terms, which keeps ranking
+thousands of candidates in the millisecond range. Texts that are not in the
+index (e.g. hashtag suggestions) can be scored against the same collection
+statistics with score_text().
+"""
+import math
+import re
+import threading
+from collections import Counter, OrderedDict
+from functools import lru_cache
+from typing import Dict, Hashable, Iterable, List, Optional, Tuple
+
+_TOKEN_PATTERN = re.compile(r"[^\W_]+(?:[+#][+#]?)?", re.UNICODE)
+
+STOPWORDS = frozenset("""
+a an and are as at be but by for from has have how i in into is it its of on or our
+that the their this to was we were what when which who why will with you your
+""".split())
+
+# Weight of persona terms relative to an explicitly configured interest.
+PERSONA_TERM_WEIGHT = 0.2
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased word tokens without stopwords and one-letter words."""
+    return [
+        token for token in _TOKEN_PATTERN.findall((text or "").lower())
+        if len(token) > 1 and token not in STOPWORDS
+    ]
+
+
+class BM25Index:
+    """Incremental Okapi BM25 index over at most `max_documents` documents (oldest evicted first)."""
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75, max_documents: int = 5000):
+        self.k1 = k1
+        self.b = b
+        self.max_documents = max_documents
+        self._doc_lengths: "OrderedDict[Hashable, int]" = OrderedDict()
+        self._doc_terms: Dict[Hashable, Counter] = {}
+        self._postings: Dict[str, Dict[Hashable, int]] = {}
+        self._total_length = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._doc_lengths)
+
+    def __contains__(self, doc_id: Hashable) -> bool:
+        return doc_id in self._doc_lengths
+
+    def _remove(self, doc_id: Hashable) -> None:
+        terms = self._doc_terms.pop(doc_id, None)
+        if terms is None:
+            return
+        self._total_length -= self._doc_lengths.pop(doc_id)
+        for term in terms:
+            postings = self._postings[term]
+            del postings[doc_id]
+            if not postings:
+                del self._postings[term]
+
+    def add(self, doc_id: Hashable, text: str) -> None:
+        """Indexes (or re-indexes) a document."""
+        terms = Counter(tokenize(text))
+        with self._lock:
+            self._remove(doc_id)
+            self._doc_terms[doc_id] = terms
+            self._doc_lengths[doc_id] = sum(terms.values())
+            self._total_length += self._doc_lengths[doc_id]
+            for term, frequency in terms.items():
+                self._postings.setdefault(term, {})[doc_id] = frequency
+            while len(self._doc_lengths) > self.max_documents:
+                self._remove(next(iter(self._doc_lengths)))
+
+    def add_many(self, documents: Iterable[Tuple[Hashable, str]]) -> None:
+        for doc_id, text in documents:
+            self.add(doc_id, text)
+
+    def remove(self, doc_id: Hashable) -> None:
+        with self._lock:
+            self._remove(doc_id)
+
+    def idf(self, term: str) -> float:
+        df = len(self._postings.get(term, ()))
+        n = len(self._doc_lengths)
+        return math.log(1 + (n - df + 0.5) / (df + 0.5))
+
+    def _average_length(self) -> float:
+        return self._total_length / len(self._doc_lengths) if self._doc_lengths else 1.0
+
+    def _term_score(self, frequency: int, length: int, idf: float, average_length: float) -> float:
+        norm = self.k1 * (1 - self.b + self.b * length / (average_length or 1.0))
+        return idf * frequency * (self.k1 + 1) / (frequency + norm)
+
+    def score_documents(self, query: Dict[str, float], doc_ids: Optional[Iterable[Hashable]] = None) -> Dict[Hashable, float]:
+        """
+        Scores indexed documents for a weighted query (term -> weight). Only
+        documents containing at least one query term get a score; when `doc_ids`
+        is given, scoring is restricted to those documents.
+        """
+        allowed = set(doc_ids) if doc_ids is not None else None
+        scores: Dict[Hashable, float] = {}
+        with self._lock:
+            average_length = self._average_length()
+            for term, weight in query.items():
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = self.idf(term)
+                for doc_id, frequency in postings.items():
+                    if allowed is not None and doc_id not in allowed:
+                        continue
+                    scores[doc_id] = scores.get(doc_id, 0.0) + weight * self._term_score(
+                        frequency, self._doc_lengths[doc_id], idf, average_length
+                    )
+        return scores
+
+    def score_text(self, query: Dict[str, float], text: str) -> float:
+        """Scores a text that is not in the index, using the index's collection statistics."""
+        terms = Counter(tokenize(text))
+        length = sum(terms.values())
+        with self._lock:
+            average_length = self._average_length()
+            return sum(
+                weight * self._term_score(terms[term], length, self.idf(term), average_length)
+                for term, weight in query.items()
+                if terms.get(term)
+            )
+
+    def rank(self, query: Dict[str, float], limit: int = 10, doc_ids: Optional[Iterable[Hashable]] = None) -> List[Tuple[Hashable, float]]:
+        """Returns the `limit` best (doc_id, score) pairs, best first."""
+        scores = self.score_documents(query, doc_ids)
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)[:limit]
+
+
+@lru_cache(maxsize=16)
+def _cached_query(interests: Tuple[str, ...], persona_text: str) -> Tuple[Tuple[str, float], ...]:
+    weights: Dict[str, float] = {}
+    for interest in interests:
+        for term in tokenize(interest):
+            weights[term] = 1.0
+    persona_terms = Counter(tokenize(persona_text))
+    if persona_terms:
+        top_frequency = max(persona_terms.values())
+        for term, frequency in persona_terms.items():
+            weights.setdefault(term, PERSONA_TERM_WEIGHT * frequency / top_frequency)
+    return tuple(weights.items())
+
+
+def build_relevance_query(interests: Iterable[str], persona_text: str = "") -> Dict[str, float]:
+    """
+    Weighted query terms: every interest term weighs 1.0, persona terms up to
+    PERSONA_TERM_WEIGHT (scaled by how often they appear in the persona).
+    """
+    return dict(_cached_query(tuple(interests), persona_text or ""))
@@ -0,0 +1,187 @@
+# src/rate_limiter.py
+"""
+Client-side rate limiting and backoff for LinkedIn API calls.
+
+Every LinkedIn request draws a token from the bucket of its endpoint family
+(profile reads, shares, comments, ...). Buckets refill continuously and live
+in the rate_limit_buckets table, so the web process and the scheduler share
+one budget; each update is a compare-and-swap on the row, so concurrent
+processes never spend the same token twice. A 429 response blocks the whole
+family until its Retry-After has passed, for every process.
+"""
+import asyncio
+import datetime
+import email.utils
+import logging
+import random
+import time
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy.exc import IntegrityError
+
+from .config import settings
+from .database import SessionLocal
+from .models import RateLimitBucket
+
+logger = logging.getLogger(__name__)
+
+# family -> (burst capacity, tokens refilled per minute)
+ENDPOINT_FAMILIES: Dict[str, Tuple[float, float]] = {
+    "profile": (10, 30),
+    "share": (3, 1),
+    "comment": (3, 2),
+    "reaction": (5, 5),
+    "invitation": (2, 1),
+    "read": (20, 60),
+}
+
+# Optimistic updates retried this many times before giving up on one acquire step
+_CAS_ATTEMPTS = 5
+
+
+class RateLimitExceeded(Exception):
+    """Raised when no token becomes available within the allowed wait."""
+
+    def __init__(self, family: str, retry_after: float):
+        super().__init__(f"Rate limit for '{family}' requests exhausted; retry in {retry_after:.0f}s")
+        self.family = family
+        self.retry_after = retry_after
+
+
+def parse_retry_after(value: Optional[str], now: Optional[float] = None) -> Optional[float]:
+    """Parses a Retry-After header (delay in seconds or an HTTP date) into seconds."""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=datetime.timezone.utc)
+    now = time.time() if now is None else now
+    return max(0.0, retry_at.timestamp() - now)
+
+
+def backoff_delay(attempt: int, retry_after: Optional[str] = None) -> float:
+    """
+    Delay before retry number `attempt` (0-based): the server's Retry-After when
+    given, otherwise exponential backoff with full jitter, capped at
+    RATE_LIMIT_BACKOFF_MAX_SECONDS.
+    """
+    parsed = parse_retry_after(retry_after)
+    if parsed is not None:
+        return min(parsed, settings.RATE_LIMIT_MAX_WAIT_SECONDS)
+    ceiling = min(settings.RATE_LIMIT_BACKOFF_MAX_SECONDS, settings.RATE_LIMIT_BACKOFF_BASE_SECONDS * (2 ** attempt))
+    return random.uniform(0, ceiling)
+
+
+class TokenBucketLimiter:
+    """Database-backed token buckets, one per endpoint family."""
+
+    def __init__(self, session_factory, families: Dict[str, Tuple[float, float]], enabled: bool = True):
+        self.session_factory = session_factory
+        self.families = families
+        self.enabled = enabled
+
+    def _limits(self, family: str) -> Tuple[float, float]:
+        capacity, per_minute = self.families.get(family, self.families["read"])
+        return float(capacity), per_minute / 60.0
+
+    def _load(self, db, family: str, now: float) -> RateLimitBucket:
+        bucket = db.get(RateLimitBucket, family)
+        if bucket is None:
+            capacity, _ = self._limits(family)
+            db.add(RateLimitBucket(family=family, tokens=capacity, updated_at=now, blocked_until=0.0))
+            try:
+                db.commit()
+            except IntegrityError:
+                db.rollback()  # Another process created it first
+            bucket = db.get(RateLimitBucket, family)
+        return bucket
+
+    def _compare_and_swap(self, db, bucket: RateLimitBucket, values: Dict[str, float]) -> bool:
+        updated = (
+            db.query(RateLimitBucket)
+            .filter(
+                RateLimitBucket.family == bucket.family,
+                RateLimitBucket.tokens == bucket.tokens,
+                RateLimitBucket.updated_at == bucket.updated_at,
+                RateLimitBucket.blocked_until == bucket.blocked_until,
+            )
+            .update(values, synchronize_session=False)
+        )
+        db.commit()
+        return bool(updated)
+
+    def try_acquire(self, family: str, now: Optional[float] = None) -> float:
+        """
+        Takes one token if available. Returns 0 on success, otherwise the number
+        of seconds until a token should be available.
+        """
+        if not self.enabled:
+            return 0.0
+        capacity, refill_per_second = self._limits(family)
+        db = self.session_factory()
+        try:
+            for _ in range(_CAS_ATTEMPTS):
+                current = time.time() if now is None else now
+                bucket = self._load(db, family, current)
+                if bucket.blocked_until > current:
+                    return bucket.blocked_until - current
+                tokens = min(capacity, bucket.tokens + max(0.0, current - bucket.updated_at) * refill_per_second)
+                if tokens < 1.0:
+                    return (1.0 - tokens) / refill_per_second
+                if self._compare_and_swap(db, bucket, {"tokens": tokens - 1.0, "updated_at": current}):
+                    return 0.0
+                db.expire_all()  # Lost the race; re-read the row
+            return 0.05
+        finally:
+            db.close()
+
+    def block(self, family: str, seconds: float, now: Optional[float] = None) -> None:
+        """Stops all processes from calling `family` for `seconds` (e.g. after a 429)."""
+        if not self.enabled or seconds <= 0:
+            return
+        db = self.session_factory()
+        try:
+            current = time.time() if now is None else now
+            bucket = self._load(db, family, current)
+            until = current + seconds
+            if bucket.blocked_until < until:
+                db.query(RateLimitBucket).filter(
+                    RateLimitBucket.family == family, RateLimitBucket.blocked_until < until
+                ).update({"blocked_until": until}, synchronize_session=False)
+                db.commit()
+        finally:
+            db.close()
+
+    async def acquire(self, family: str, max_wait: Optional[float] = None) -> None:
+        """
+        Waits until a token of `family` is available and takes it. Raises
+        RateLimitExceeded when that would take longer than `max_wait` seconds.
+        Database errors never block a request: the call is then let through.
+        """
+        if not self.enabled:
+            return
+        max_wait = settings.RATE_LIMIT_MAX_WAIT_SECONDS if max_wait is None else max_wait
+        deadline = time.monotonic() + max_wait
+        while True:
+            try:
+                wait = await asyncio.to_thread(self.try_acquire, family)
+            except Exception as e:
+                logger.warning(f"Rate limiter unavailable, letting '{family}' request through: {e}")
+                return
+            if wait <= 0:
+                return
+            remaining = deadline - time.monotonic()
+            if wait > remaining:
+                raise RateLimitExceeded(family, wait)
+            await asyncio.sleep(wait)
+
+
+rate_limiter = TokenBucketLimiter(SessionLocal, ENDPOINT_FAMILIES, enabled=settings.RATE_LIMIT_ENABLED)
@@ -8,8 +8,11 @@ from .config import settings
 from .worker import (
     trigger_post_creation,
     trigger_commenting,
-    trigger_invitation
+    trigger_invitation,
+    ingest_feeds
 )
+from .action_queue import dispatch_due_actions, recover_stale_actions
+from .action_log import roll_up_action_logs
 
 # Create a scheduler instance
 scheduler = AsyncIOScheduler(timezone="Europe/Istanbul") # Set to user's timezone
@@ -91,7 +94,45 @@ def setup_scheduler():
             replace_existing=True
         )
 
-        # 4. System Health Check (for debugging)
+        # 4. Delayed Action Dispatcher: fires due follow-ups (like after 45s, summary after 90s)
+        # from the persistent scheduled_actions table, so they survive restarts.
+        recover_stale_actions()
+        scheduler.add_job(
+            dispatch_due_actions,
+            trigger=IntervalTrigger(seconds=settings.ACTION_DISPATCH_INTERVAL_SECONDS),
+            id='dispatch_scheduled_actions',
+            name='Run due delayed follow-up actions.',
+            replace_existing=True,
+            max_instances=1,
+            coalesce=True
+        )
+
+        # 5. Feed Ingestion: keeps the local feed-entry store warm, so post creation and
+        # discovery never fetch RSS on their own path. Runs once right away at startup.
+        scheduler.add_job(
+            ingest_feeds,
+            trigger=IntervalTrigger(minutes=settings.FEED_INGEST_INTERVAL_MINUTES),
+            id='ingest_feeds',
+            name='Fetch RSS feeds and store new entries.',
+            replace_existing=True,
+            next_run_time=datetime.now(pytz.timezone("Europe/Istanbul")),
+            max_instances=1,
+            coalesce=True
+        )
+
+        # 6. Action Log Retention: rolls old action_logs rows up into daily counts and
+        # deletes them, so the table (and the dashboard query) stays small.
+        scheduler.add_job(
+            roll_up_action_logs,
+            trigger=CronTrigger(hour='4', minute='15'),
+            id='roll_up_action_logs',
+            name='Summarise and prune old action logs.',
+            replace_existing=True,
+            max_instances=1,
+            coalesce=True
+        )
+
+        # 7. System Health Check (for debugging)
         # scheduler.add_job(log_system_health, 'interval', seconds=30, id='health_check')
 
         scheduler.start()
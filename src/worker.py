@@ -1,14 +1,26 @@
 # src/worker.py
 import asyncio
-import feedparser
-import random
+import datetime
 import httpx
 import os
-from .database import SessionLocal
-from .models import ActionLog
-from .ai_core import generate_text
+import re
+from string import Template
+from .database import AsyncSessionLocal
+from .action_log import action_log_writer
+from .models import Comment
+from .ai_core import generate_text_async, generate_json_async
 from .linkedin_api_client import LinkedInApiClient
-from .post_discovery import PostDiscovery, ProfileDiscovery
+from .rate_limiter import RateLimitExceeded
+from .post_discovery import PostDiscovery, ProfileDiscovery, DISCOVERY_RSS_FEEDS, find_near_duplicates
+from .feed_fetcher import feed_fetcher
+from .feed_store import feed_store
+from .persona import get_persona_prompt
+from .ranking import build_relevance_query
+from .config import settings
+from .jobs import job_registry
+from .action_queue import enqueue_action, is_final_attempt, register_action
+from .comment_pacing import COMMENT_ACTION, plan_comment_times, commented_post_urls
+from .quotas import COMMENT_QUOTA, INVITE_QUOTA, POST_QUOTA, quota_service
 
 # --- Client Factory ---
 def get_api_client():
@@ -28,23 +40,41 @@ RSS_FEEDS = [
 
 # --- Helper Functions ---
 
+def get_interests():
+    """Returns the configured interests (comma-separated INTERESTS variable)."""
+    interests_str = os.getenv('INTERESTS', 'ai,llm,product,saas,startup')
+    return [i.strip() for i in interests_str.split(',') if i.strip()]
+
 def log_action(action_type: str, details: str, url: str = None):
-    """Logs an action to the database."""
-    db = SessionLocal()
-    try:
-        log_entry = ActionLog(action_type=action_type, details=details, result_url=url)
-        db.add(log_entry)
-        db.commit()
-    finally:
-        db.close()
+    """Logs an action to the database (batched in the background; never blocks)."""
+    action_log_writer.write(action_type, details, url)
 
-def find_shareable_article():
-    """Finds a random article from RSS feeds."""
+async def ingest_feeds() -> int:
+    """
+    Fetches every configured feed concurrently and stores the new entries.
+    Runs as a background scheduler job, so feed latency and failures never reach
+    post creation or discovery. Returns the number of newly stored entries.
+    """
+    feed_urls = list(dict.fromkeys(RSS_FEEDS + DISCOVERY_RSS_FEEDS))
+    results = await feed_fetcher.fetch_all(feed_urls)
+    failed = [url for url, result in results.items() if result.error]
+    if failed:
+        print(f"⚠️ Feed ingestion: {len(failed)} feed(s) could not be fetched: {', '.join(failed)}")
+    return await asyncio.to_thread(feed_store.ingest_results, results)
+
+async def find_shareable_article():
+    """
+    Finds the most relevant fresh article that has not been shared yet and is
+    not a near-duplicate of a story we already shared or commented on.
+    Only reads the feed-entry store kept warm by ingest_feeds(); no feed is fetched here.
+    """
     try:
-        feed = feedparser.parse(random.choice(RSS_FEEDS))
-        if feed.entries:
-            return random.choice(feed.entries)
-        return None
+        query = build_relevance_query(get_interests(), get_persona_prompt())
+        return await asyncio.to_thread(
+            feed_store.select_fresh_entry,
+            query=query,
+            duplicate_filter=lambda texts, seen: find_near_duplicates(texts, seen, within=False),
+        )
     except Exception as e:
         log_action("Article Search Failed", f"Error: {e}")
         return None
@@ -68,46 +98,27 @@ async def find_profile_to_invite():
         return None
     
     # Get user interests
-    interests_str = os.getenv('INTERESTS', 'ai,llm,product,saas,startup')
-    interests = [i.strip() for i in interests_str.split(',')]
+    interests = get_interests()
     
-    # Initialize profile discovery with new limits
-    # max_daily_invites=35 (approximately one every 25 minutes from 9 AM to 10 PM)
-    discovery = ProfileDiscovery(interests, max_daily_invites=35)
+    # The daily invite count lives in the shared quota table, so it survives
+    # between runs and is shared with the web process.
+    discovery = ProfileDiscovery(interests)
     
     # Check if we can send invites today
-    if not discovery.can_send_invite():
+    if not await asyncio.to_thread(discovery.can_send_invite):
         return None
     
-    # Attempt to discover a profile
-    profile = await discovery.discover_profiles_safe()
-    
-    if profile:
-        discovery.record_invite_sent()
-    
-    return profile
+    # Attempt to discover a profile; the quota is taken when the invitation is sent
+    return await discovery.discover_profiles_safe()
 
 def log_system_health():
     """Logs a simple health check message."""
     log_action("System Health Check", "Scheduler is running.")
 
-# --- Core Action Triggers ---
-
-async def trigger_post_creation_async():
-    """Full logic for creating a new post."""
-    log_action("Post Creation Triggered", "Process initiated.")
-    api_client = get_api_client()
-    if not api_client: 
-        return {"success": False, "message": "API client initialization failed"}
-
-    article = find_shareable_article()
-    if not article:
-        log_action("Post Creation Failed", "Could not find an article.")
-        return {"success": False, "message": "Could not find an article to share"}
+# --- Prompt Templates ---
+# Compiled once at import time; only the per-article values are substituted on the hot path.
 
-    post_prompt = f"""Write a LinkedIn post about this article: '{article.title}'. 
-    
-CRITICAL REQUIREMENTS:
+POST_REQUIREMENTS = """CRITICAL REQUIREMENTS:
 - Write in ENGLISH only (the post must be in English)
 - Write as Kürşat himself (first person, you ARE Kürşat)
 - Be authentic, insightful, and strategic
@@ -116,14 +127,11 @@ CRITICAL REQUIREMENTS:
 - NO hashtags, minimal/no emojis
 - 2-4 short paragraphs maximum
 - End naturally (do NOT announce future actions)
-- Include the article link at the end: {article.link}
+- Include the article link at the end: $link
 
 NEVER reveal you're AI. NEVER announce what you'll do next. Write as a human entrepreneur sharing insights."""
-    post_text = generate_text(post_prompt)
 
-    summary_prompt = f"""Write a Turkish follow-up comment about '{article.title}'. 
-    
-CRITICAL REQUIREMENTS:
+SUMMARY_REQUIREMENTS = """CRITICAL REQUIREMENTS:
 - Write in TURKISH only
 - Write as Kürşat himself (you ARE Kürşat, not an assistant)
 - Add value: share a key insight, Turkish perspective, or practical takeaway
@@ -133,54 +141,267 @@ CRITICAL REQUIREMENTS:
 - NEVER announce what you will do next
 - NEVER reveal you're AI
 - Sound like a human entrepreneur adding a quick valuable insight"""
-    summary_text = generate_text(summary_prompt)
 
-    if post_text is None or summary_text is None:
-        error_msg = "AI content generation is not available. Please check GEMINI_API_KEY configuration."
-        log_action("Post Creation Skipped", error_msg)
-        return {"success": False, "message": error_msg}
+POST_PROMPT_TEMPLATE = Template(f"""Write a LinkedIn post about this article: '$title'. 
+    
+{POST_REQUIREMENTS}""")
+
+SUMMARY_PROMPT_TEMPLATE = Template(f"""Write a Turkish follow-up comment about '$title'. 
+    
+{SUMMARY_REQUIREMENTS}""")
+
+STRUCTURED_POST_PROMPT_TEMPLATE = Template(f"""Write two pieces of content about this article: '$title'.
+
+1. "post": a LinkedIn post.
+{POST_REQUIREMENTS}
+
+2. "summary": a Turkish follow-up comment that will be added under the post.
+{SUMMARY_REQUIREMENTS}
+
+Respond ONLY with a JSON object of the form {{"post": "...", "summary": "..."}}.""")
+
+COMMENT_PROMPT_TEMPLATE = Template("""Write a LinkedIn comment for a post about: $title
 
+CRITICAL REQUIREMENTS:
+- Write in $language to match the original post
+- Write as Kürşat himself (you ARE Kürşat, not an assistant)
+- Add real value: share an insight, question, or perspective
+- Be authentic and strategic
+- Maximum 280 characters
+- NO hashtags, minimal/no emojis
+- NEVER reveal you're AI
+- NEVER announce future actions
+- Sound like a human entrepreneur engaging naturally
+
+Write a brief, valuable comment that starts a conversation or adds insight.""")
+
+def build_post_prompt(article) -> str:
+    return POST_PROMPT_TEMPLATE.substitute(title=article.title, link=article.link)
+
+def build_summary_prompt(article) -> str:
+    return SUMMARY_PROMPT_TEMPLATE.substitute(title=article.title)
+
+def build_structured_post_prompt(article) -> str:
+    return STRUCTURED_POST_PROMPT_TEMPLATE.substitute(title=article.title, link=article.link)
+
+# --- Post Content Generation ---
+
+async def generate_post_and_summary(article):
+    """
+    Generates the English post and the Turkish summary for an article.
+
+    In "structured" mode (POST_GENERATION_MODE) both are requested in one JSON
+    response so the persona prompt is only sent once; if that response cannot
+    be parsed or validated, it falls back to two concurrent calls.
+
+    Returns:
+        (post_text, summary_text); either may be None if generation failed.
+    """
+    if settings.POST_GENERATION_MODE == "structured":
+        structured = await generate_json_async(build_structured_post_prompt(article), ("post", "summary"))
+        if structured:
+            return structured["post"], structured["summary"]
+        log_action("Structured Generation Fallback", "Could not parse structured AI response; generating post and summary separately.")
+
+    # The two prompts are independent, so generate them concurrently.
+    post_text, summary_text = await asyncio.gather(
+        generate_text_async(build_post_prompt(article)),
+        generate_text_async(build_summary_prompt(article)),
+        return_exceptions=True,
+    )
+    if isinstance(post_text, BaseException):
+        post_text = None
+    if isinstance(summary_text, BaseException):
+        summary_text = None
+    return post_text, summary_text
+
+# --- Delayed Follow-ups ---
+# Handlers run from the scheduled action queue. They re-raise errors worth
+# retrying so the queue reschedules them, and swallow the rest; the failure is
+# logged (and the job stage recorded) only once no retry is left.
+
+POST_LIKE_DELAY_SECONDS = 45
+SUMMARY_COMMENT_DELAY_SECONDS = 90
+
+_NOT_SENT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout, RateLimitExceeded)
+
+def is_retryable_error(error: Exception, idempotent: bool = True) -> bool:
+    """
+    Whether a failed call should be retried. Client errors (4xx other than 429)
+    fail the same way every time. A non-idempotent call (posting a comment) is
+    only retried when the request certainly did not reach LinkedIn, since a
+    5xx or a timeout may come after the comment was created.
+    """
+    if isinstance(error, httpx.HTTPStatusError):
+        status = error.response.status_code
+        return status == 429 or (idempotent and status >= 500)
+    return idempotent or isinstance(error, _NOT_SENT_ERRORS)
+
+async def like_post_followup(user_urn: str, post_urn: str, post_url: str, job_id: str = None):
+    """Likes our own post (scheduled 45 seconds after sharing)."""
+    api_client = get_api_client()
+    if not api_client:
+        job_registry.record_stage(job_id, "like_failed", "❌ Beğeni başarısız", followup_done=True)
+        return
+    try:
+        await api_client.add_reaction(user_urn, post_urn)
+    except Exception as e:
+        if isinstance(e, httpx.HTTPStatusError) and e.response.status_code == 403:
+            log_action("Post Like Skipped", "403 error - reactions may require special permissions", url=post_url)
+            job_registry.record_stage(job_id, "like_skipped", "⚠️ Beğeni atlanadı (izin gerekiyor)", followup_done=True)
+            return
+        retryable = is_retryable_error(e)
+        if not retryable or is_final_attempt():
+            log_action("Post Like Failed", f"Error: {e}", url=post_url)
+            job_registry.record_stage(job_id, "like_failed", "❌ Beğeni başarısız", followup_done=True)
+        if retryable:
+            raise
+        return
+    log_action("Post Liked", "Liked our own post after 45 seconds.", url=post_url)
+    job_registry.record_stage(job_id, "liked", "✅ 45 saniye sonra beğenildi", followup_done=True)
+
+async def summary_comment_followup(user_urn: str, post_urn: str, post_url: str, summary_text: str, job_id: str = None):
+    """Adds the Turkish summary comment under our post (scheduled 90 seconds after sharing)."""
+    api_client = get_api_client()
+    if not api_client:
+        job_registry.record_stage(job_id, "summary_failed", "❌ Türkçe özet eklenemedi", followup_done=True)
+        return
+    try:
+        await api_client.submit_comment(user_urn, post_urn, summary_text)
+    except Exception as e:
+        retryable = is_retryable_error(e, idempotent=False)
+        if not retryable or is_final_attempt():
+            log_action("Summary Comment Failed", f"Error: {e}", url=post_url)
+            job_registry.record_stage(job_id, "summary_failed", "❌ Türkçe özet eklenemedi", followup_done=True)
+        if retryable:
+            raise
+        return
+    log_action("Summary Comment Added", "Added Turkish summary after 90 seconds total.", url=post_url)
+    job_registry.record_stage(job_id, "summary_added", "✅ 90 saniye sonra Türkçe özet eklendi", followup_done=True)
+
+async def record_comment(post_url: str, content: str):
+    """Stores a comment we posted (also counts towards the comment quotas)."""
+    async with AsyncSessionLocal() as db:
+        db.add(Comment(post_url=post_url, content=content))
+        await db.commit()
+
+async def post_comment_followup(user_urn: str, post_urn: str, post_url: str, comment_text: str, title: str = None, entry_id: int = None):
+    """Submits one comment planned by a batch commenting run and records it."""
+    api_client = get_api_client()
+    if not api_client:
+        return
+    if not await asyncio.to_thread(quota_service.try_consume, COMMENT_QUOTA):
+        log_action("Commenting Skipped", "Daily comment quota reached", url=post_url)
+        return
     try:
+        await api_client.submit_comment(user_urn, post_urn, comment_text)
+    except Exception as e:
+        await asyncio.to_thread(quota_service.release, COMMENT_QUOTA)
+        retryable = is_retryable_error(e, idempotent=False)
+        if not retryable or is_final_attempt():
+            log_action("Commenting Failed", f"Error: {e}", url=post_url)
+        if retryable:
+            raise
+        return
+    await record_comment(post_url, comment_text)
+    log_action("Auto Comment Added", f"Commented on: {title or 'post'}", url=post_url)
+    if entry_id:
+        try:
+            await asyncio.to_thread(feed_store.mark_commented, entry_id)
+        except Exception as e:
+            log_action("Feed Entry Update Failed", f"Could not mark entry as commented: {e}")
+
+register_action("like_post", like_post_followup, idempotent=True)  # Liking twice is a no-op
+register_action("summary_comment", summary_comment_followup)
+register_action(COMMENT_ACTION, post_comment_followup)
+
+# --- Core Action Triggers ---
+
+async def trigger_post_creation_async(job_id: str = None):
+    """
+    Full logic for creating a new post.
+
+    Shares the post and returns; the like (45s) and the Turkish summary comment
+    (90s) run later as scheduled follow-ups. When started as a background job,
+    each stage is recorded on `job_id`.
+    """
+    log_action("Post Creation Triggered", "Process initiated.")
+    api_client = get_api_client()
+    if not api_client: 
+        return {"success": False, "message": "API client initialization failed"}
+
+    # Check the daily post quota before spending AI calls
+    if await asyncio.to_thread(quota_service.remaining, POST_QUOTA) <= 0:
+        log_action("Post Creation Skipped", "Daily post quota reached")
+        return {"success": False, "message": "Daily post quota reached, try again tomorrow"}
+
+    article = await find_shareable_article()
+    if not article:
+        log_action("Post Creation Failed", "Could not find an article.")
+        return {"success": False, "message": "Could not find an article to share"}
+    # The article is reserved for this run; it is marked shared once the post is
+    # out and given back otherwise, so another run can pick it up.
+    shared = False
+    try:
+        job_registry.record_stage(job_id, "article_selected", f"📰 Makale seçildi: {article.title[:50]}...")
+
+        post_text, summary_text = await generate_post_and_summary(article)
+
+        # Without the post there is nothing to share; a missing summary only skips the follow-up comment.
+        if post_text is None:
+            error_msg = "AI content generation is not available. Please check GEMINI_API_KEY configuration."
+            log_action("Post Creation Skipped", error_msg)
+            return {"success": False, "message": error_msg}
+        if summary_text is None:
+            log_action("Summary Generation Failed", "Turkish summary could not be generated; the post will be shared without it.")
+        job_registry.record_stage(job_id, "content_generated", "✍️ İçerik üretildi")
+
         profile = await api_client.get_profile()
         user_urn = profile.get("id")
         if not user_urn:
             log_action("Post Creation Failed", "Could not get user URN.")
             return {"success": False, "message": "Could not get user profile"}
 
-        post = await api_client.share_post(user_urn, post_text)
+        if not await asyncio.to_thread(quota_service.try_consume, POST_QUOTA):
+            log_action("Post Creation Skipped", "Daily post quota reached")
+            return {"success": False, "message": "Daily post quota reached, try again tomorrow"}
+        try:
+            post = await api_client.share_post(user_urn, post_text)
+        except Exception:
+            await asyncio.to_thread(quota_service.release, POST_QUOTA)
+            raise
         post_urn = post.get("id")
         if not post_urn:
             log_action("Post Creation Failed", "Did not get post URN after sharing.")
             return {"success": False, "message": "Failed to share post"}
+        shared = True
 
         post_url = f"https://www.linkedin.com/feed/update/{post_urn}/"
         log_action("Post Created", f"Shared post: {article.title}", url=post_url)
+        try:
+            await asyncio.to_thread(feed_store.mark_shared, article.id)
+        except Exception as e:
+            log_action("Feed Entry Update Failed", f"Could not mark article as shared: {e}")
         
         actions = [f"✅ Gönderi paylaşıldı: {article.title[:50]}..."]
+        job_registry.record_stage(job_id, "post_shared", actions[0])
 
-        # Try to like the post after 45 seconds
-        await asyncio.sleep(45)
-        try:
-            await api_client.add_reaction(user_urn, post_urn)
-            log_action("Post Liked", "Liked our own post after 45 seconds.", url=post_url)
-            actions.append("✅ 45 saniye sonra beğenildi")
-        except Exception as e:
-            if "403" in str(e):
-                log_action("Post Like Skipped", "403 error - reactions may require special permissions", url=post_url)
-                actions.append("⚠️ Beğeni atlanadı (izin gerekiyor)")
-            else:
-                log_action("Post Like Failed", f"Error: {e}", url=post_url)
-                actions.append("❌ Beğeni başarısız")
-
-        # Add Turkish summary after additional 45 seconds (90 seconds total)
-        await asyncio.sleep(45)
-        try:
-            await api_client.submit_comment(user_urn, post_urn, summary_text)
-            log_action("Summary Comment Added", "Added Turkish summary after 90 seconds total.", url=post_url)
-            actions.append("✅ 90 saniye sonra Türkçe özet eklendi")
-        except Exception as e:
-            log_action("Summary Comment Failed", f"Error: {e}", url=post_url)
-            actions.append("❌ Türkçe özet eklenemedi")
+        # Like after 45 seconds and add the Turkish summary after 90 seconds. Both are
+        # persisted to the scheduled action queue, so they survive restarts.
+        followup = {"user_urn": user_urn, "post_urn": post_urn, "post_url": post_url, "job_id": job_id}
+        await asyncio.to_thread(enqueue_action, "like_post", followup, delay_seconds=POST_LIKE_DELAY_SECONDS)
+        job_registry.expect_followups(job_id, 1)
+        actions.append("⏳ 45 saniye sonra beğenilecek")
+
+        if summary_text is None:
+            actions.append("⚠️ Türkçe özet üretilemedi, yorum atlandı")
+        else:
+            await asyncio.to_thread(
+                enqueue_action, "summary_comment", {**followup, "summary_text": summary_text},
+                delay_seconds=SUMMARY_COMMENT_DELAY_SECONDS,
+            )
+            job_registry.expect_followups(job_id, 1)
+            actions.append("⏳ 90 saniye sonra Türkçe özet eklenecek")
 
         return {
             "success": True, 
@@ -192,26 +413,75 @@ CRITICAL REQUIREMENTS:
     except Exception as e:
         log_action("Post Creation Failed", f"Unexpected error: {e}")
         return {"success": False, "message": f"Error: {str(e)}"}
+    finally:
+        if not shared:
+            try:
+                await asyncio.to_thread(feed_store.release, article.id)
+            except Exception as e:
+                log_action("Feed Entry Update Failed", f"Could not release article: {e}")
+
+async def trigger_post_creation(job_id: str = None):
+    return await trigger_post_creation_async(job_id)
+
+def extract_post_urn(post_url: str):
+    """Returns the post URN embedded in a LinkedIn post URL, or None."""
+    urn_match = re.search(r'urn:li:(activity|share|ugcPost):(\d+)', post_url)
+    if urn_match:
+        return f"urn:li:{urn_match.group(1)}:{urn_match.group(2)}"
+    activity_match = re.search(r'activity-(\d+)', post_url)
+    if activity_match:
+        return f"urn:li:activity:{activity_match.group(1)}"
+    return None
+
+async def generate_comment(post):
+    """Generates a comment for a discovered post in the post's language."""
+    # Detect post language
+    post_content = post.get('title', '') + ' ' + post.get('description', '')
+    try:
+        from langdetect import detect
+        detected_lang = detect(post_content)
+        lang_instruction = "English" if detected_lang == 'en' else "Turkish" if detected_lang == 'tr' else "the post's language"
+    except:
+        lang_instruction = "English or Turkish (match the post)"
+
+    comment_prompt = COMMENT_PROMPT_TEMPLATE.substitute(
+        title=post.get('title', 'technology'),
+        language=lang_instruction,
+    )
+    return await generate_text_async(comment_prompt)
+
+async def generate_comments(posts):
+    """Generates comments for several posts concurrently (at most COMMENT_GENERATION_CONCURRENCY at once)."""
+    semaphore = asyncio.Semaphore(settings.COMMENT_GENERATION_CONCURRENCY)
+
+    async def bounded(post):
+        async with semaphore:
+            return await generate_comment(post)
 
-async def trigger_post_creation():
-    return await trigger_post_creation_async()
+    results = await asyncio.gather(*(bounded(post) for post in posts), return_exceptions=True)
+    return [None if isinstance(result, BaseException) else result for result in results]
 
 async def trigger_commenting_async():
-    """Full logic for proactive commenting with automated post discovery."""
+    """
+    Full logic for proactive commenting with automated post discovery.
+
+    Comments are generated for the top COMMENT_BATCH_SIZE ranked posts at once
+    and queued as separate actions, spaced out so the hourly and daily comment
+    quotas are respected; one discovery pass therefore feeds several comments.
+    """
     api_client = get_api_client()
     if not api_client:
         return {"success": False, "message": "API client initialization failed"}
     
     # Get user interests from environment
-    interests_str = os.getenv('INTERESTS', 'ai,llm,product,saas,startup')
-    interests = [i.strip() for i in interests_str.split(',')]
+    interests = get_interests()
     
     # Initialize post discovery
     discovery = PostDiscovery(interests)
     
     try:
-        # Discover relevant posts
-        discovered_posts = await discovery.discover_posts_smart(max_posts=5)
+        # Discover relevant posts (ranked, best first); keep spares for posts without a URN
+        discovered_posts = await discovery.discover_posts_smart(max_posts=max(5, settings.COMMENT_BATCH_SIZE * 2))
         
         if not discovered_posts:
             log_action("Commenting Skipped", "No relevant posts discovered")
@@ -224,22 +494,28 @@ async def trigger_commenting_async():
                 ]
             }
         
-        # Select a random post from discovered ones
-        selected_post = random.choice(discovered_posts)
-        post_url = selected_post['url']
+        already_commented = await asyncio.to_thread(commented_post_urls, [post['url'] for post in discovered_posts])
+        candidates = []
+        for post in discovered_posts:
+            post_urn = extract_post_urn(post['url'])
+            if post_urn and post['url'] not in already_commented:
+                candidates.append((post, post_urn))
+        if not candidates:
+            log_action("Commenting Skipped", "No discovered post can be commented on (no post URN or already commented)")
+            return {"success": False, "message": "Invalid post URL format"}
         
-        # Extract post URN from URL
-        import re
-        urn_match = re.search(r'urn:li:(activity|share|ugcPost):(\d+)', post_url)
-        if not urn_match:
-            activity_match = re.search(r'activity-(\d+)', post_url)
-            if activity_match:
-                post_urn = f"urn:li:activity:{activity_match.group(1)}"
-            else:
-                log_action("Commenting Failed", f"Could not extract URN from: {post_url}")
-                return {"success": False, "message": "Invalid post URL format"}
-        else:
-            post_urn = f"urn:li:{urn_match.group(1)}:{urn_match.group(2)}"
+        # Check the quotas before spending AI calls
+        batch_size = min(len(candidates), settings.COMMENT_BATCH_SIZE)
+        batch_size = min(batch_size, await asyncio.to_thread(quota_service.remaining, COMMENT_QUOTA))
+        slots = await asyncio.to_thread(plan_comment_times, batch_size) if batch_size else []
+        if not slots:
+            log_action("Commenting Skipped", "Hourly/daily comment quota reached")
+            return {
+                "success": False,
+                "message": "Comment quota reached, try again later",
+                "actions": ["⏳ Saatlik/günlük yorum limiti doldu"]
+            }
+        candidates = candidates[:len(slots)]
         
         # Get user profile
         profile = await api_client.get_profile()
@@ -249,51 +525,40 @@ async def trigger_commenting_async():
             log_action("Commenting Failed", "Could not get user profile")
             return {"success": False, "message": "Could not get user profile"}
         
-        # Detect post language
-        post_content = selected_post.get('title', '') + ' ' + selected_post.get('description', '')
-        try:
-            from langdetect import detect
-            detected_lang = detect(post_content)
-            lang_instruction = "English" if detected_lang == 'en' else "Turkish" if detected_lang == 'tr' else "the post's language"
-        except:
-            lang_instruction = "English or Turkish (match the post)"
-        
-        # Generate AI comment
-        comment_prompt = f"""Write a LinkedIn comment for a post about: {selected_post.get('title', 'technology')}
-
-CRITICAL REQUIREMENTS:
-- Write in {lang_instruction} to match the original post
-- Write as Kürşat himself (you ARE Kürşat, not an assistant)
-- Add real value: share an insight, question, or perspective
-- Be authentic and strategic
-- Maximum 280 characters
-- NO hashtags, minimal/no emojis
-- NEVER reveal you're AI
-- NEVER announce future actions
-- Sound like a human entrepreneur engaging naturally
-
-Write a brief, valuable comment that starts a conversation or adds insight."""
-        comment_text = generate_text(comment_prompt)
-        
-        if not comment_text:
+        # Generate AI comments for the whole batch
+        comment_texts = await generate_comments([post for post, _ in candidates])
+        generated = [(post, urn, text) for (post, urn), text in zip(candidates, comment_texts) if text]
+        if not generated:
             log_action("Commenting Failed", "AI comment generation failed")
             return {"success": False, "message": "Could not generate comment text"}
         
-        # Submit comment
-        await api_client.submit_comment(user_urn, post_urn, comment_text)
+        # Plan again right before queuing, in case another run took slots meanwhile
+        slots = await asyncio.to_thread(plan_comment_times, len(generated))
+        now = datetime.datetime.utcnow()
+        actions = [f"✅ Otomatik post keşfi yapıldı ({len(discovered_posts)} post)"]
+        for (post, post_urn, comment_text), run_at in zip(generated, slots):
+            delay_seconds = max(0.0, (run_at - now).total_seconds())
+            await asyncio.to_thread(enqueue_action, COMMENT_ACTION, {
+                "user_urn": user_urn,
+                "post_urn": post_urn,
+                "post_url": post['url'],
+                "comment_text": comment_text,
+                "title": post.get('title'),
+                "entry_id": post.get('entry_id'),
+            }, delay_seconds=delay_seconds)
+            actions.append(f"📝 {int(delay_seconds // 60)} dk sonra yorum: {post.get('title', 'LinkedIn Post')[:60]}")
         
-        # Log success
-        log_action("Auto Comment Added", f"Commented on: {selected_post.get('title', 'post')}", url=post_url)
+        scheduled = min(len(generated), len(slots))
+        if not scheduled:
+            log_action("Commenting Skipped", "Hourly/daily comment quota reached")
+            return {"success": False, "message": "Comment quota reached, try again later"}
+        log_action("Comments Scheduled", f"{scheduled} comment(s) queued from one discovery pass")
         
         return {
             "success": True,
-            "message": "Comment posted successfully via automated discovery!",
-            "url": post_url,
-            "actions": [
-                "✅ Otomatik post keşfi yapıldı",
-                f"📝 Yorum: {comment_text[:100]}...",
-                f"🔗 Post: {selected_post.get('title', 'LinkedIn Post')}"
-            ]
+            "message": f"{scheduled} comment(s) scheduled via automated discovery!",
+            "url": generated[0][0]['url'],
+            "actions": actions
         }
         
     except Exception as e:
@@ -330,7 +595,13 @@ async def trigger_invitation_async():
         invitee_urn = profile_to_invite["urn_id"]
         invitation_message = "Merhaba, ağınızı genişletmek ve potansiyel işbirlikleri hakkında konuşmak isterim."
 
-        await api_client.send_invitation(user_urn, invitee_urn, invitation_message)
+        if not await asyncio.to_thread(quota_service.try_consume, INVITE_QUOTA):
+            return {"success": False, "message": "Daily invitation quota reached, try again tomorrow"}
+        try:
+            await api_client.send_invitation(user_urn, invitee_urn, invitation_message)
+        except Exception:
+            await asyncio.to_thread(quota_service.release, INVITE_QUOTA)
+            raise
         profile_url = f"https://www.linkedin.com/in/{profile_to_invite['public_id']}/"
         log_action("Invitation Sent", f"Sent invitation to {profile_to_invite['public_id']}", url=profile_url)
 
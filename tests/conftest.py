@@ -13,3 +13,36 @@ os.environ.setdefault("LINKEDIN_CLIENT_SECRET", "test_client_secret")
 os.environ.setdefault("LINKEDIN_REDIRECT_URI", "http://localhost:8000/callback")
 os.environ.setdefault("GEMINI_API_KEY", "test_api_key")
 os.environ.setdefault("FLASK_SECRET_KEY", "test_secret_key")
+os.environ.setdefault("AI_CACHE_ENABLED", "false")
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+os.environ.setdefault("QUOTAS_ENABLED", "false")
+# Modules that fall back to the global engines must not touch a database file in the repo
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def reset_process_caches():
+    """Clear process-wide caches so tests don't leak state into each other."""
+    from src.linkedin_api_client import token_store
+    token_store.invalidate()
+    yield
+    token_store.invalidate()
+
+
+@pytest.fixture
+def session_factory(tmp_path):
+    """
+    A sessionmaker bound to a fresh SQLite database file with all tables created.
+    A file (rather than one shared in-memory connection) lets code under test use
+    the database from several threads at once, as it does in production.
+    """
+    from sqlalchemy.orm import sessionmaker
+    from src.database import Base, build_engine
+    from src import models  # noqa: F401 - registers the tables on Base.metadata
+
+    engine = build_engine(f"sqlite:///{tmp_path / 'test.db'}")
+    Base.metadata.create_all(bind=engine)
+    yield sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    engine.dispose()
@@ -0,0 +1,78 @@
+"""Tests for the buffered action log writer."""
+import time
+from unittest.mock import patch
+
+from src.action_log import ActionLogWriter
+from src.models import ActionLog
+
+
+def _rows(session_factory):
+    db = session_factory()
+    try:
+        return [(row.action_type, row.result_url) for row in db.query(ActionLog).order_by(ActionLog.id)]
+    finally:
+        db.close()
+
+
+def test_records_are_written_in_one_batch_on_flush(session_factory):
+    writer = ActionLogWriter(session_factory, flush_interval_ms=60000, batch_size=100)
+    try:
+        writer.write("Post Created", "Shared post", url="https://linkedin.com/p")
+        writer.write("Like Added", "Liked")
+        assert _rows(session_factory) == []  # Nothing written on the caller's thread
+        assert writer.flush() == 2
+        assert _rows(session_factory) == [("Post Created", "https://linkedin.com/p"), ("Like Added", None)]
+    finally:
+        writer.close()
+
+
+def test_background_thread_flushes_on_interval_and_batch_size(session_factory):
+    writer = ActionLogWriter(session_factory, flush_interval_ms=20, batch_size=100)
+    try:
+        writer.write("Health", "ok")
+        deadline = time.monotonic() + 2
+        while not _rows(session_factory) and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert _rows(session_factory) == [("Health", None)]
+    finally:
+        writer.close()
+
+    writer = ActionLogWriter(session_factory, flush_interval_ms=60000, batch_size=3)
+    try:
+        for i in range(3):
+            writer.write("Batch", str(i))
+        deadline = time.monotonic() + 2
+        while writer.pending and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert writer.pending == 0
+    finally:
+        writer.close()
+
+
+def test_close_flushes_remaining_records(session_factory):
+    writer = ActionLogWriter(session_factory, flush_interval_ms=60000, batch_size=100)
+    writer.write("Shutdown", "bye")
+    writer.close()
+    assert _rows(session_factory) == [("Shutdown", None)]
+
+
+def test_failed_flush_keeps_records_for_the_next_attempt(session_factory):
+    writer = ActionLogWriter(session_factory, flush_interval_ms=60000, batch_size=100)
+    try:
+        writer.write("Retry", "later")
+        with patch.object(writer, "session_factory", side_effect=lambda: _failing_session(session_factory)):
+            assert writer.flush() == 0
+        assert writer.pending == 1
+        assert writer.flush() == 1
+    finally:
+        writer.close()
+
+
+def _failing_session(session_factory):
+    db = session_factory()
+
+    def fail():
+        raise RuntimeError("disk I/O error")
+
+    db.commit = fail
+    return db
@@ -0,0 +1,70 @@
+"""Tests for the action_logs indexes and the retention/rollup job."""
+import datetime
+
+from sqlalchemy import create_engine, inspect, text
+
+from src.action_log import roll_up_action_logs
+from src.migrations import run_migrations
+from src.models import ActionLog, ActionLogDailyCount
+
+NOW = datetime.datetime(2025, 3, 31, 12, 0)
+
+
+def _log(db, action_type, days_ago, hour=10):
+    day = (NOW - datetime.timedelta(days=days_ago)).date()
+    db.add(ActionLog(action_type=action_type, details="", timestamp=datetime.datetime.combine(day, datetime.time(hour))))
+
+
+def test_old_days_are_rolled_up_and_deleted(session_factory):
+    db = session_factory()
+    for action_type, days_ago in [("Post Created", 40), ("Post Created", 40), ("Like Added", 40),
+                                  ("Post Created", 35), ("Post Created", 5), ("Like Added", 0)]:
+        _log(db, action_type, days_ago)
+    db.commit()
+    db.close()
+
+    assert roll_up_action_logs(session_factory, retention_days=30, now=NOW) == 4
+    # Running again later adds to the same summaries instead of duplicating them
+    db = session_factory()
+    _log(db, "Post Created", 40, hour=23)
+    db.commit()
+    db.close()
+    assert roll_up_action_logs(session_factory, retention_days=30, now=NOW) == 1
+
+    db = session_factory()
+    try:
+        assert {(row.day, row.action_type): row.count for row in db.query(ActionLogDailyCount)} == {
+            ("2025-02-19", "Post Created"): 3,
+            ("2025-02-19", "Like Added"): 1,
+            ("2025-02-24", "Post Created"): 1,
+        }
+        assert db.query(ActionLog).count() == 2
+    finally:
+        db.close()
+    assert roll_up_action_logs(session_factory, retention_days=30, now=NOW) == 0
+
+
+def test_dashboard_query_uses_the_timestamp_index(session_factory):
+    db = session_factory()
+    try:
+        plan = db.execute(text(
+            "EXPLAIN QUERY PLAN SELECT * FROM action_logs ORDER BY timestamp DESC LIMIT 10"
+        )).fetchall()
+        assert "ix_action_logs_timestamp" in " ".join(str(row) for row in plan)
+    finally:
+        db.close()
+
+
+def test_indexes_are_added_to_existing_tables(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE action_logs (id INTEGER PRIMARY KEY, action_type VARCHAR, details VARCHAR, "
+            "timestamp DATETIME, result_url VARCHAR)"
+        ))
+    run_migrations(engine)
+    run_migrations(engine)  # Idempotent
+
+    names = {index["name"] for index in inspect(engine).get_indexes("action_logs")}
+    assert {"ix_action_logs_timestamp", "ix_action_logs_action_type_timestamp"} <= names
+    engine.dispose()
@@ -0,0 +1,147 @@
+"""Tests for the persistent delayed-action queue."""
+import asyncio
+import datetime
+import pytest
+from unittest.mock import patch, AsyncMock
+
+from src import action_queue
+from src.models import ScheduledAction
+
+
+@pytest.fixture
+def queue_db(session_factory):
+    with patch("src.action_queue.SessionLocal", session_factory), \
+         patch.dict(action_queue.ACTION_HANDLERS, clear=True), \
+         patch.object(action_queue, "IDEMPOTENT_ACTIONS", set()):
+        yield session_factory
+
+
+def _statuses(session_factory):
+    db = session_factory()
+    try:
+        return {row.action_type: row.status for row in db.query(ScheduledAction).all()}
+    finally:
+        db.close()
+
+
+def test_only_due_actions_are_dispatched(queue_db):
+    handler = AsyncMock()
+    action_queue.register_action("like_post", handler)
+    action_queue.register_action("summary_comment", handler)
+
+    action_queue.enqueue_action("like_post", {"post_urn": "urn:1"}, delay_seconds=0)
+    action_queue.enqueue_action("summary_comment", {"post_urn": "urn:1"}, delay_seconds=90)
+
+    assert asyncio.run(action_queue.dispatch_due_actions()) == 1
+    handler.assert_awaited_once_with(post_urn="urn:1")
+    assert _statuses(queue_db) == {"like_post": "done", "summary_comment": "pending"}
+
+
+def test_pending_actions_survive_restart_and_run_in_batches(queue_db):
+    handler = AsyncMock()
+    action_queue.register_action("like_post", handler)
+    for i in range(5):
+        action_queue.enqueue_action("like_post", {"post_urn": f"urn:{i}"})
+
+    # A new dispatcher (e.g. after a restart) picks everything up from the table
+    assert asyncio.run(action_queue.dispatch_due_actions(batch_size=2)) == 5
+    assert handler.await_count == 5
+    assert asyncio.run(action_queue.dispatch_due_actions(batch_size=2)) == 0
+
+
+def test_failed_actions_are_retried_then_marked_failed(queue_db):
+    action_queue.register_action("like_post", AsyncMock(side_effect=RuntimeError("boom")))
+    action_queue.enqueue_action("like_post", {})
+
+    with patch("src.action_queue.settings.ACTION_MAX_ATTEMPTS", 2), \
+         patch("src.action_queue.settings.ACTION_RETRY_DELAY_SECONDS", 0):
+        asyncio.run(action_queue.dispatch_due_actions())
+        assert _statuses(queue_db) == {"like_post": "pending"}
+        asyncio.run(action_queue.dispatch_due_actions())
+
+    db = queue_db()
+    try:
+        action = db.query(ScheduledAction).one()
+        assert action.status == "failed"
+        assert action.attempts == 2
+        assert action.last_error == "boom"
+    finally:
+        db.close()
+
+
+def test_claimed_actions_are_not_claimed_twice(queue_db):
+    action_queue.enqueue_action("like_post", {})
+    assert len(action_queue.claim_due_actions(10)) == 1
+    assert action_queue.claim_due_actions(10) == []
+
+
+def test_interrupted_actions_are_recovered_only_when_idempotent(queue_db):
+    action_queue.register_action("like_post", AsyncMock(), idempotent=True)
+    action_queue.register_action("summary_comment", AsyncMock())
+    action_queue.enqueue_action("like_post", {})
+    action_queue.enqueue_action("summary_comment", {})
+    action_queue.claim_due_actions(10)
+
+    db = queue_db()
+    try:
+        db.query(ScheduledAction).update({"updated_at": datetime.datetime.utcnow() - datetime.timedelta(hours=1)})
+        db.commit()
+    finally:
+        db.close()
+
+    with patch("src.action_queue.action_log_writer") as mock_log:
+        assert action_queue.recover_stale_actions(older_than_seconds=60) == 1
+    # The comment may already be on LinkedIn, so it is not posted again.
+    assert _statuses(queue_db) == {"like_post": "pending", "summary_comment": "failed"}
+    mock_log.write.assert_called_once()
+    assert mock_log.write.call_args.args[0] == "Scheduled Action Outcome Unknown"
+    assert "summary_comment" in mock_log.write.call_args.args[1]
+
+
+def _http_error(status):
+    import httpx
+    request = httpx.Request("POST", "https://api.linkedin.com/rest/reactions")
+    return httpx.HTTPStatusError(f"{status}", request=request, response=httpx.Response(status, request=request))
+
+
+def test_transient_follow_up_failures_are_retried_and_reported_once(queue_db):
+    from unittest.mock import MagicMock
+    from src import worker
+
+    client = MagicMock()
+    client.add_reaction = AsyncMock(side_effect=[_http_error(503), _http_error(503), None])
+    action_queue.register_action("like_post", worker.like_post_followup)
+    action_queue.enqueue_action("like_post", {"user_urn": "u", "post_urn": "p", "post_url": "https://x", "job_id": "job"})
+
+    with patch("src.worker.get_api_client", return_value=client), \
+         patch("src.worker.log_action") as mock_log, \
+         patch("src.worker.job_registry") as mock_jobs, \
+         patch("src.action_queue.settings.ACTION_MAX_ATTEMPTS", 3), \
+         patch("src.action_queue.settings.ACTION_RETRY_DELAY_SECONDS", 0):
+        for _ in range(3):
+            asyncio.run(action_queue.dispatch_due_actions())
+
+    assert client.add_reaction.await_count == 3
+    assert _statuses(queue_db) == {"like_post": "done"}
+    assert [call.args[0] for call in mock_log.call_args_list] == ["Post Liked"]
+    assert [call.args[1] for call in mock_jobs.record_stage.call_args_list] == ["liked"]
+
+
+def test_comment_follow_ups_are_not_retried_after_a_server_error(queue_db):
+    from unittest.mock import MagicMock
+    from src import worker
+
+    client = MagicMock()
+    client.submit_comment = AsyncMock(side_effect=_http_error(500))  # The comment may have been created
+    action_queue.register_action("summary_comment", worker.summary_comment_followup)
+    action_queue.enqueue_action("summary_comment", {"user_urn": "u", "post_urn": "p", "post_url": "https://x", "summary_text": "Özet"})
+
+    with patch("src.worker.get_api_client", return_value=client), \
+         patch("src.worker.log_action") as mock_log, \
+         patch("src.action_queue.settings.ACTION_RETRY_DELAY_SECONDS", 0):
+        asyncio.run(action_queue.dispatch_due_actions())
+        asyncio.run(action_queue.dispatch_due_actions())
+
+    assert client.submit_comment.await_count == 1
+    assert _statuses(queue_db) == {"summary_comment": "done"}
+    assert mock_log.call_args.args[0] == "Summary Comment Failed"
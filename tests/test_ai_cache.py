@@ -0,0 +1,108 @@
+"""Tests for the two-tier Gemini response cache."""
+import datetime
+from unittest.mock import patch, AsyncMock, MagicMock
+
+import pytest
+
+from src.ai_cache import ResponseCache, make_cache_key
+from src.models import AIResponseCache
+
+
+def make_cache(session_factory, **overrides):
+    options = {"max_memory_entries": 2, "ttl_seconds": 3600, "max_rows": 3}
+    options.update(overrides)
+    return ResponseCache(session_factory, **options)
+
+
+def test_cache_key_depends_on_every_component():
+    base = make_cache_key("gemini", "persona-v1", "prompt")
+    assert base == make_cache_key("gemini", "persona-v1", "prompt")
+    assert base != make_cache_key("gemini-pro", "persona-v1", "prompt")
+    assert base != make_cache_key("gemini", "persona-v2", "prompt")
+    assert base != make_cache_key("gemini", "persona-v1", "other prompt")
+    assert base != make_cache_key("gemini", "persona-v1", "prompt", {"response_mime_type": "application/json"})
+
+
+def test_memory_and_database_tiers(session_factory):
+    cache = make_cache(session_factory)
+    assert cache.get("k1") is None
+    cache.set("k1", "value one")
+
+    assert cache.get("k1") == "value one"
+    assert cache.stats()["memory_hits"] == 1
+
+    # A fresh process (empty memory tier) is served from the database tier
+    cache.clear_memory()
+    assert cache.get("k1") == "value one"
+    stats = cache.stats()
+    assert stats["db_hits"] == 1
+    assert stats["misses"] == 1
+
+
+def test_expired_entries_are_misses(session_factory):
+    cache = make_cache(session_factory, ttl_seconds=60)
+    cache.set("k1", "stale")
+
+    later = datetime.datetime.utcnow() + datetime.timedelta(seconds=120)
+    with patch("src.ai_cache.datetime") as mock_datetime:
+        mock_datetime.datetime.utcnow.return_value = later
+        mock_datetime.timedelta = datetime.timedelta
+        assert cache.get("k1") is None
+
+
+def test_database_tier_is_trimmed_to_max_rows(session_factory):
+    cache = make_cache(session_factory, max_rows=3)
+    for i in range(5):
+        cache.set(f"k{i}", f"value {i}")
+
+    db = session_factory()
+    try:
+        keys = {row.key for row in db.query(AIResponseCache).all()}
+    finally:
+        db.close()
+    assert len(keys) == 3
+    assert "k4" in keys
+    assert cache.stats()["evictions"] == 2
+
+
+def test_disabled_cache_is_bypassed(session_factory):
+    cache = make_cache(session_factory, enabled=False)
+    cache.set("k1", "value")
+    assert cache.get("k1") is None
+
+
+@patch("src.ai_core.response_cache")
+@patch("src.ai_core.model")
+def test_generate_text_uses_cache_only_when_asked(mock_model, mock_cache):
+    from src.ai_core import generate_text
+
+    mock_cache.get.return_value = "cached text"
+    assert generate_text("Prompt", use_cache=True) == "cached text"
+    mock_model.generate_content.assert_not_called()
+
+    mock_model.generate_content.return_value = MagicMock(text="fresh text")
+    assert generate_text("Prompt") == "fresh text"
+    mock_model.generate_content.assert_called_once()
+
+
+@pytest.mark.asyncio
+@patch("src.ai_core.model")
+async def test_manual_comments_with_the_same_prompt_are_generated_each_time(mock_model, session_factory):
+    from src.main import manual_comment
+
+    cache = make_cache(session_factory)
+    mock_model.generate_content.side_effect = [MagicMock(text="First comment"), MagicMock(text="Second comment")]
+    client = MagicMock()
+    client.get_profile = AsyncMock(return_value={"id": "urn:li:person:me"})
+    client.submit_comment = AsyncMock()
+    request = MagicMock()
+    request.json = AsyncMock(return_value={"post_url": "https://www.linkedin.com/feed/update/urn:li:activity:1/"})
+    with patch("src.ai_core.response_cache", cache), \
+         patch("src.linkedin_api_client.LinkedInApiClient", return_value=client), \
+         patch("src.worker.record_comment", new_callable=AsyncMock), \
+         patch("src.worker.log_action"):
+        assert (await manual_comment(request))["success"] is True
+        assert (await manual_comment(request))["success"] is True
+
+    assert mock_model.generate_content.call_count == 2
+    assert [call.args[2] for call in client.submit_comment.await_args_list] == ["First comment", "Second comment"]
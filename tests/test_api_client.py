@@ -1,12 +1,12 @@
 import pytest
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, MagicMock, AsyncMock
 from src.linkedin_api_client import LinkedInApiClient
 
 # No longer need to mock the token file, we will pass the token directly.
 
 @patch("src.linkedin_api_client.SessionLocal")  # Mock the database session
-@patch("httpx.AsyncClient")
-def test_get_profile_success(mock_async_client, mock_db_session):
+@patch("src.linkedin_api_client.get_http_client")
+def test_get_profile_success(mock_get_http_client, mock_db_session):
     """Tests successful profile retrieval with OpenID Connect userinfo endpoint."""
     # Mock the database call to return a token
     mock_token = MagicMock()
@@ -17,7 +17,7 @@ def test_get_profile_success(mock_async_client, mock_db_session):
     mock_response = MagicMock()
     mock_response.status_code = 200
     mock_response.json.return_value = {"sub": "test_user_urn", "name": "Test User"}
-    mock_async_client.return_value.__aenter__.return_value.get.return_value = mock_response
+    mock_get_http_client.return_value.get = AsyncMock(return_value=mock_response)
 
     # Initialize the client with a direct access token
     client = LinkedInApiClient(access_token="dummy_access_token")
@@ -29,14 +29,14 @@ def test_get_profile_success(mock_async_client, mock_db_session):
     assert profile["id"] == "test_user_urn"
     assert profile["sub"] == "test_user_urn"
     # Ensure the Authorization header is correctly set and /userinfo endpoint is used
-    mock_async_client.return_value.__aenter__.return_value.get.assert_called_with(
+    mock_get_http_client.return_value.get.assert_called_with(
         f"{client.API_BASE_URL}/userinfo", headers={'Authorization': 'Bearer dummy_access_token', 'Content-Type': 'application/json', 'X-Restli-Protocol-Version': '2.0.0'}
     )
 
 
 @patch("src.linkedin_api_client.SessionLocal") # Mock the database session
-@patch("httpx.AsyncClient")
-def test_share_post_success(mock_async_client, mock_db_session):
+@patch("src.linkedin_api_client.get_http_client")
+def test_share_post_success(mock_get_http_client, mock_db_session):
     """Tests successful post sharing with a direct token."""
     # Mock the database call
     mock_token = MagicMock()
@@ -47,7 +47,7 @@ def test_share_post_success(mock_async_client, mock_db_session):
     mock_response = MagicMock()
     mock_response.status_code = 201
     mock_response.json.return_value = {"id": "new_post_urn"}
-    mock_async_client.return_value.__aenter__.return_value.post.return_value = mock_response
+    mock_get_http_client.return_value.post = AsyncMock(return_value=mock_response)
 
     # Initialize the client with a direct access token
     client = LinkedInApiClient(access_token="dummy_access_token")
@@ -145,3 +145,104 @@ def test_whitespace_token_from_db_raises_error(mock_db_session):
         LinkedInApiClient()
     
     assert "Access token is not available" in str(excinfo.value)
+
+
+def test_injected_http_client_is_used():
+    """Tests that an explicitly injected HTTP client takes precedence over the shared pool."""
+    injected = MagicMock()
+    client = LinkedInApiClient(access_token="dummy_access_token", http_client=injected)
+
+    assert client.client is injected
+
+
+def test_shared_http_client_is_reused_and_closed():
+    """Tests that the pooled client is reused within a loop and can be closed explicitly."""
+    import asyncio
+    from src.http_client import get_http_client, aclose_http_client
+
+    async def scenario():
+        first = get_http_client()
+        second = get_http_client()
+        assert first is second
+        await aclose_http_client()
+        assert first.is_closed
+        # A new client is created lazily after closing
+        third = get_http_client()
+        assert third is not first
+        await aclose_http_client()
+
+    asyncio.run(scenario())
+
+
+@patch("src.linkedin_api_client.get_http_client")
+def test_get_profile_is_cached_per_token(mock_get_http_client):
+    """Tests that /userinfo is called once per token and re-fetched after invalidation."""
+    import asyncio
+    from src.linkedin_api_client import invalidate_profile_cache
+
+    mock_response = MagicMock()
+    mock_response.status_code = 200
+    mock_response.json.side_effect = lambda: {"sub": "cached_urn"}
+    mock_get_http_client.return_value.get = AsyncMock(return_value=mock_response)
+
+    client = LinkedInApiClient(access_token="cache_token")
+    first = asyncio.run(client.get_profile())
+    second = asyncio.run(LinkedInApiClient(access_token="cache_token").get_profile())
+
+    assert first["id"] == second["id"] == "cached_urn"
+    assert mock_get_http_client.return_value.get.call_count == 1
+
+    # A different token must not share the cached profile
+    asyncio.run(LinkedInApiClient(access_token="other_token").get_profile())
+    assert mock_get_http_client.return_value.get.call_count == 2
+
+    # After a login/logout the profile is looked up again
+    invalidate_profile_cache()
+    asyncio.run(client.get_profile())
+    assert mock_get_http_client.return_value.get.call_count == 3
+
+
+@patch("src.linkedin_api_client.SessionLocal")
+def test_token_store_reads_db_once_until_changed(mock_db_session):
+    """Tests that the token is loaded from the DB once and refreshed via set()/clear()."""
+    from src.linkedin_api_client import token_store
+
+    mock_token = MagicMock()
+    mock_token.access_token = "db_token"
+    mock_db_session.return_value.query.return_value.order_by.return_value.first.return_value = mock_token
+
+    assert LinkedInApiClient().access_token == "db_token"
+    assert LinkedInApiClient().access_token == "db_token"
+    assert mock_db_session.call_count == 1
+
+    # /callback stores a new token: served from memory without another DB read
+    token_store.set("  new_token  ")
+    assert LinkedInApiClient().access_token == "new_token"
+    assert mock_db_session.call_count == 1
+
+    # /logout deletes it: clients can no longer be built
+    token_store.clear()
+    with pytest.raises(ValueError):
+        LinkedInApiClient()
+    assert mock_db_session.call_count == 1
+
+
+def test_token_store_picks_up_changes_made_by_other_processes():
+    """Tests that a cached token expires and that a missing token is not cached."""
+    from src.linkedin_api_client import TokenStore
+
+    tokens = [None, "first_token", "second_token"]
+    loader = MagicMock(side_effect=lambda: tokens[0])
+    store = TokenStore(loader, ttl_seconds=60)
+
+    with patch("src.linkedin_api_client.time.monotonic", return_value=1000.0) as mock_clock:
+        assert store.get() is None
+        tokens.pop(0)  # Another process handles /callback
+        assert store.get() == "first_token"
+        assert store.get() == "first_token"
+        assert loader.call_count == 2
+
+        tokens.pop(0)  # ... and later a new login
+        mock_clock.return_value = 1061.0
+        assert store.get() == "second_token"
+        assert loader.call_count == 3
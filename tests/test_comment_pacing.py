@@ -0,0 +1,138 @@
+"""Tests for quota-aware comment pacing and batch commenting."""
+import asyncio
+import datetime
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from src import comment_pacing
+from src.comment_pacing import COMMENT_ACTION, plan_times
+from src.models import Comment
+
+NOW = datetime.datetime(2025, 1, 15, 10, 0, 0)
+SPACING = datetime.timedelta(minutes=10)
+HORIZON = datetime.timedelta(hours=2)
+
+
+def _plan(existing, count, per_hour=3, per_day=20):
+    return plan_times(existing, count, NOW, per_hour, per_day, SPACING, HORIZON)
+
+
+def test_comments_are_spaced_out():
+    assert _plan([], 3) == [NOW, NOW + SPACING, NOW + 2 * SPACING]
+
+
+def test_hourly_quota_pushes_comments_to_the_next_window():
+    existing = [NOW - datetime.timedelta(minutes=m) for m in (50, 45, 40)]
+    planned = _plan(existing, 3, per_hour=3)
+    # The first slot opens when the comment from 50 minutes ago leaves the hour window.
+    assert planned == [NOW + datetime.timedelta(minutes=m) for m in (10, 20, 30)]
+    for t in planned:
+        assert sum(1 for other in existing + planned if t - datetime.timedelta(hours=1) < other <= t) <= 3
+
+
+def test_daily_quota_and_horizon_limit_the_batch():
+    existing = [NOW - datetime.timedelta(hours=h) for h in range(2, 21)]  # 19 comments in the last day
+    assert _plan(existing, 3, per_hour=10, per_day=20) == [NOW]
+    full = existing + [NOW - datetime.timedelta(minutes=90)]
+    assert _plan(full, 1, per_hour=10, per_day=20) == []
+
+
+def test_pending_comments_count_towards_the_quota(session_factory):
+    with patch("src.comment_pacing.SessionLocal", session_factory), \
+         patch("src.action_queue.SessionLocal", session_factory):
+        from src.action_queue import enqueue_action
+        enqueue_action(COMMENT_ACTION, {"post_url": "https://linkedin.com/a"}, delay_seconds=0)
+        db = session_factory()
+        db.add(Comment(post_url="https://linkedin.com/b", content="hi"))
+        db.commit()
+        db.close()
+
+        with patch.object(comment_pacing.settings, "COMMENTS_PER_HOUR", 3), \
+             patch.object(comment_pacing.settings, "COMMENT_SCHEDULE_HORIZON_MINUTES", 30):
+            # One slot is left in this hour; the next hour is beyond the horizon.
+            assert len(comment_pacing.plan_comment_times(5)) == 1
+        assert comment_pacing.commented_post_urls(
+            ["https://linkedin.com/a", "https://linkedin.com/b", "https://linkedin.com/c"]
+        ) == {"https://linkedin.com/a", "https://linkedin.com/b"}
+
+
+@pytest.mark.asyncio
+async def test_batch_commenting_generates_concurrently_and_queues_spaced_comments():
+    from src.worker import trigger_commenting_async
+
+    posts = [
+        {"url": f"https://www.linkedin.com/feed/update/urn:li:activity:{n}", "title": f"Post {n}", "description": ""}
+        for n in range(5)
+    ]
+    posts.insert(1, {"url": "https://example.com/article", "title": "No URN", "description": ""})
+    discovery = MagicMock()
+    discovery.discover_posts_smart = AsyncMock(return_value=posts)
+    client = MagicMock()
+    client.get_profile = AsyncMock(return_value={"id": "urn:li:person:me"})
+
+    state = {"active": 0, "peak": 0}
+
+    async def fake_generate(prompt):
+        state["active"] += 1
+        state["peak"] = max(state["peak"], state["active"])
+        await asyncio.sleep(0.01)
+        state["active"] -= 1
+        return f"Comment for {prompt.splitlines()[0]}"
+
+    now = datetime.datetime.utcnow()
+    slots = [now, now + datetime.timedelta(minutes=10), now + datetime.timedelta(minutes=20)]
+    with patch("src.worker.get_api_client", return_value=client), \
+         patch("src.worker.PostDiscovery", return_value=discovery), \
+         patch("src.worker.commented_post_urls", return_value={posts[0]["url"]}), \
+         patch("src.worker.plan_comment_times", side_effect=lambda count: slots[:count]), \
+         patch("src.worker.generate_text_async", side_effect=fake_generate), \
+         patch("src.worker.enqueue_action") as mock_enqueue, \
+         patch("src.worker.log_action"), \
+         patch("src.worker.settings.COMMENT_GENERATION_CONCURRENCY", 2):
+        result = await trigger_commenting_async()
+
+    assert result["success"] is True
+    assert state["peak"] <= 2
+    client.submit_comment.assert_not_called()  # Submitted later by the action queue
+
+    queued = [call.args[1]["post_url"] for call in mock_enqueue.call_args_list]
+    assert queued == [posts[2]["url"], posts[3]["url"], posts[4]["url"]]
+    delays = [call.kwargs["delay_seconds"] for call in mock_enqueue.call_args_list]
+    assert delays[0] < 5 and 590 < delays[1] < 600 and 1190 < delays[2] < 1200
+    assert all(call.args[0] == COMMENT_ACTION for call in mock_enqueue.call_args_list)
+
+
+@pytest.mark.asyncio
+async def test_planned_comment_is_submitted_and_recorded():
+    from src.worker import post_comment_followup
+
+    client = MagicMock()
+    client.submit_comment = AsyncMock()
+    with patch("src.worker.get_api_client", return_value=client), \
+         patch("src.worker.record_comment", new_callable=AsyncMock) as mock_record, \
+         patch("src.worker.feed_store") as mock_store, \
+         patch("src.worker.log_action"):
+        await post_comment_followup("urn:li:person:me", "urn:li:activity:1", "https://linkedin.com/p", "Nice!", "Post", 7)
+
+    client.submit_comment.assert_awaited_once_with("urn:li:person:me", "urn:li:activity:1", "Nice!")
+    mock_record.assert_awaited_once_with("https://linkedin.com/p", "Nice!")
+    mock_store.mark_commented.assert_called_once_with(7)
+
+
+@pytest.mark.asyncio
+async def test_manual_comment_is_recorded_for_pacing_and_duplicate_checks():
+    from src.main import manual_comment
+
+    post_url = "https://www.linkedin.com/feed/update/urn:li:activity:1/"
+    client = MagicMock()
+    client.get_profile = AsyncMock(return_value={"id": "urn:li:person:me"})
+    client.submit_comment = AsyncMock()
+    request = MagicMock()
+    request.json = AsyncMock(return_value={"post_url": post_url, "comment": "Nice!"})
+    with patch("src.linkedin_api_client.LinkedInApiClient", return_value=client), \
+         patch("src.worker.record_comment", new_callable=AsyncMock) as mock_record, \
+         patch("src.worker.log_action"):
+        assert (await manual_comment(request))["success"] is True
+
+    mock_record.assert_awaited_once_with(post_url, "Nice!")
@@ -0,0 +1,121 @@
+"""Tests for the engine configuration in src/database.py."""
+import asyncio
+import threading
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlalchemy.pool import QueuePool, StaticPool
+
+from src.database import Base, build_async_engine, build_engine
+
+
+def _pragma(engine, name):
+    with engine.connect() as conn:
+        return conn.execute(text(f"PRAGMA {name}")).scalar()
+
+
+def test_file_database_uses_wal_and_tuned_pragmas(tmp_path):
+    engine = build_engine(f"sqlite:///{tmp_path / 'agent.db'}")
+    try:
+        assert isinstance(engine.pool, QueuePool)
+        assert _pragma(engine, "journal_mode") == "wal"
+        assert _pragma(engine, "synchronous") == 1  # NORMAL
+        assert _pragma(engine, "busy_timeout") == 5000
+        assert _pragma(engine, "cache_size") == -20000
+    finally:
+        engine.dispose()
+
+
+def test_readers_are_not_blocked_by_an_open_write_transaction(tmp_path):
+    engine = build_engine(f"sqlite:///{tmp_path / 'agent.db'}")
+    try:
+        with engine.begin() as conn:
+            conn.execute(text("CREATE TABLE logs (id INTEGER PRIMARY KEY, message TEXT)"))
+            conn.execute(text("INSERT INTO logs (message) VALUES ('committed')"))
+        writer = engine.connect()
+        writer.begin()
+        writer.execute(text("INSERT INTO logs (message) VALUES ('pending')"))
+
+        seen = []
+        reader = threading.Thread(
+            target=lambda: seen.append(_scalar(engine, "SELECT COUNT(*) FROM logs"))
+        )
+        reader.start()
+        reader.join(timeout=2)
+        writer.rollback()
+        writer.close()
+        assert seen == [1]
+    finally:
+        engine.dispose()
+
+
+def _scalar(engine, sql):
+    with engine.connect() as conn:
+        return conn.execute(text(sql)).scalar()
+
+
+def test_in_memory_database_shares_one_connection():
+    engine = build_engine("sqlite://")
+    try:
+        assert isinstance(engine.pool, StaticPool)
+        with engine.begin() as conn:
+            conn.execute(text("CREATE TABLE t (id INTEGER)"))
+        assert _scalar(engine, "SELECT COUNT(*) FROM t") == 0
+    finally:
+        engine.dispose()
+
+
+@pytest.fixture
+def async_session_factory(tmp_path):
+    """An async_sessionmaker on a fresh file database with all tables created."""
+    url = f"sqlite:///{tmp_path / 'agent.db'}"
+    sync_engine = build_engine(url)
+    Base.metadata.create_all(bind=sync_engine)
+    sync_engine.dispose()
+    engine = build_async_engine(url)
+    yield async_sessionmaker(engine, expire_on_commit=False)
+    asyncio.run(engine.dispose())
+
+
+def test_async_engine_uses_aiosqlite_with_the_same_pragmas(tmp_path):
+    engine = build_async_engine(f"sqlite:///{tmp_path / 'agent.db'}")
+
+    async def pragmas():
+        async with engine.connect() as conn:
+            return [(await conn.execute(text(f"PRAGMA {name}"))).scalar() for name in ("journal_mode", "busy_timeout")]
+
+    try:
+        assert engine.url.drivername == "sqlite+aiosqlite"
+        assert asyncio.run(pragmas()) == ["wal", 5000]
+    finally:
+        asyncio.run(engine.dispose())
+
+
+def test_handlers_read_and_write_through_the_async_session(async_session_factory):
+    from src.main import app, get_db
+    from src.models import ActionLog, TranslatedPost
+
+    async def seed():
+        async with async_session_factory() as db:
+            db.add(ActionLog(action_type="Post Created", details="Shared post"))
+            db.add(TranslatedPost(original_post_url="https://linkedin.com/p", original_content="Hi",
+                                  translated_content="Merhaba", status="pending"))
+            await db.commit()
+
+    async def override_get_db():
+        async with async_session_factory() as db:
+            yield db
+
+    asyncio.run(seed())
+    app.dependency_overrides[get_db] = override_get_db
+    try:
+        client = TestClient(app)
+        page = client.get("/")
+        assert page.status_code == 200
+        assert "Post Created" in page.text and "Merhaba" in page.text
+        assert client.post("/api/posts/1/reject").json()["success"] is True
+        assert client.post("/api/posts/1/reject").json()["success"] is False
+    finally:
+        app.dependency_overrides.clear()
@@ -39,12 +39,72 @@ def test_generate_text_exception(mock_model):
     assert result is None
 
 
+@pytest.mark.asyncio
+@patch("src.ai_core.model")
+async def test_generate_text_async_returns_text(mock_model):
+    """Test that generate_text_async runs the blocking SDK call off the event loop."""
+    from src.ai_core import generate_text_async
+
+    mock_response = MagicMock()
+    mock_response.text = "  Generated  "
+    mock_model.generate_content.return_value = mock_response
+
+    result = await generate_text_async("Test prompt")
+    assert result == "Generated"
+
+
+@pytest.mark.asyncio
+@patch("src.ai_core.model")
+async def test_generate_text_async_timeout(mock_model):
+    """Test that generate_text_async returns None when the call exceeds its timeout."""
+    import time
+    from src.ai_core import generate_text_async
+
+    def slow_generate(*args, **kwargs):
+        time.sleep(0.5)
+        return MagicMock(text="too late")
+
+    mock_model.generate_content.side_effect = slow_generate
+
+    result = await generate_text_async("Test prompt", timeout=0.05)
+    assert result is None
+
+
+@pytest.mark.asyncio
+@patch("src.ai_core.model")
+async def test_generate_text_async_concurrency_cap(mock_model):
+    """Test that no more than GEMINI_MAX_CONCURRENCY generations run at once."""
+    import threading
+    import time
+    from src.ai_core import generate_text_async
+    from src.config import settings
+
+    state = {"active": 0, "peak": 0}
+    lock = threading.Lock()
+
+    def tracked_generate(*args, **kwargs):
+        with lock:
+            state["active"] += 1
+            state["peak"] = max(state["peak"], state["active"])
+        time.sleep(0.05)
+        with lock:
+            state["active"] -= 1
+        return MagicMock(text="ok")
+
+    mock_model.generate_content.side_effect = tracked_generate
+
+    results = await asyncio.gather(*(generate_text_async(f"Prompt {i}") for i in range(6)))
+    assert results == ["ok"] * 6
+    assert state["peak"] <= settings.GEMINI_MAX_CONCURRENCY
+
+
 @pytest.mark.asyncio
 @patch("src.worker.log_action")
+@patch("src.worker.feed_store")
 @patch("src.worker.get_api_client")
 @patch("src.worker.find_shareable_article")
-@patch("src.worker.generate_text")
-async def test_post_creation_ai_failure(mock_generate, mock_article, mock_client, mock_log):
+@patch("src.worker.generate_text_async")
+async def test_post_creation_ai_failure(mock_generate, mock_article, mock_client, mock_store, mock_log):
     """Test that post creation handles AI failure gracefully."""
     from src.worker import trigger_post_creation_async
     
@@ -58,6 +118,9 @@ async def test_post_creation_ai_failure(mock_generate, mock_article, mock_client
     assert result["success"] is False
     assert "AI content generation is not available" in result["message"]
     assert "GEMINI_API_KEY" in result["message"]
+    # The reserved article goes back to the pool for the next run.
+    mock_store.release.assert_called_once_with(mock_article.return_value.id)
+    mock_store.mark_shared.assert_not_called()
 
 
 @pytest.mark.asyncio
@@ -133,3 +196,106 @@ async def test_commenting_returns_success(mock_post_discovery, mock_get_client,
     
     # Verify log_action was called for skipping
     assert mock_log.called
+
+
+@pytest.mark.asyncio
+@patch("src.ai_core.generate_text_async")
+async def test_generate_json_async_validates_fields(mock_generate):
+    """Test that structured generation parses fenced JSON and rejects missing fields."""
+    from src.ai_core import generate_json_async
+
+    mock_generate.return_value = '```json\n{"post": " Post body ", "summary": "Özet"}\n```'
+    result = await generate_json_async("prompt", ("post", "summary"))
+    assert result == {"post": "Post body", "summary": "Özet"}
+
+    mock_generate.return_value = '{"post": "Post body"}'
+    assert await generate_json_async("prompt", ("post", "summary")) is None
+
+    mock_generate.return_value = "not json"
+    assert await generate_json_async("prompt", ("post", "summary")) is None
+
+
+@pytest.mark.asyncio
+@patch("src.worker.log_action")
+@patch("src.worker.generate_text_async")
+@patch("src.worker.generate_json_async")
+async def test_structured_post_generation_falls_back(mock_generate_json, mock_generate, mock_log):
+    """Test that structured mode uses one call and falls back to two calls when parsing fails."""
+    from src.worker import generate_post_and_summary
+
+    article = MagicMock(title="Test Article", link="https://example.com")
+
+    with patch("src.worker.settings.POST_GENERATION_MODE", "structured"):
+        mock_generate_json.return_value = {"post": "Post", "summary": "Özet"}
+        assert await generate_post_and_summary(article) == ("Post", "Özet")
+        mock_generate.assert_not_called()
+
+        mock_generate_json.return_value = None
+        mock_generate.side_effect = ["Fallback post", "Fallback özet"]
+        assert await generate_post_and_summary(article) == ("Fallback post", "Fallback özet")
+        assert mock_generate.call_count == 2
+
+
+@patch("src.ai_core._persona_model", None)
+@patch("src.ai_core.genai")
+@patch("src.ai_core.model")
+def test_system_instruction_mode_sends_task_only(mock_model, mock_genai):
+    """Test that the persona goes into system_instruction and only the task is sent per request."""
+    from src.ai_core import generate_text
+    from src.persona import get_persona_prompt
+
+    persona_model = mock_genai.GenerativeModel.return_value
+    persona_model.generate_content.return_value = MagicMock(text="Generated")
+
+    with patch("src.ai_core.settings.GEMINI_SYSTEM_INSTRUCTION", True), \
+         patch("src.ai_core.settings.GEMINI_CONTEXT_CACHE", False):
+        assert generate_text("Task prompt", use_cache=False) == "Generated"
+        assert generate_text("Another task", use_cache=False) == "Generated"
+
+    # The persona model is built once and reused
+    mock_genai.GenerativeModel.assert_called_once()
+    assert mock_genai.GenerativeModel.call_args.kwargs["system_instruction"] == get_persona_prompt()
+    assert persona_model.generate_content.call_args.args[0] == "Another task"
+    mock_model.generate_content.assert_not_called()
+
+
+@patch("src.ai_core._persona_model", None)
+@patch("src.ai_core.genai")
+@patch("src.ai_core.model")
+def test_context_cache_failure_falls_back_to_system_instruction(mock_model, mock_genai):
+    """Test that an unsupported context cache falls back to a plain system-instruction model."""
+    from src.ai_core import generate_text
+
+    mock_genai.caching.CachedContent.create.side_effect = Exception("Cached content is too small")
+    mock_genai.GenerativeModel.return_value.generate_content.return_value = MagicMock(text="Generated")
+
+    with patch("src.ai_core.settings.GEMINI_SYSTEM_INSTRUCTION", True), \
+         patch("src.ai_core.settings.GEMINI_CONTEXT_CACHE", True):
+        assert generate_text("Task prompt", use_cache=False) == "Generated"
+
+    mock_genai.caching.CachedContent.create.assert_called_once()
+    mock_genai.GenerativeModel.from_cached_content.assert_not_called()
+    mock_genai.GenerativeModel.assert_called_once()
+
+
+@patch("src.ai_core._persona_model", None)
+@patch("src.ai_core.genai")
+@patch("src.ai_core.model")
+def test_persona_change_leaves_the_old_context_cache_to_expire(mock_model, mock_genai):
+    """Test that a persona change builds a new cached model without deleting the one in use."""
+    from src.ai_core import generate_text
+
+    first_cache, second_cache = MagicMock(), MagicMock()
+    mock_genai.caching.CachedContent.create.side_effect = [first_cache, second_cache]
+    mock_genai.GenerativeModel.from_cached_content.return_value.generate_content.return_value = MagicMock(text="Generated")
+
+    with patch("src.ai_core.settings.GEMINI_SYSTEM_INSTRUCTION", True), \
+         patch("src.ai_core.settings.GEMINI_CONTEXT_CACHE", True), \
+         patch("src.ai_core.get_persona_version", return_value="v1") as mock_version:
+        assert generate_text("Task prompt", use_cache=False) == "Generated"
+        mock_version.return_value = "v2"
+        assert generate_text("Task prompt", use_cache=False) == "Generated"
+
+    assert mock_genai.caching.CachedContent.create.call_count == 2
+    # Requests still in flight may use the old cache; it expires through its TTL.
+    first_cache.delete.assert_not_called()
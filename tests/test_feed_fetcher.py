@@ -0,0 +1,73 @@
+"""Tests for concurrent RSS fetching with conditional GET."""
+import asyncio
+import httpx
+from unittest.mock import patch
+
+from src.feed_fetcher import FeedFetcher
+
+RSS = b"""<?xml version="1.0"?>
+<rss version="2.0"><channel><title>Feed</title>
+<item><title>First article</title><link>https://example.com/1</link></item>
+<item><title>Second article</title><link>https://example.com/2</link></item>
+</channel></rss>"""
+
+
+def make_client(handler):
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+def test_conditional_get_reuses_entries_on_304():
+    seen_headers = []
+
+    def handler(request):
+        seen_headers.append(dict(request.headers))
+        if request.headers.get("If-None-Match") == '"v1"':
+            return httpx.Response(304)
+        return httpx.Response(200, content=RSS, headers={"ETag": '"v1"', "Last-Modified": "Mon, 01 Jan 2024 00:00:00 GMT"})
+
+    async def scenario():
+        async with make_client(handler) as client:
+            with patch("src.feed_fetcher.get_http_client", return_value=client), \
+                 patch("src.feed_fetcher.feedparser.parse", wraps=__import__("feedparser").parse) as mock_parse:
+                fetcher = FeedFetcher()
+                first = await fetcher.fetch("https://example.com/feed")
+                second = await fetcher.fetch("https://example.com/feed")
+                return first, second, mock_parse.call_count
+
+    first, second, parse_count = asyncio.run(scenario())
+    assert [entry.title for entry in first.entries] == ["First article", "Second article"]
+    assert second.not_modified is True
+    assert second.entries == first.entries
+    assert parse_count == 1, "A 304 response must not be parsed again"
+    assert "if-none-match" not in seen_headers[0]
+    assert seen_headers[1]["if-none-match"] == '"v1"'
+    assert seen_headers[1]["if-modified-since"] == "Mon, 01 Jan 2024 00:00:00 GMT"
+
+
+def test_fetch_all_requests_feeds_concurrently_and_isolates_errors():
+    state = {"active": 0, "peak": 0}
+
+    async def handler(request):
+        state["active"] += 1
+        state["peak"] = max(state["peak"], state["active"])
+        await asyncio.sleep(0.01)
+        state["active"] -= 1
+        if request.url.host == "broken.example.com":
+            return httpx.Response(500)
+        return httpx.Response(200, content=RSS)
+
+    async def scenario():
+        async with make_client(handler) as client:
+            with patch("src.feed_fetcher.get_http_client", return_value=client):
+                return await FeedFetcher().fetch_all([
+                    "https://a.example.com/feed",
+                    "https://b.example.com/feed",
+                    "https://broken.example.com/feed",
+                ])
+
+    results = asyncio.run(scenario())
+    assert state["peak"] == 3
+    assert list(results) == ["https://a.example.com/feed", "https://b.example.com/feed", "https://broken.example.com/feed"]
+    assert len(results["https://a.example.com/feed"].entries) == 2
+    assert results["https://broken.example.com/feed"].entries == []
+    assert results["https://broken.example.com/feed"].error
@@ -0,0 +1,163 @@
+"""Tests for the persistent feed-entry store."""
+import datetime
+import time
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from src.feed_fetcher import FeedResult
+from src.feed_store import BloomFilter, FeedStore
+from src.models import FeedEntry
+
+
+def _entry(n, **extra):
+    entry = {
+        "id": f"guid-{n}",
+        "title": f"Article {n}",
+        "link": f"https://example.com/{n}",
+        "published_parsed": time.gmtime(),
+    }
+    entry.update(extra)
+    return entry
+
+
+@pytest.fixture
+def store(session_factory):
+    return FeedStore(session_factory, bloom_capacity=1000, bloom_error_rate=0.01)
+
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    items = [f"item-{i}" for i in range(1000)]
+    for item in items:
+        bloom.add(item)
+    assert all(item in bloom for item in items)
+    false_positives = sum(f"other-{i}" in bloom for i in range(1000))
+    assert false_positives < 50
+
+
+def test_ingest_is_incremental(store, session_factory):
+    assert store.ingest("https://feed", [_entry(1), _entry(2), _entry(2)]) == 2
+    assert store.ingest("https://feed", [_entry(1), _entry(2), _entry(3)]) == 1
+
+    # A fresh process (empty bloom filter) still recognises stored entries.
+    restarted = FeedStore(session_factory, bloom_capacity=1000, bloom_error_rate=0.01)
+    assert restarted.ingest("https://feed", [_entry(1), _entry(3)]) == 0
+
+    db = session_factory()
+    try:
+        assert db.query(FeedEntry).count() == 3
+    finally:
+        db.close()
+
+
+def test_entries_without_a_link_are_skipped(store):
+    store.ingest("https://feed", [{"id": "guid-x", "title": "No link"}])
+    assert store.select_fresh_entry() is None
+
+
+def test_shared_entries_are_never_selected_again(store):
+    store.ingest("https://feed", [_entry(1), _entry(2)])
+
+    first = store.select_fresh_entry()
+    assert store.mark_shared(first.id) is True
+    second = store.select_fresh_entry()
+    assert second is not None and second.id != first.id
+
+    store.mark_shared(second.id)
+    assert store.select_fresh_entry() is None
+    # Shared entries stay shared even when the feed returns them again.
+    assert store.ingest("https://feed", [_entry(1), _entry(2)]) == 0
+    assert store.select_fresh_entry() is None
+
+
+def test_selected_entries_are_reserved_until_released(store):
+    store.ingest("https://feed", [_entry(1), _entry(2)])
+
+    first = store.select_fresh_entry()
+    second = store.select_fresh_entry()  # e.g. a manual run overlapping the scheduled one
+    assert second is not None and second.id != first.id
+    assert store.select_fresh_entry() is None
+
+    assert store.release(first.id) is True
+    assert store.select_fresh_entry().id == first.id
+    # Shared entries cannot be released back into the pool.
+    store.mark_shared(second.id)
+    assert store.release(second.id) is False
+
+
+def test_reservations_of_an_interrupted_run_expire(store, session_factory):
+    store.ingest("https://feed", [_entry(1)])
+    entry = store.select_fresh_entry()
+    assert store.select_fresh_entry() is None  # Still reserved by the (now dead) run
+
+    db = session_factory()
+    try:
+        db.query(FeedEntry).update({"status_changed_at": datetime.datetime.utcnow() - datetime.timedelta(hours=1)})
+        db.commit()
+    finally:
+        db.close()
+
+    with patch("src.feed_store.settings.FEED_RESERVATION_TIMEOUT_MINUTES", 30):
+        assert store.select_fresh_entry().id == entry.id
+    assert store.release_stale_reservations(older_than_minutes=30) == 0  # Freshly reserved again
+
+
+def test_a_candidate_claimed_meanwhile_is_passed_over(store):
+    store.ingest("https://feed", [_entry(1), _entry(2)])
+    claim = store._claim
+    taken = []
+
+    def claim_after_another_run(db, entry_id):
+        if not taken:
+            # Another run reserves the candidate between our query and our claim.
+            taken.append(entry_id)
+            claim(db, entry_id)
+        return claim(db, entry_id)
+
+    with patch.object(store, "_claim", side_effect=claim_after_another_run):
+        entry = store.select_fresh_entry()
+    assert entry is not None and entry.id != taken[0]
+    assert store.select_fresh_entry() is None
+
+
+def test_stale_entries_are_not_selected(store):
+    old = time.gmtime(time.time() - 10 * 24 * 3600)
+    store.ingest("https://feed", [_entry(1, published_parsed=old)])
+    assert store.select_fresh_entry(max_age_hours=72) is None
+    assert store.select_fresh_entry(max_age_hours=24 * 30) is not None
+
+
+def test_unchanged_and_failed_feeds_are_not_reingested(store):
+    results = {
+        "https://a": FeedResult("https://a", [_entry(1)]),
+        "https://b": FeedResult("https://b", [_entry(2)], not_modified=True),
+        "https://c": FeedResult("https://c", [_entry(3)], error="timeout"),
+    }
+    with patch.object(store, "ingest", wraps=store.ingest) as mock_ingest:
+        assert store.ingest_results(results) == 1
+    mock_ingest.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_post_creation_and_discovery_read_only_from_the_store(store):
+    from src.post_discovery import PostDiscovery, DISCOVERY_RSS_FEEDS
+    from src.worker import RSS_FEEDS, find_shareable_article, ingest_feeds
+
+    results = {
+        RSS_FEEDS[0]: FeedResult(RSS_FEEDS[0], [_entry(1, title="Startup raises seed round")]),
+        DISCOVERY_RSS_FEEDS[0]: FeedResult(DISCOVERY_RSS_FEEDS[0], [_entry(2, title="AI agents at work")]),
+    }
+    fetch_all = AsyncMock(return_value=results)
+    with patch("src.worker.feed_store", store), \
+         patch("src.post_discovery.feed_store", store), \
+         patch("src.worker.feed_fetcher.fetch_all", fetch_all):
+        assert await ingest_feeds() == 2
+        fetch_all.reset_mock()
+
+        article = await find_shareable_article()
+        posts = await PostDiscovery(["ai"]).discover_posts_from_rss(max_posts=5)
+
+    fetch_all.assert_not_called()
+    assert article is not None
+    assert [post["title"] for post in posts] == ["AI agents at work"]
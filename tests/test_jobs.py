@@ -0,0 +1,59 @@
+"""Tests for the background job registry used by manual triggers."""
+import asyncio
+
+from src.jobs import JobRegistry
+
+
+def test_job_waits_for_followups_before_completing():
+    registry = JobRegistry()
+
+    async def runner(job_id):
+        registry.record_stage(job_id, "post_shared", "shared")
+        registry.expect_followups(job_id, 2)
+        return {"success": True, "message": "done", "url": "https://example.com"}
+
+    async def scenario():
+        job = registry.start("post_creation", runner)
+        assert job.status == "queued"
+        await asyncio.sleep(0.01)
+        return job
+
+    job = asyncio.run(scenario())
+    assert job.status == "waiting"
+    assert job.url == "https://example.com"
+
+    registry.record_stage(job.id, "liked", "liked", followup_done=True)
+    assert job.status == "waiting"
+    registry.record_stage(job.id, "summary_added", "summary", followup_done=True)
+    assert job.status == "completed"
+    assert [stage["stage"] for stage in job.to_dict()["stages"]] == ["post_shared", "liked", "summary_added"]
+
+
+def test_failed_and_crashed_jobs_are_marked_failed():
+    registry = JobRegistry()
+
+    async def failing(job_id):
+        return {"success": False, "message": "no article"}
+
+    async def crashing(job_id):
+        raise RuntimeError("boom")
+
+    async def scenario():
+        jobs = [registry.start("post_creation", failing), registry.start("post_creation", crashing)]
+        await asyncio.sleep(0.01)
+        return jobs
+
+    failed, crashed = asyncio.run(scenario())
+    assert failed.status == "failed" and failed.message == "no article"
+    assert crashed.status == "failed" and "boom" in crashed.message
+
+
+def test_registry_keeps_only_recent_jobs():
+    registry = JobRegistry(max_jobs=2)
+    first = registry.create("post_creation")
+    registry.create("post_creation")
+    registry.create("post_creation")
+    assert registry.get(first.id) is None
+    # Stages for unknown or missing job ids are ignored
+    registry.record_stage(None, "stage", "message")
+    registry.record_stage(first.id, "stage", "message")
@@ -0,0 +1,84 @@
+"""Tests for the Alembic migrations and the backend-specific engine settings."""
+import datetime
+
+import pytest
+from alembic.autogenerate import compare_metadata
+from alembic.migration import MigrationContext
+from sqlalchemy import inspect, text
+from sqlalchemy.pool import QueuePool
+
+from src.database import Base, async_database_url, build_engine
+from src.migrations import run_migrations
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = build_engine(f"sqlite:///{tmp_path / 'agent.db'}")
+    yield engine
+    engine.dispose()
+
+
+def _revision(engine):
+    with engine.connect() as conn:
+        return MigrationContext.configure(conn).get_current_revision()
+
+
+def test_migrations_build_the_schema_declared_by_the_models(engine):
+    run_migrations(engine)
+    assert _revision(engine) == "0002"
+    with engine.connect() as conn:
+        # Any difference would mean a model change without a migration
+        assert compare_metadata(MigrationContext.configure(conn), Base.metadata) == []
+
+
+def test_databases_from_before_migrations_are_stamped_and_upgraded(engine):
+    # The tables create_all() made before migrations existed, with some data in them
+    run_migrations(engine, revision="0001")
+    with engine.begin() as conn:
+        conn.execute(text("DROP TABLE alembic_version"))
+        conn.execute(
+            text("INSERT INTO action_logs (action_type, details, timestamp) VALUES ('Post Created', 'x', :ts)"),
+            {"ts": datetime.datetime(2025, 1, 1)},
+        )
+
+    run_migrations(engine)
+
+    assert _revision(engine) == "0002"
+    inspector = inspect(engine)
+    assert inspector.has_table("daily_quotas")
+    assert "ix_action_logs_timestamp" in {index["name"] for index in inspector.get_indexes("action_logs")}
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT COUNT(*) FROM action_logs")).scalar() == 1
+
+
+def test_tables_created_at_startup_by_older_versions_are_kept(engine):
+    run_migrations(engine, revision="0001")
+    with engine.begin() as conn:
+        conn.execute(text("DROP TABLE alembic_version"))
+        conn.execute(text(
+            "CREATE TABLE feed_entries (id INTEGER PRIMARY KEY, entry_hash VARCHAR(64) NOT NULL, feed_url VARCHAR, "
+            "guid VARCHAR, title VARCHAR, link VARCHAR, summary TEXT, published_at DATETIME NOT NULL, "
+            "first_seen_at DATETIME, status VARCHAR NOT NULL, status_changed_at DATETIME)"
+        ))
+        conn.execute(text("INSERT INTO feed_entries (entry_hash, published_at, status) VALUES ('h', '2025-01-01', 'shared')"))
+
+    run_migrations(engine)
+
+    columns = {column["name"] for column in inspect(engine).get_columns("feed_entries")}
+    assert "commented_at" in columns
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT status FROM feed_entries")).scalar() == "shared"
+
+
+def test_postgres_urls_get_a_tuned_queue_pool():
+    engine = build_engine("postgres://agent:secret@db:5432/linkedin_agent")  # Not connected
+    try:
+        assert engine.dialect.name == "postgresql"
+        assert isinstance(engine.pool, QueuePool)
+        assert engine.pool.size() == 5
+        assert engine.pool._pre_ping is True
+        assert engine.pool._recycle == 1800
+    finally:
+        engine.dispose()
+    assert async_database_url("postgresql://agent@db/linkedin_agent").drivername == "postgresql+asyncpg"
+    assert async_database_url("sqlite:///./linkedin_agent.db").drivername == "sqlite+aiosqlite"
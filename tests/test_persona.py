@@ -0,0 +1,54 @@
+"""Tests for the memoized persona prompt."""
+import os
+from unittest.mock import patch
+
+from src import persona
+
+
+def _use_files(tmp_path, about="About text", style="Post style", comment_style="Comment style"):
+    paths = {}
+    for attr, content in (("ABOUT_ME_PATH", about), ("POST_STYLE_FILE", style), ("COMMENT_STYLE_FILE", comment_style)):
+        path = tmp_path / f"{attr.lower()}.md"
+        path.write_text(content, encoding="utf-8")
+        paths[attr] = str(path)
+    return paths
+
+
+def test_persona_prompt_includes_data_files(tmp_path):
+    paths = _use_files(tmp_path)
+    with patch.multiple(persona.settings, **paths):
+        prompt = persona.get_persona_prompt()
+
+    assert prompt.startswith("You are Kürşat")
+    assert "**ABOUT ME:**\nAbout text" in prompt
+    assert "**POST STYLE:**\nPost style" in prompt
+    assert "**COMMENT STYLE:**\nComment style" in prompt
+
+
+def test_persona_prompt_is_memoized_until_files_change(tmp_path):
+    paths = _use_files(tmp_path)
+    with patch.multiple(persona.settings, **paths):
+        first = persona.get_persona_prompt()
+        version = persona.get_persona_version()
+
+        with patch("src.persona._build_persona_prompt") as mock_build:
+            assert persona.get_persona_prompt() is first
+            mock_build.assert_not_called()
+
+        about_path = paths["ABOUT_ME_PATH"]
+        with open(about_path, "w", encoding="utf-8") as f:
+            f.write("Updated about text")
+        stat = os.stat(about_path)
+        os.utime(about_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+        updated = persona.get_persona_prompt()
+        assert "Updated about text" in updated
+        assert persona.get_persona_version() != version
+
+
+def test_missing_persona_files_are_skipped(tmp_path):
+    missing = {attr: str(tmp_path / "missing.md") for attr in ("ABOUT_ME_PATH", "POST_STYLE_FILE", "COMMENT_STYLE_FILE")}
+    with patch.multiple(persona.settings, **missing):
+        prompt = persona.get_persona_prompt()
+    assert "**ABOUT ME:**" not in prompt
+    assert prompt == persona.PERSONA_TEMPLATE
@@ -0,0 +1,96 @@
+"""Tests for PostDiscovery's interest matcher and near-duplicate detection."""
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+from src.feed_store import FeedStore
+from src.post_discovery import (
+    DISCOVERY_RSS_FEEDS,
+    InterestMatcher,
+    PostDiscovery,
+    embed_texts,
+    find_near_duplicates,
+    get_interest_matcher,
+)
+
+
+def test_matches_whole_words_case_insensitively():
+    matcher = InterestMatcher(["AI", "startup", "c++"])
+    assert matcher.match("He said it was fine").interests == []
+    assert matcher.match("Why every Startup needs AI").interests == ["startup", "ai"]
+    assert matcher.match("Modern C++ tooling").interests == ["c++"]
+
+
+def test_prefers_the_longest_overlapping_interest():
+    matcher = InterestMatcher(["machine", "machine learning", "product", "production"])
+    assert matcher.match("Machine learning in production").interests == ["machine learning", "production"]
+    assert matcher.match("A machine for product teams").interests == ["machine", "product"]
+
+
+def test_score_counts_distinct_interests_and_repeats():
+    matcher = InterestMatcher(["ai", "saas"])
+    assert matcher.match("AI for SaaS").score == 2
+    assert matcher.match("AI, AI and more AI").score == 1.5
+    assert not matcher.match("Nothing relevant here")
+
+
+def test_scales_to_large_interest_lists():
+    interests = [f"topic{i}" for i in range(2000)] + ["devtools"]
+    matcher = InterestMatcher(interests)
+    assert matcher.match("New devtools and topic1999 news").interests == ["devtools", "topic1999"]
+    assert matcher.match("topic20000").interests == []
+
+
+def test_matcher_is_built_once_per_interest_set():
+    assert get_interest_matcher(["ai", "ux"]) is get_interest_matcher(["ai", "ux"])
+    assert InterestMatcher([]).match("anything").interests == []
+
+
+LAUNCH_HEADLINES = [
+    "OpenAI launches GPT-5 with better reasoning and a new agent mode for ChatGPT users",
+    "OpenAI's GPT-5 is here: better reasoning, new agent mode in ChatGPT",
+    "GPT-5 launches: OpenAI brings agent mode and improved reasoning to ChatGPT",
+]
+
+
+def test_embeddings_put_rewordings_of_a_story_close_together():
+    vectors = embed_texts(LAUNCH_HEADLINES + ["Stripe acquires startup to expand payments infrastructure"])
+    similarities = vectors @ vectors.T
+    assert np.allclose(np.diag(similarities), 1.0, atol=1e-5)
+    assert similarities[0, 1] > 0.6 and similarities[0, 2] > 0.6
+    assert similarities[0, 3] < 0.2
+
+
+def test_near_duplicates_of_seen_and_earlier_items_are_flagged():
+    texts = LAUNCH_HEADLINES[:2] + ["Stripe acquires startup to expand payments infrastructure"]
+    assert find_near_duplicates(texts, [], threshold=0.6) == [False, True, False]
+    assert find_near_duplicates(texts, [LAUNCH_HEADLINES[2]], threshold=0.6, within=False) == [True, True, False]
+
+
+@pytest.mark.asyncio
+async def test_discovery_skips_stories_already_shared(session_factory):
+    store = FeedStore(session_factory, bloom_capacity=1000, bloom_error_rate=0.01)
+    store.ingest("https://shared", [{"id": "s", "title": LAUNCH_HEADLINES[0], "link": "https://example.com/s"}])
+    store.mark_shared(1)
+    store.ingest(DISCOVERY_RSS_FEEDS[0], [
+        {"id": "1", "title": LAUNCH_HEADLINES[1], "link": "https://example.com/1"},
+        {"id": "2", "title": "Startup ships AI devtools for product teams", "link": "https://example.com/2"},
+    ])
+    with patch("src.post_discovery.feed_store", store):
+        posts = await PostDiscovery(["ai", "startup", "chatgpt"]).discover_posts_smart(max_posts=5)
+
+    assert [post["url"] for post in posts if post.get("entry_id")] == ["https://example.com/2"]
+    assert -1.0 <= posts[0]["similarity"] <= 1.0
+
+
+def test_article_selection_skips_near_duplicates_of_shared_stories(session_factory):
+    store = FeedStore(session_factory, bloom_capacity=1000, bloom_error_rate=0.01)
+    store.ingest("https://feed", [{"id": "s", "title": LAUNCH_HEADLINES[0], "link": "https://example.com/s"}])
+    store.mark_shared(1)
+    store.ingest("https://feed", [{"id": "d", "title": LAUNCH_HEADLINES[2], "link": "https://example.com/d"}])
+
+    duplicate_filter = lambda texts, seen: find_near_duplicates(texts, seen, threshold=0.6, within=False)
+    assert store.select_fresh_entry(duplicate_filter=duplicate_filter) is None
+    # The duplicate is remembered as skipped rather than re-checked on every run.
+    assert store.select_fresh_entry() is None
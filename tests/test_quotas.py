@@ -0,0 +1,118 @@
+"""Tests for the persistent daily quota service."""
+import datetime
+import threading
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from src.database import Base
+from src.post_discovery import ProfileDiscovery
+from src.quotas import COMMENT_QUOTA, INVITE_QUOTA, POST_QUOTA, QuotaService, quota_day
+
+LIMITS = {INVITE_QUOTA: 3, POST_QUOTA: 1}
+
+
+@pytest.fixture
+def quotas(session_factory):
+    return QuotaService(session_factory, LIMITS)
+
+
+def test_quota_day_follows_istanbul_midnight():
+    # 21:30 UTC is already the next day in Istanbul (UTC+3).
+    assert quota_day(datetime.datetime(2025, 1, 15, 20, 59)) == "2025-01-15"
+    assert quota_day(datetime.datetime(2025, 1, 15, 21, 30)) == "2025-01-16"
+
+
+def test_consume_stops_at_the_limit_and_resets_the_next_day(quotas):
+    day = datetime.datetime(2025, 1, 15, 9, 0)
+    assert [quotas.try_consume(INVITE_QUOTA, now=day) for _ in range(4)] == [True, True, True, False]
+    assert quotas.used(INVITE_QUOTA, now=day) == 3
+    assert quotas.try_consume(POST_QUOTA, now=day)  # Each action type has its own quota
+    assert quotas.try_consume(INVITE_QUOTA, now=day + datetime.timedelta(days=1))
+
+
+def test_release_gives_back_a_slot(quotas):
+    assert quotas.try_consume(POST_QUOTA)
+    assert not quotas.try_consume(POST_QUOTA)
+    quotas.release(POST_QUOTA)
+    assert quotas.remaining(POST_QUOTA) == 1
+    assert quotas.try_consume(POST_QUOTA)
+
+
+def test_quota_is_shared_across_instances_and_threads(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'quota.db'}", connect_args={"check_same_thread": False, "timeout": 30})
+    Base.metadata.create_all(bind=engine)
+    factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    limits = {INVITE_QUOTA: 25}
+    services = [QuotaService(factory, limits) for _ in range(4)]  # e.g. web and worker processes
+    granted = []
+
+    def spend(service):
+        for _ in range(20):
+            if service.try_consume(INVITE_QUOTA):
+                granted.append(1)
+
+    threads = [threading.Thread(target=spend, args=(service,)) for service in services]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    engine.dispose()
+
+    assert len(granted) == 25
+    assert services[0].used(INVITE_QUOTA) == 25
+
+
+def test_profile_discovery_counts_against_the_persistent_quota(quotas):
+    assert ProfileDiscovery(["ai"], quotas=quotas).record_invite_sent()
+    # A fresh instance (as built on every scheduler run) sees earlier invitations.
+    discovery = ProfileDiscovery(["ai"], quotas=quotas)
+    assert discovery.invited_today == 1
+    discovery.record_invite_sent()
+    discovery.record_invite_sent()
+    assert not ProfileDiscovery(["ai"], quotas=quotas).can_send_invite()
+
+
+@pytest.mark.asyncio
+async def test_failed_invitation_does_not_use_quota(quotas):
+    from src.worker import trigger_invitation_async
+
+    client = MagicMock()
+    client.get_profile = AsyncMock(return_value={"id": "urn:li:person:me"})
+    client.send_invitation = AsyncMock(side_effect=RuntimeError("boom"))
+    profile = {"urn_id": "urn:li:person:1", "public_id": "someone"}
+    with patch("src.worker.get_api_client", return_value=client), \
+         patch("src.worker.find_profile_to_invite", AsyncMock(return_value=profile)), \
+         patch("src.worker.quota_service", quotas), \
+         patch("src.worker.log_action"):
+        assert (await trigger_invitation_async())["success"] is False
+        assert quotas.used(INVITE_QUOTA) == 0
+
+        client.send_invitation = AsyncMock()
+        assert (await trigger_invitation_async())["success"] is True
+        assert quotas.used(INVITE_QUOTA) == 1
+
+
+@pytest.mark.asyncio
+async def test_manual_comment_counts_against_the_comment_quota(session_factory):
+    from src.main import manual_comment
+
+    quotas = QuotaService(session_factory, {COMMENT_QUOTA: 1})
+    client = MagicMock()
+    client.get_profile = AsyncMock(return_value={"id": "urn:li:person:me"})
+    client.submit_comment = AsyncMock(side_effect=RuntimeError("boom"))
+    request = MagicMock()
+    request.json = AsyncMock(return_value={"post_url": "https://www.linkedin.com/feed/update/urn:li:activity:1/", "comment": "Nice"})
+    with patch("src.linkedin_api_client.LinkedInApiClient", return_value=client), \
+         patch("src.worker.record_comment", new_callable=AsyncMock), \
+         patch("src.main.quota_service", quotas), \
+         patch("src.worker.log_action"):
+        assert (await manual_comment(request))["success"] is False
+        assert quotas.used(COMMENT_QUOTA) == 0  # A failed comment gives its slot back
+
+        client.submit_comment = AsyncMock()
+        assert (await manual_comment(request))["success"] is True
+        assert (await manual_comment(request))["success"] is False
+    client.submit_comment.assert_awaited_once()
@@ -0,0 +1,85 @@
+"""Tests for BM25 relevance ranking of feed entries and discovered posts."""
+import time
+from unittest.mock import patch
+
+import pytest
+
+from src.feed_store import FeedStore
+from src.ranking import BM25Index, build_relevance_query, tokenize
+
+
+def test_tokenize_drops_stopwords_and_keeps_language_names():
+    assert tokenize("The future of C++ and AI in SaaS") == ["future", "c++", "ai", "saas"]
+
+
+def test_index_updates_incrementally():
+    index = BM25Index()
+    index.add(1, "AI startup raises seed round")
+    index.add(2, "Gardening tips for spring")
+    query = build_relevance_query(["ai", "startup"])
+    assert [doc_id for doc_id, _ in index.rank(query)] == [1]
+
+    index.add(3, "AI startup AI agents for startup founders")
+    assert [doc_id for doc_id, _ in index.rank(query)][0] == 3
+
+    index.remove(3)
+    assert 3 not in index
+    assert [doc_id for doc_id, _ in index.rank(query)] == [1]
+
+
+def test_rare_terms_weigh_more_than_common_ones():
+    index = BM25Index()
+    for doc_id in range(10):
+        index.add(doc_id, "startup news")
+    index.add(10, "devtools news")
+    assert index.idf("devtools") > index.idf("startup")
+    assert index.score_text({"devtools": 1.0}, "devtools") > index.score_text({"startup": 1.0}, "startup")
+
+
+def test_index_evicts_oldest_documents():
+    index = BM25Index(max_documents=2)
+    index.add("a", "ai")
+    index.add("b", "ai")
+    index.add("c", "ai")
+    assert len(index) == 2 and "a" not in index
+
+
+def test_ranking_thousands_of_documents_is_fast():
+    index = BM25Index(max_documents=10000)
+    for doc_id in range(5000):
+        index.add(doc_id, f"article {doc_id} about cloud infra and product topic{doc_id % 50}")
+    index.add("best", "ai llm startup product")
+    query = build_relevance_query(["ai", "llm", "startup", "product"])
+
+    started = time.perf_counter()
+    ranked = index.rank(query, limit=5)
+    assert time.perf_counter() - started < 0.5
+    assert ranked[0][0] == "best"
+
+
+def test_store_selects_the_most_relevant_fresh_entry(session_factory):
+    store = FeedStore(session_factory, bloom_capacity=1000, bloom_error_rate=0.01)
+    entries = [
+        {"id": f"guid-{n}", "title": title, "link": f"https://example.com/{n}", "published_parsed": time.gmtime()}
+        for n, title in enumerate(["Celebrity gossip roundup", "How LLM agents change SaaS", "Weather update"])
+    ]
+    store.ingest("https://feed", entries)
+    query = build_relevance_query(["llm", "saas"])
+
+    assert store.select_fresh_entry(query=query).title == "How LLM agents change SaaS"
+
+
+@pytest.mark.asyncio
+async def test_discovery_returns_candidates_best_first(session_factory):
+    from src.post_discovery import PostDiscovery, DISCOVERY_RSS_FEEDS
+
+    store = FeedStore(session_factory, bloom_capacity=1000, bloom_error_rate=0.01)
+    store.ingest(DISCOVERY_RSS_FEEDS[0], [
+        {"id": "1", "title": "AI roundup", "link": "https://example.com/1", "summary": "Sports and weather"},
+        {"id": "2", "title": "AI startup builds LLM devtools", "link": "https://example.com/2", "summary": "LLM startup"},
+    ])
+    with patch("src.post_discovery.feed_store", store):
+        posts = await PostDiscovery(["ai", "llm", "startup"]).discover_posts_smart(max_posts=2)
+
+    assert [post["url"] for post in posts] == ["https://example.com/2", "https://example.com/1"]
+    assert posts[0]["relevance"] > posts[1]["relevance"]
@@ -0,0 +1,123 @@
+"""Tests for the shared token-bucket rate limiter and 429/5xx retry handling."""
+import asyncio
+import email.utils
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import httpx
+import pytest
+
+from src.linkedin_api_client import LinkedInApiClient
+from src.rate_limiter import RateLimitExceeded, TokenBucketLimiter, backoff_delay, parse_retry_after
+
+FAMILIES = {"comment": (2, 60), "read": (5, 60)}  # comment: burst of 2, then 1 token per second
+
+
+@pytest.fixture
+def limiter(session_factory):
+    return TokenBucketLimiter(session_factory, FAMILIES)
+
+
+def test_bucket_allows_bursts_then_refills(limiter):
+    assert limiter.try_acquire("comment", now=1000.0) == 0
+    assert limiter.try_acquire("comment", now=1000.0) == 0
+    assert limiter.try_acquire("comment", now=1000.0) == pytest.approx(1.0)
+    assert limiter.try_acquire("comment", now=1000.5) == pytest.approx(0.5)
+    assert limiter.try_acquire("comment", now=1001.0) == 0
+    # Other families have their own budget.
+    assert limiter.try_acquire("read", now=1000.0) == 0
+
+
+def test_budget_is_shared_through_the_database(session_factory):
+    web = TokenBucketLimiter(session_factory, FAMILIES)
+    worker = TokenBucketLimiter(session_factory, FAMILIES)
+    assert web.try_acquire("comment", now=1000.0) == 0
+    assert worker.try_acquire("comment", now=1000.0) == 0
+    assert web.try_acquire("comment", now=1000.0) > 0
+
+
+def test_block_stops_a_family_until_retry_after(limiter):
+    limiter.block("comment", 30, now=1000.0)
+    assert limiter.try_acquire("comment", now=1010.0) == pytest.approx(20.0)
+    assert limiter.try_acquire("comment", now=1031.0) == 0
+
+
+def test_acquire_fails_fast_when_the_wait_is_too_long(limiter):
+    limiter.block("comment", 3600)
+    with pytest.raises(RateLimitExceeded):
+        asyncio.run(limiter.acquire("comment", max_wait=5))
+
+
+def test_retry_after_parsing():
+    assert parse_retry_after("120") == 120
+    assert parse_retry_after(email.utils.formatdate(1060.0, usegmt=True), now=1000.0) == pytest.approx(60.0)
+    assert parse_retry_after("soon") is None
+    assert parse_retry_after(None) is None
+
+
+def test_backoff_is_jittered_and_capped():
+    with patch("src.rate_limiter.settings.RATE_LIMIT_BACKOFF_BASE_SECONDS", 1.0), \
+         patch("src.rate_limiter.settings.RATE_LIMIT_BACKOFF_MAX_SECONDS", 8.0):
+        delays = [backoff_delay(attempt) for attempt in range(10) for _ in range(20)]
+    assert all(0 <= delay <= 8.0 for delay in delays)
+    assert len(set(delays)) > 1
+    assert backoff_delay(0, "3") == 3
+
+
+def _response(status, headers=None, json_data=None):
+    request = httpx.Request("GET", "https://api.linkedin.com/v2/userinfo")
+    return httpx.Response(status, headers=headers or {}, json=json_data or {}, request=request)
+
+
+@pytest.mark.asyncio
+async def test_client_retries_429_honouring_retry_after_and_blocks_the_family():
+    http = MagicMock()
+    http.get = AsyncMock(side_effect=[_response(429, {"Retry-After": "2"}), _response(200, json_data={"sub": "me"})])
+    client = LinkedInApiClient(access_token="token", http_client=http)
+
+    with patch("src.linkedin_api_client.asyncio.sleep", new_callable=AsyncMock) as mock_sleep, \
+         patch("src.linkedin_api_client.rate_limiter") as mock_limiter:
+        mock_limiter.acquire = AsyncMock()
+        profile = await client.get_profile(use_cache=False)
+
+    assert profile["id"] == "me"
+    assert http.get.await_count == 2
+    mock_sleep.assert_awaited_once_with(2.0)
+    mock_limiter.block.assert_called_once_with("profile", 2.0)
+    assert mock_limiter.acquire.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_client_retries_5xx_but_not_for_comments_or_invitations():
+    http = MagicMock()
+    http.get = AsyncMock(side_effect=[_response(503), _response(502), _response(200, json_data={"sub": "me"})])
+    http.post = AsyncMock(return_value=_response(500))
+    client = LinkedInApiClient(access_token="token", http_client=http)
+
+    with patch("src.linkedin_api_client.asyncio.sleep", new_callable=AsyncMock), \
+         patch("src.linkedin_api_client.rate_limiter") as mock_limiter:
+        mock_limiter.acquire = AsyncMock()
+        assert (await client.get_profile(use_cache=False))["id"] == "me"
+        with pytest.raises(httpx.HTTPStatusError):
+            await client.submit_comment("me", "urn:li:activity:1", "Nice")
+        with pytest.raises(httpx.HTTPStatusError):
+            await client.send_invitation("me", "someone")
+
+    assert http.get.await_count == 3
+    assert http.post.await_count == 2  # A retried comment or invitation could be sent twice
+    mock_limiter.block.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_client_gives_up_after_max_retries():
+    http = MagicMock()
+    http.get = AsyncMock(return_value=_response(429))
+    client = LinkedInApiClient(access_token="token", http_client=http)
+
+    with patch("src.linkedin_api_client.asyncio.sleep", new_callable=AsyncMock), \
+         patch("src.linkedin_api_client.rate_limiter") as mock_limiter, \
+         patch("src.linkedin_api_client.settings.RATE_LIMIT_MAX_RETRIES", 2):
+        mock_limiter.acquire = AsyncMock()
+        with pytest.raises(httpx.HTTPStatusError):
+            await client.get_profile(use_cache=False)
+
+    assert http.get.await_count == 3
@@ -4,8 +4,8 @@ import asyncio
 
 
 def test_post_creation_timing():
-    """Test that post creation uses correct timing: 45s for like, 90s total for comment."""
-    from src.worker import trigger_post_creation_async
+    """Test that post creation queues the like at 45s and the summary comment at 90s."""
+    from src.worker import trigger_post_creation_async, like_post_followup, summary_comment_followup
     
     # Create mocks
     mock_article = MagicMock()
@@ -14,8 +14,10 @@ def test_post_creation_timing():
     
     with patch('src.worker.get_api_client') as mock_get_client, \
          patch('src.worker.find_shareable_article', return_value=mock_article), \
-         patch('src.worker.generate_text') as mock_generate, \
+         patch('src.worker.generate_text_async') as mock_generate, \
          patch('src.worker.log_action'), \
+         patch('src.worker.feed_store') as mock_store, \
+         patch('src.worker.enqueue_action') as mock_enqueue, \
          patch('asyncio.sleep') as mock_sleep:
         
         # Setup mock API client
@@ -30,21 +32,29 @@ def test_post_creation_timing():
         mock_generate.side_effect = ["Test post content", "Test Turkish summary"]
         
         # Run the async function
-        asyncio.run(trigger_post_creation_async())
-        
-        # Verify the sleep calls with correct timing
-        sleep_calls = mock_sleep.call_args_list
-        assert len(sleep_calls) == 2, "Should have two sleep calls"
+        result = asyncio.run(trigger_post_creation_async())
+        assert result["success"] is True
+        mock_store.mark_shared.assert_called_once_with(mock_article.id)
+        mock_store.release.assert_not_called()
         
-        # First sleep should be 45 seconds (before liking)
-        assert sleep_calls[0][0][0] == 45, "First sleep should be 45 seconds"
+        # The call returns without sleeping in-request
+        mock_sleep.assert_not_called()
+        mock_client.add_reaction.assert_not_called()
+        mock_client.submit_comment.assert_not_called()
         
-        # Second sleep should be 45 seconds (before commenting, totaling 90s)
-        assert sleep_calls[1][0][0] == 45, "Second sleep should be 45 seconds (totaling 90s)"
+        # Verify the follow-ups are queued with correct timing
+        enqueue_calls = mock_enqueue.call_args_list
+        assert len(enqueue_calls) == 2, "Should queue two follow-ups"
+        assert enqueue_calls[0].args[0] == "like_post"
+        assert enqueue_calls[0].kwargs["delay_seconds"] == 45, "Like should run after 45 seconds"
+        assert enqueue_calls[1].args[0] == "summary_comment"
+        assert enqueue_calls[1].kwargs["delay_seconds"] == 90, "Summary should run after 90 seconds total"
         
-        # Verify that like and comment were called
-        mock_client.add_reaction.assert_called_once()
-        mock_client.submit_comment.assert_called_once()
+        # Running the follow-ups performs the like and the comment
+        asyncio.run(like_post_followup(**enqueue_calls[0].args[1]))
+        asyncio.run(summary_comment_followup(**enqueue_calls[1].args[1]))
+        mock_client.add_reaction.assert_called_once_with("test_user_urn", "test_post_urn")
+        mock_client.submit_comment.assert_called_once_with("test_user_urn", "test_post_urn", "Test Turkish summary")
 
 
 def test_worker_imports():
@@ -53,3 +63,43 @@ def test_worker_imports():
     assert hasattr(worker, 'trigger_post_creation')
     assert hasattr(worker, 'trigger_commenting')
     assert hasattr(worker, 'trigger_invitation')
+
+
+def test_post_creation_generates_post_and_summary_concurrently():
+    """Test that both generations run at the same time and a failed summary only skips the comment."""
+    from src.worker import trigger_post_creation_async
+
+    mock_article = MagicMock()
+    mock_article.title = "Test Article"
+    mock_article.link = "https://test.com/article"
+    state = {"active": 0, "peak": 0}
+    real_sleep = asyncio.sleep
+
+    async def fake_generate(prompt):
+        state["active"] += 1
+        state["peak"] = max(state["peak"], state["active"])
+        await real_sleep(0)
+        state["active"] -= 1
+        return None if "Turkish" in prompt else "Test post content"
+
+    with patch('src.worker.get_api_client') as mock_get_client, \
+         patch('src.worker.find_shareable_article', return_value=mock_article), \
+         patch('src.worker.generate_text_async', side_effect=fake_generate), \
+         patch('src.worker.log_action'), \
+         patch('src.worker.feed_store') as mock_store, \
+         patch('src.worker.enqueue_action') as mock_enqueue:
+
+        mock_client = MagicMock()
+        mock_client.get_profile = AsyncMock(return_value={"id": "test_user_urn"})
+        mock_client.share_post = AsyncMock(return_value={"id": "test_post_urn"})
+        mock_client.add_reaction = AsyncMock()
+        mock_client.submit_comment = AsyncMock()
+        mock_get_client.return_value = mock_client
+
+        result = asyncio.run(trigger_post_creation_async())
+
+    assert state["peak"] == 2, "Post and summary should be generated concurrently"
+    assert result["success"] is True
+    mock_client.share_post.assert_called_once()
+    # Only the like is scheduled; the summary comment is skipped
+    assert mock_enqueue.call_count == 1